@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Usage: benchmark_collector.py [--scales 1,5,20] [--repeat N] [--output FILE] [--compare FILE]
+
+Times each stage of the collector on synthetic corpora from idl_corpus.py,
+running the collector's own functions under collector_profile:
+discovery of the IDL files, reading them, the pre-scan, parsing, conversion of the parsed
+definitions into dicts (interface_node_to_dict), merging of partial interfaces
+and implements, export to JSON and diffing against a modified snapshot.
+
+Each stage is run --repeat times and its fastest run is kept. --output writes
+the results as JSON together with the current commit, so results of two
+commits can be compared with --compare, which reports every stage that became
+slower by more than --threshold, and by at least 10 ms, and then exits with
+status 1.
+"""
+
+import copy
+import json
+import optparse
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import collect_idls_into_json
+import collector_profile
+import idl_corpus
+import idl_diff
+import interface_node_path
+
+_DEFAULT_SCALES = [1, 5, 20]
+_DEFAULT_THRESHOLD = 0.2
+# Slowdowns smaller than this are timer noise and never reported.
+_MIN_REGRESSION_SECONDS = 0.01
+_DIFF_SEED = 1
+# Fraction of the interfaces which are modified, removed or added for the diff stage.
+_CHANGED_FRACTION = 0.05
+STAGES = ['discovery', 'read', 'prescan', 'parse', 'to_dict', 'merge', 'export', 'diff']
+# The collector_profile stages which make up each stage.
+_PROFILE_STAGES = {
+    'discovery': ['discovery'],
+    'read': ['read'],
+    'prescan': ['prescan'],
+    'parse': ['parse'],
+    'to_dict': ['sort_definitions'],
+    'merge': ['merge_partials', 'merge_implements'],
+    'export': ['export'],
+    'diff': ['diff'],
+}
+
+
+def get_commit():
+    """Returns the commit hash of the working tree of this script, or None outside a git checkout."""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=open(os.devnull, 'w')).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def modify_snapshot(snapshot, seed=_DIFF_SEED):
+    """Returns a copy of |snapshot| in which a few interfaces lost or gained members, or were removed or added."""
+    rng = random.Random(seed)
+    modified = copy.deepcopy(snapshot)
+    names = sorted(modified)
+    changed_count = max(1, int(len(names) * _CHANGED_FRACTION))
+    for name in rng.sample(names, changed_count):
+        interface = modified[name]
+        if interface['Attributes']:
+            interface['Attributes'].pop(rng.randrange(len(interface['Attributes'])))
+        interface['Operations'].append({'Name': 'addedOperation', 'Type': 'void', 'Arguments': [],
+                                        'ExtAttributes': [], 'Static': False})
+    for name in rng.sample(names, max(1, changed_count // 5)):
+        modified.pop(name, None)
+    for index in range(max(1, changed_count // 5)):
+        added = copy.deepcopy(snapshot[names[index]])
+        added['Name'] = 'AddedInterface%d' % index
+        modified[added['Name']] = added
+    return modified
+
+
+def run_stages(source_dir, output_dir):
+    """Runs every stage once on the corpus under |source_dir|.
+    The stages are the collector's own functions, timed by collector_profile like with --profile.
+    Args:
+      source_dir: Source directory of a corpus
+      output_dir: directory of the exported snapshot
+    Returns:
+      A tuple of (dict of seconds keyed by stage, dict of counts of files and interfaces)
+    """
+    parser = collect_idls_into_json.get_parser()
+    profile = collector_profile.start()
+    try:
+        with collector_profile.stage('discovery'):
+            paths = list(interface_node_path.get_idl_files(source_dir))
+        # Without prefetched contents sort_file_definitions times reading each file as its 'read' stage.
+        file_definitions_list = [collect_idls_into_json.sort_file_definitions(parser, path) for path in paths]
+        snapshot = collect_idls_into_json.merge_interfaces(
+            *collect_idls_into_json.merge_file_definitions(file_definitions_list))
+        with collector_profile.stage('export'):
+            collect_idls_into_json.export_to_jsonfile(snapshot, os.path.join(output_dir, 'snapshot.json'))
+        modified = modify_snapshot(snapshot)
+        with collector_profile.stage('diff'):
+            idl_diff.interfaces_diff(snapshot, modified)
+    finally:
+        collector_profile.stop()
+    seconds = {}
+    for stage, profile_stages in _PROFILE_STAGES.iteritems():
+        seconds[stage] = sum(profile.stages[name]['wall_seconds'] for name in profile_stages if name in profile.stages)
+    return seconds, {'Files': len(paths), 'ParsedFiles': len(profile.file_seconds), 'Interfaces': len(snapshot)}
+
+
+def benchmark_scale(scale, repeat, corpus_dir=None):
+    """Returns the fastest time of each stage and the size of the corpus of |scale|.
+    Args:
+      scale: scale of the corpus
+      repeat: number of runs of each stage
+      corpus_dir: directory to generate the corpus in and keep, or None for a temporary directory
+    Returns:
+      dict with 'Seconds' keyed by stage and the counts of run_stages
+    """
+    temp_dir = tempfile.mkdtemp()
+    output_dir = corpus_dir or temp_dir
+    try:
+        start = time.time()
+        idl_corpus.generate_corpus(output_dir, scale)
+        generate_seconds = time.time() - start
+        best = None
+        for _ in range(repeat):
+            seconds, counts = run_stages(os.path.join(output_dir, 'Source'), temp_dir)
+            if best is None:
+                best = seconds
+            else:
+                best = dict((stage, min(best[stage], seconds[stage])) for stage in STAGES)
+        result = {'Seconds': best, 'GenerateSeconds': generate_seconds}
+        result.update(counts)
+        return result
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def compare_results(baseline, current, threshold=_DEFAULT_THRESHOLD):
+    """Returns the stages which became slower than in |baseline|.
+    Args:
+      baseline: results loaded from a previous --output file
+      current: results of this run
+      threshold: allowed slowdown, e.g. 0.2 for 20%
+    Returns:
+      list of (scale, stage, baseline seconds, current seconds) of each regression, ordered by scale and stage
+    """
+    regressions = []
+    for scale in sorted(current['Scales'], key=int):
+        if scale not in baseline['Scales']:
+            continue
+        old_seconds = baseline['Scales'][scale]['Seconds']
+        new_seconds = current['Scales'][scale]['Seconds']
+        for stage in STAGES:
+            if stage not in old_seconds or new_seconds[stage] - old_seconds[stage] < _MIN_REGRESSION_SECONDS:
+                continue
+            if new_seconds[stage] > old_seconds[stage] * (1 + threshold):
+                regressions.append((scale, stage, old_seconds[stage], new_seconds[stage]))
+    return regressions
+
+
+def write_table(results, baseline=None, out=sys.stdout):
+    out.write('%6s %-10s %12s %12s\n' % ('scale', 'stage', 'seconds', 'baseline'))
+    for scale in sorted(results['Scales'], key=int):
+        seconds = results['Scales'][scale]['Seconds']
+        old_seconds = baseline['Scales'].get(scale, {}).get('Seconds', {}) if baseline else {}
+        for stage in STAGES:
+            old = '%12.3f' % old_seconds[stage] if stage in old_seconds else '%12s' % '-'
+            out.write('%6s %-10s %12.3f %s\n' % (scale + 'x', stage, seconds[stage], old))
+
+
+def parse_options(args):
+    option_parser = optparse.OptionParser(usage='%prog [--scales 1,5,20] [--repeat N] [--output FILE] [--compare FILE]')
+    option_parser.add_option('--scales', default=','.join(str(scale) for scale in _DEFAULT_SCALES),
+                             help='comma separated scales of the corpora, 1 being about the size of Blink')
+    option_parser.add_option('--repeat', type='int', default=3,
+                             help='number of runs of each stage; the fastest is reported')
+    option_parser.add_option('--output', metavar='FILE', help='write the results to FILE as JSON')
+    option_parser.add_option('--compare', metavar='FILE', help='compare with the results in FILE')
+    option_parser.add_option('--threshold', type='float', default=_DEFAULT_THRESHOLD,
+                             help='slowdown reported as a regression by --compare, e.g. 0.2 for 20%')
+    option_parser.add_option('--keep-corpus', metavar='DIR',
+                             help='generate the corpora in DIR/<scale>x and keep them')
+    options, args = option_parser.parse_args(args)
+    try:
+        options.scales = [int(scale) for scale in options.scales.split(',')]
+    except ValueError:
+        options.scales = []
+    if args or not options.scales or min(options.scales) < 1 or options.repeat < 1:
+        option_parser.print_usage()
+        exit(1)
+    return options
+
+
+def main(args):
+    options = parse_options(args)
+    results = {'Commit': get_commit(), 'Python': platform.python_version(), 'Repeat': options.repeat, 'Scales': {}}
+    for scale in options.scales:
+        corpus_dir = os.path.join(options.keep_corpus, '%dx' % scale) if options.keep_corpus else None
+        results['Scales'][str(scale)] = benchmark_scale(scale, options.repeat, corpus_dir)
+    baseline = None
+    if options.compare:
+        with open(options.compare, 'r') as f:
+            baseline = json.load(f)
+    write_table(results, baseline)
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(results, f, sort_keys=True, indent=4)
+    if baseline:
+        regressions = compare_results(baseline, results, options.threshold)
+        for scale, stage, old_seconds, new_seconds in regressions:
+            sys.stdout.write('Regression at %sx in %s: %.3f s -> %.3f s\n' % (scale, stage, old_seconds, new_seconds))
+        if regressions:
+            exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Usage: benchmark_memory.py [--scale N] [--low-memory] [path_file.txt]
+
+Measures the peak resident memory of collect_idls_into_json.py with and
+without sharing of names, types and extended attributes (see
+collect_idls_into_json.set_interning). Peak memory is process-wide and never
+goes down, so each configuration collects in a child process of its own.
+
+The IDL files are those listed in path_file.txt, or a synthetic corpus of
+idl_corpus.py at --scale. Besides the peak, the growth of the peak during
+collection is reported, which leaves out the interpreter and the parser.
+"""
+
+import json
+import optparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import utilities
+
+import collect_idls_into_json
+import collector_profile
+import idl_corpus
+
+_SHARED = 'shared'
+_UNSHARED = 'unshared'
+_CONFIGURATIONS = [_UNSHARED, _SHARED]
+
+
+def measure_collection(path_file, interning, low_memory=False):
+    """Collects the IDL files of |path_file| in this process and returns its memory use.
+    Args:
+      path_file: text file listing IDL file paths
+      interning: True to share names, types and extended attributes
+      low_memory: True to release each parse tree as soon as it is converted
+    Returns:
+      dict of peak RSS in KB before and after collecting, and the number of interfaces
+    """
+    collect_idls_into_json.set_interning(interning)
+    collect_idls_into_json.set_low_memory(low_memory)
+    path_list = utilities.read_file_to_list(path_file)
+    collect_idls_into_json.get_parser()
+    startup_rss_kb = collector_profile.get_peak_rss_kb()
+    interfaces = collect_idls_into_json.collect_interfaces(path_list)
+    return {
+        'startup_rss_kb': startup_rss_kb,
+        'peak_rss_kb': collector_profile.get_peak_rss_kb(),
+        'interfaces': len(interfaces),
+    }
+
+
+def run_child(path_file, configuration, low_memory):
+    """Returns the output of measure_collection run in a new process."""
+    command = [sys.executable, os.path.abspath(__file__), '--child', configuration]
+    if low_memory:
+        command.append('--low-memory')
+    return json.loads(subprocess.check_output(command + [path_file]))
+
+
+def write_table(results, out=sys.stdout):
+    out.write('%10s %12s %15s %12s\n' % ('', 'interfaces', 'peak RSS (KB)', 'growth (KB)'))
+    for configuration in _CONFIGURATIONS:
+        result = results[configuration]
+        out.write('%10s %12d %15d %12d\n' % (configuration, result['interfaces'], result['peak_rss_kb'],
+                                             result['peak_rss_kb'] - result['startup_rss_kb']))
+    unshared = results[_UNSHARED]['peak_rss_kb'] - results[_UNSHARED]['startup_rss_kb']
+    shared = results[_SHARED]['peak_rss_kb'] - results[_SHARED]['startup_rss_kb']
+    if unshared > 0:
+        out.write('Sharing saves %d KB, %.1f%% of the growth.\n' % (unshared - shared, 100.0 * (unshared - shared) / unshared))
+
+
+def parse_options(args):
+    option_parser = optparse.OptionParser(usage='%prog [--scale N] [--low-memory] [<path_file.txt>]')
+    option_parser.add_option('--scale', type='int', default=1,
+                             help='scale of the synthetic corpus used without a path file')
+    option_parser.add_option('--low-memory', action='store_true', default=False,
+                             help='release each parse tree as soon as it is converted')
+    option_parser.add_option('--child', choices=_CONFIGURATIONS, help=optparse.SUPPRESS_HELP)
+    options, args = option_parser.parse_args(args)
+    if len(args) > 1 or options.scale < 1 or (options.child and not args):
+        option_parser.print_usage()
+        exit(1)
+    return options, args
+
+
+def main(args):
+    options, args = parse_options(args)
+    if options.child:
+        json.dump(measure_collection(args[0], options.child == _SHARED, options.low_memory), sys.stdout)
+        return
+    temp_dir = None
+    try:
+        if args:
+            path_file = args[0]
+        else:
+            temp_dir = tempfile.mkdtemp()
+            path_file = os.path.join(temp_dir, 'paths.txt')
+            with open(path_file, 'w') as f:
+                f.write(''.join(path + '\n' for path in idl_corpus.generate_corpus(temp_dir, options.scale)))
+        results = {configuration: run_child(path_file, configuration, options.low_memory)
+                   for configuration in _CONFIGURATIONS}
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir)
+    write_table(results)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
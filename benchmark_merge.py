@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Usage: benchmark_merge.py [size ...]
+
+Times the merge of partial interfaces and implements statements on synthetic
+trees of |size| interfaces (default: 1000 10000 50000). The time per
+interface should stay flat as the size grows.
+"""
+
+import sys
+import time
+
+import collect_idls_into_json
+import interface_to_json
+
+_DEFAULT_SIZES = [1000, 10000, 50000]
+_MEMBERS_PER_INTERFACE = 3
+
+
+def make_interface(name, file_path):
+    members = [{'Name': '%s_%d' % (name, index), 'Type': 'long', 'ExtAttributes': []}
+               for index in range(_MEMBERS_PER_INTERFACE)]
+    return {
+        'Name': name,
+        'FilePath': file_path,
+        'Consts': list(members),
+        'Attributes': list(members),
+        'Operations': list(members),
+        'ExtAttributes': [],
+        'Inherit': {'Parent': None},
+    }
+
+
+def make_tree(size):
+    """Returns a synthetic collector input of |size| interfaces, |size|/3 partials and |size|/5 implements."""
+    names = ['Interface%d' % index for index in range(size)]
+    interfaces_dict = {name: make_interface(name, name + '.idl') for name in names}
+    partials_dict = {name: make_interface(name, name + 'Partial.idl') for name in names[::3]}
+    implement_list = [{'Name': names[index], 'Reference': names[index - 1]} for index in range(1, size, 5)]
+    return interfaces_dict, partials_dict, implement_list
+
+
+def make_interface_to_json_tree(size):
+    """Returns a synthetic input of interface_to_json.merge_partial_interface."""
+    interface_dict_list = []
+    partial_dict_list = []
+    for index in range(size):
+        name = 'Interface%d' % index
+        interface_dict_list.append({'Name': name, 'FilePath': name + '.idl', 'Attribute': [], 'Operation': [],
+                                    'ExtAttributes': [], 'Constant': []})
+        if index % 3 == 0:
+            partial_dict_list.append({'Name': name, 'FilePath': name + 'Partial.idl', 'Attribute': [],
+                                      'Operation': [], 'ExtAttributes': [], 'Constant': []})
+    return interface_dict_list, partial_dict_list
+
+
+def time_call(function, *args):
+    start = time.time()
+    function(*args)
+    return time.time() - start
+
+
+def main(args):
+    sizes = [int(arg) for arg in args] or _DEFAULT_SIZES
+    sys.stdout.write('%10s %30s %30s\n' % ('interfaces', 'merge_interfaces us/if', 'merge_partial_interface us/if'))
+    for size in sizes:
+        merge_seconds = time_call(collect_idls_into_json.merge_interfaces, *make_tree(size))
+        partial_seconds = time_call(interface_to_json.merge_partial_interface, *make_interface_to_json_tree(size))
+        sys.stdout.write('%10d %30.2f %30.2f\n' % (size, merge_seconds * 1e6 / size, partial_seconds * 1e6 / size))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
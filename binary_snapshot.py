@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Usage: binary_snapshot.py to-binary|to-json input_file output_file
+
+Converts an interface snapshot between the JSON format of
+collect_idls_into_json.py and a compact binary format which is memory-mapped
+and decoded lazily, one interface at a time.
+
+Binary layout (little-endian):
+  header:  magic, string count, interface count, offsets of the three tables
+  strings: (string count + 1) uint32 offsets, followed by UTF-8 text; every
+           name, type and extended attribute is stored once and referenced by id
+  index:   (name id, record offset, record length) per interface, sorted by name
+  records: one tagged value tree per interface
+"""
+
+import collections
+import json
+import mmap
+import struct
+import sys
+
+import lazy_snapshot
+import sharded_snapshot
+import snapshot_writer
+
+MAGIC = 'IDLSNAP1'
+_HEADER = struct.Struct('<8sIIIII')
+_UINT32 = struct.Struct('<I')
+_INDEX_ENTRY = struct.Struct('<III')
+_INT64 = struct.Struct('<q')
+_DOUBLE = struct.Struct('<d')
+
+_TAG_NONE = 0
+_TAG_FALSE = 1
+_TAG_TRUE = 2
+_TAG_STRING = 3
+_TAG_INT = 4
+_TAG_FLOAT = 5
+_TAG_LIST = 6
+_TAG_DICT = 7
+
+
+def _to_unicode(string):
+    if isinstance(string, str):
+        return string.decode('utf-8')
+    return string
+
+
+class _StringTable(object):
+    """Assigns an id to each distinct string."""
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def get_id(self, string):
+        string = _to_unicode(string)
+        string_id = self.ids.get(string)
+        if string_id is None:
+            string_id = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+
+def _encode_value(value, strings, out):
+    if value is None:
+        out.append(chr(_TAG_NONE))
+    elif value is False:
+        out.append(chr(_TAG_FALSE))
+    elif value is True:
+        out.append(chr(_TAG_TRUE))
+    elif isinstance(value, basestring):
+        out.append(chr(_TAG_STRING) + _UINT32.pack(strings.get_id(value)))
+    elif isinstance(value, (int, long)):
+        out.append(chr(_TAG_INT) + _INT64.pack(value))
+    elif isinstance(value, float):
+        out.append(chr(_TAG_FLOAT) + _DOUBLE.pack(value))
+    elif isinstance(value, (list, tuple)):
+        out.append(chr(_TAG_LIST) + _UINT32.pack(len(value)))
+        for item in value:
+            _encode_value(item, strings, out)
+    elif isinstance(value, dict):
+        out.append(chr(_TAG_DICT) + _UINT32.pack(len(value)))
+        for key in sorted(value):
+            out.append(_UINT32.pack(strings.get_id(key)))
+            _encode_value(value[key], strings, out)
+    else:
+        raise Exception('Cannot encode %r in a binary snapshot.' % (value,))
+
+
+def write_binary_snapshot(dictionary, binary_file):
+    """Writes a dict of interface information into a binary snapshot.
+    Args:
+      dictionary: dict of interface information keyed by interface name
+      binary_file: output file path
+    """
+    strings = _StringTable()
+    index = []
+    records = []
+    record_offset = 0
+    for name in sorted(dictionary, key=_to_unicode):
+        out = []
+        _encode_value(dictionary[name], strings, out)
+        record = ''.join(out)
+        index.append((strings.get_id(name), record_offset, len(record)))
+        records.append(record)
+        record_offset += len(record)
+    encoded_strings = [string.encode('utf-8') for string in strings.strings]
+    string_offsets = [0]
+    for encoded in encoded_strings:
+        string_offsets.append(string_offsets[-1] + len(encoded))
+    strings_offset = _HEADER.size
+    index_offset = strings_offset + _UINT32.size * len(string_offsets) + string_offsets[-1]
+    records_offset = index_offset + _INDEX_ENTRY.size * len(index)
+    with open(binary_file, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, len(encoded_strings), len(index), strings_offset, index_offset, records_offset))
+        f.write(struct.pack('<%dI' % len(string_offsets), *string_offsets))
+        f.writelines(encoded_strings)
+        for entry in index:
+            f.write(_INDEX_ENTRY.pack(*entry))
+        f.writelines(records)
+
+
+class BinarySnapshot(collections.Mapping):
+    """Read-only dict of interface information backed by a memory-mapped binary snapshot.
+    Interfaces are decoded on access; strings are decoded once and shared.
+    """
+
+    def __init__(self, binary_file):
+        with open(binary_file, 'rb') as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self._string_count, self._interface_count, strings_offset,
+         self._index_offset, self._records_offset) = _HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            raise Exception('%s is not a binary snapshot.' % binary_file)
+        self._string_offsets = struct.unpack_from('<%dI' % (self._string_count + 1), self._buffer, strings_offset)
+        self._text_offset = strings_offset + _UINT32.size * (self._string_count + 1)
+        self._strings = [None] * self._string_count
+
+    def close(self):
+        self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get_string(self, string_id):
+        string = self._strings[string_id]
+        if string is None:
+            start = self._text_offset + self._string_offsets[string_id]
+            end = self._text_offset + self._string_offsets[string_id + 1]
+            string = self._strings[string_id] = self._buffer[start:end].decode('utf-8')
+        return string
+
+    def _get_index_entry(self, position):
+        return _INDEX_ENTRY.unpack_from(self._buffer, self._index_offset + _INDEX_ENTRY.size * position)
+
+    def _find(self, name):
+        low = 0
+        high = self._interface_count
+        while low < high:
+            middle = (low + high) // 2
+            entry = self._get_index_entry(middle)
+            middle_name = self._get_string(entry[0])
+            if middle_name < name:
+                low = middle + 1
+            elif middle_name > name:
+                high = middle
+            else:
+                return entry
+        return None
+
+    def _decode_value(self, offset):
+        tag = ord(self._buffer[offset])
+        offset += 1
+        if tag == _TAG_STRING:
+            return self._get_string(_UINT32.unpack_from(self._buffer, offset)[0]), offset + _UINT32.size
+        if tag == _TAG_DICT:
+            count = _UINT32.unpack_from(self._buffer, offset)[0]
+            offset += _UINT32.size
+            value = {}
+            for _ in xrange(count):
+                key = self._get_string(_UINT32.unpack_from(self._buffer, offset)[0])
+                value[key], offset = self._decode_value(offset + _UINT32.size)
+            return value, offset
+        if tag == _TAG_LIST:
+            count = _UINT32.unpack_from(self._buffer, offset)[0]
+            offset += _UINT32.size
+            value = []
+            for _ in xrange(count):
+                item, offset = self._decode_value(offset)
+                value.append(item)
+            return value, offset
+        if tag == _TAG_NONE:
+            return None, offset
+        if tag == _TAG_FALSE:
+            return False, offset
+        if tag == _TAG_TRUE:
+            return True, offset
+        if tag == _TAG_INT:
+            return _INT64.unpack_from(self._buffer, offset)[0], offset + _INT64.size
+        if tag == _TAG_FLOAT:
+            return _DOUBLE.unpack_from(self._buffer, offset)[0], offset + _DOUBLE.size
+        raise Exception('Unknown tag %d in a binary snapshot.' % tag)
+
+    def __getitem__(self, name):
+        entry = self._find(name)
+        if entry is None:
+            raise KeyError(name)
+        return self._decode_value(self._records_offset + entry[1])[0]
+
+    def __contains__(self, name):
+        return self._find(name) is not None
+
+    def __iter__(self):
+        for position in xrange(self._interface_count):
+            yield self._get_string(self._get_index_entry(position)[0])
+
+    def __len__(self):
+        return self._interface_count
+
+
+def is_binary_snapshot(snapshot_file):
+    """Returns True if |snapshot_file| is a binary snapshot, otherwise False."""
+    with open(snapshot_file, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def load_snapshot(snapshot_file):
+    """Returns a dict-like view of a JSON or binary snapshot.
+    Args:
+      snapshot_file: snapshot file path
+    Returns:
+      ShardedSnapshot for a shard directory, BinarySnapshot for a binary snapshot,
+      LazySnapshot for a JSON snapshot with an offset index, otherwise dict loaded from JSON
+    """
+    if sharded_snapshot.is_sharded_snapshot(snapshot_file):
+        return sharded_snapshot.ShardedSnapshot(snapshot_file)
+    if is_binary_snapshot(snapshot_file):
+        return BinarySnapshot(snapshot_file)
+    if lazy_snapshot.load_offset_index(snapshot_file) is not None:
+        return lazy_snapshot.LazySnapshot(snapshot_file)
+    with open(snapshot_file, 'r') as f:
+        return json.load(f)
+
+
+def usage():
+    sys.stdout.write('Usage: binary_snapshot.py to-binary|to-json <input_file> <output_file>\n')
+
+
+def main(args):
+    if len(args) != 3 or args[0] not in ('to-binary', 'to-json'):
+        usage()
+        exit(1)
+    command, input_file, output_file = args
+    if command == 'to-binary':
+        with open(input_file, 'r') as f:
+            write_binary_snapshot(json.load(f), output_file)
+    else:
+        with BinarySnapshot(input_file) as snapshot:
+            with open(output_file, 'w') as f:
+                snapshot_writer.write_interfaces(snapshot.iteritems(), f)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
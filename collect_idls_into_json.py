@@ -3,17 +3,34 @@
 # Use of this source code is governed by a BSD-style license that can be
 # found in the LICENSE file.
 
-"""Usage: collect_idls_into_json.py path_file.txt json_file.json
+"""Usage: collect_idls_into_json.py [--jobs N] [--cache-dir DIR | --no-cache] [--provenance FILE] [--pretty] [--hash-tree] [--index] [--low-memory] [--shards DIR [--shard-buckets N]] [--profile FILE] path_file.txt json_file.json
 This script collects and organizes interface information and that information dumps into json file.
 """
 
-import json
+import collections
+import itertools
+import multiprocessing
+import optparse
 import os
 import sys
 import utilities
+import weakref
 
+import blink_idl_parser
+import collector_profile
+import hash_tree
+import idl_parser_factory
+import idl_records
+import interface_node_path
+import lazy_snapshot
+import parse_cache
+import prefetch_reader
+import sharded_snapshot
+import snapshot_writer
 
-from blink_idl_parser import parse_file, BlinkIDLParser
+
+from blink_idl_parser import parse_file
+from interface_node_path import may_define_interfaces_in_text
 
 _INTERFACE = 'Interface'
 _IMPLEMENT = 'Implements'
@@ -51,8 +68,116 @@ _EXTATTRIBUTES = 'ExtAttributes'
 _EXTATTRIBUTE = 'ExtAttribute'
 _INHERIT = 'Inherit'
 _PROP_REFERENCE = 'REFERENCE'
+_REFERENCE = 'Reference'
 _PARTIAL_FILEPATH = 'Partial_FilePaths'
 _MEMBERS = [_CONSTS, _ATTRIBUTES, _OPERATIONS]
+_PATHS = 'Paths'
+_FILES = 'Files'
+_INTERFACES = 'Interfaces'
+_PARTIALS = 'Partials'
+_SEGMENTS = 'Segments'
+_PRETTY_INDENT = 4
+# Bump when the output of sort_file_definitions changes shape, to invalidate cached entries.
+_CACHE_FORMAT_VERSION = '1'
+
+# True to release the parse tree of each file as soon as its definitions are sorted; see set_low_memory.
+_low_memory = False
+# Number of files read ahead while parsing in this process; see set_prefetch_window.
+_prefetch_window = prefetch_reader.DEFAULT_WINDOW
+
+
+# False to give every name, type and extended attribute its own object; see set_interning.
+_interning = True
+# ExtAttribute records are freed once no interface refers to them, like interned strings.
+_extattr_records = weakref.WeakValueDictionary()
+
+
+def set_interning(enabled):
+    """Selects whether names, types and extended attributes are shared between members.
+    Sharing is always on in the collector; benchmark_memory.py turns it off to measure what it saves.
+    Args:
+      enabled: True to share
+    """
+    global _interning
+    _interning = enabled
+
+
+def intern_string(string):
+    """Returns the shared copy of |string|; see idl_records.intern_string.
+    Names, types and file paths repeat across thousands of members, so each distinct one is stored once.
+    Args:
+      string: str, unicode or any other value, which is returned as is
+    Returns:
+      value equal to |string|
+    """
+    if not _interning:
+        return string
+    return idl_records.intern_string(string)
+
+
+def intern_type(idl_type):
+    """Returns the shared copy of a type, which is a str or a list of str for a union type.
+    Args:
+      idl_type: output of get_attribute_type
+    Returns:
+      type equal to |idl_type|
+    """
+    if isinstance(idl_type, list):
+        return [intern_string(type_name) for type_name in idl_type]
+    return intern_string(idl_type)
+
+
+class ExtAttributeRecord(dict):
+    """An immutable ExtAttribute dict, shared by every occurrence of the same extended attribute."""
+
+    def _raise_immutable(self, *args, **kwargs):
+        raise TypeError('ExtAttribute records are shared and cannot be modified.')
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _raise_immutable
+
+    def __reduce__(self):
+        # Records received from worker processes are shared again in this process.
+        return (get_extattr_record, (self[_NAME],))
+
+
+def get_extattr_record(name):
+    """Returns the shared ExtAttribute record of |name|.
+    Args:
+      name: name of extended attribute
+    Returns:
+      ExtAttributeRecord, or a new dict if sharing is off
+    """
+    if not _interning:
+        return {_NAME: name}
+    record = _extattr_records.get(name)
+    if record is None:
+        record = _extattr_records[name] = ExtAttributeRecord({_NAME: intern_string(name)})
+    return record
+
+
+def intern_value(value):
+    """Replaces strings and ExtAttribute dicts in |value| with shared copies.
+    This is used for definitions read from the cache or received from worker processes.
+    Args:
+      value: str, list, tuple or dict of collected information
+    Returns:
+      value equal to |value|; lists and dicts are updated in place
+    """
+    if isinstance(value, basestring):
+        return intern_string(value)
+    if isinstance(value, ExtAttributeRecord):
+        return get_extattr_record(value[_NAME])
+    if isinstance(value, list):
+        value[:] = [intern_value(item) for item in value]
+    elif isinstance(value, tuple):
+        value = tuple(intern_value(item) for item in value)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            if key == _EXTATTRIBUTES:
+                value[key] = [get_extattr_record(extattr[_NAME]) for extattr in item]
+            else:
+                value[key] = intern_value(item)
+    return value
 
 
 def get_definitions(paths):
@@ -62,13 +187,87 @@ def get_definitions(paths):
     Returns:
       a generator which yields IDL node objects
     """
-    parser = BlinkIDLParser()
+    parser = get_parser()
     for path in paths:
         definitions = parse_file(parser, path)
         for definition in definitions.GetChildren():
             yield definition
 
 
+def sort_file_definitions(parser, path, contents=None, node_to_interface=None):
+    """Parses an IDL file and sorts its definitions into plain dicts, or into records.
+    Files which declare no interface or implements statement are not parsed.
+    Args:
+      parser: BlinkIDLParser
+      path: IDL file path
+      contents: contents of the file if they were already read, otherwise None
+      node_to_interface: interface_node_to_record to get records, or None for dicts
+    Returns:
+      A tuple of (dict of non-partial interfaces, dict of partial interfaces, list of implements dict)
+    """
+    if contents is None:
+        with collector_profile.stage('read'):
+            with open(path, 'r') as f:
+                contents = f.read()
+    with collector_profile.stage('prescan'):
+        may_define = may_define_interfaces_in_text(contents)
+    if not may_define:
+        return {}, {}, []
+    with collector_profile.stage('parse') as timer:
+        tree = parser.ParseText(path, contents)
+    collector_profile.add_file(path, timer.wall_seconds)
+    with collector_profile.stage('sort_definitions'):
+        file_definitions = sort_definitions(tree.GetChildren(), node_to_interface or interface_node_to_dict)
+    if _low_memory:
+        with collector_profile.stage('release_tree'):
+            release_tree(tree)
+    return file_definitions
+
+
+def release_tree(root):
+    """Unlinks every node of a parse tree from its parent and children.
+    A node refers to its parent and its parent to it, so a dropped tree is a reference cycle which stays in
+    memory until the cyclic garbage collector runs. Without the links, each node is freed when dropped.
+    Args:
+      root: IDL node, which must not be used afterwards
+    """
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        stack.extend(node.GetChildren())
+        # IDLNode has no public API to detach nodes.
+        node._children = []
+        node._parent = None
+
+
+def set_low_memory(enabled):
+    """Selects whether the parse tree of each file is released as soon as its definitions are sorted.
+    In low-memory mode peak memory is bounded by the largest parse tree plus the sorted definitions,
+    instead of growing with parse trees which wait for the garbage collector.
+    Args:
+      enabled: True to release parse trees
+    """
+    global _low_memory
+    _low_memory = enabled
+
+
+def set_prefetch_window(window):
+    """Sets how many upcoming IDL files are read by background threads while a file is parsed in this process.
+    Reading overlaps with parsing, which hides the latency of network file systems. Worker processes of
+    --jobs read their own files, so the window applies to parsing without workers and to cache lookups.
+    Args:
+      window: maximum number of files read ahead; 0 reads each file when it is parsed
+    """
+    global _prefetch_window
+    _prefetch_window = window
+
+
+def apply_collector_options(options):
+    """Applies the process-wide options added by add_collector_options."""
+    set_low_memory(options.low_memory)
+    set_prefetch_window(options.prefetch)
+
+
 def is_implements(definition):
     """Returns True if class of |definition| is Implements, otherwise False.
     Args:
@@ -79,6 +278,16 @@ def is_implements(definition):
     return definition.GetClass() == _IMPLEMENT
 
 
+def is_non_partial(definition):
+    """Returns True if class of |definition| is 'interface' class and not 'partial interface' class, otherwise False.
+    Args:
+      definition: IDL node
+    Returns:
+      True if |definition| is 'interface' class and not 'partial interface' class, otherwise False.
+    """
+    return definition.GetClass() == _INTERFACE and not definition.GetProperty(_PARTIAL)
+
+
 def is_partial(definition):
     """Returns True if |definition| is 'partial interface' class, otherwise False.
     Args:
@@ -146,9 +355,9 @@ def const_node_to_dict(const_node):
       dictionary of const's information
     """
     return {
-        _NAME: const_node.GetName(),
-        _TYPE: get_const_type(const_node),
-        _VALUE: get_const_value(const_node),
+        _NAME: intern_string(const_node.GetName()),
+        _TYPE: intern_string(get_const_type(const_node)),
+        _VALUE: intern_string(get_const_value(const_node)),
         _EXTATTRIBUTES: [extattr_node_to_dict(extattr) for extattr in get_extattribute_node_list(const_node)],
     }
 
@@ -163,55 +372,99 @@ def get_attribute_node_list(interface_node):
     return interface_node.GetListOf(_ATTRIBUTE)
 
 
+_TYPE_CACHE_SIZE = 4096
+_rendered_types = {}
+
+
+def get_type_key(type_node):
+    """Returns a hashable structural key of a Type node, walking its subtree without recursion.
+    Args:
+      type_node: Type node
+    Returns:
+      nested tuple of (class, name, tuple of child keys)
+    """
+    stack = [(type_node, type_node.GetChildren(), 0, [])]
+    while True:
+        node, children, index, child_keys = stack[-1]
+        if index < len(children):
+            stack[-1] = (node, children, index + 1, child_keys)
+            stack.append((children[index], children[index].GetChildren(), 0, []))
+            continue
+        stack.pop()
+        key = (node.GetClass(), node.GetName(), tuple(child_keys))
+        if not stack:
+            return key
+        stack[-1][3].append(key)
+
+
+def _get_type_keys(keys):
+    return [key for key in keys if key[0] == _TYPE]
+
+
+def _render_components(component_keys):
+    """Returns the list of type names of the components of a Type key.
+    Array components add '[]' to the preceding name, and union components add all of their member types.
+    """
+    type_list = []
+    for component_key in component_keys:
+        component_class, component_name, children = component_key
+        if component_class == _ARRAY:
+            type_list[-1] += '[]'
+        elif component_class == _SEQUENCE:
+            type_list.append('<' + _render_sequence_element(_get_type_keys(children)[0]) + '>')
+        elif component_class == _UNIONTYPE:
+            for union_member in _get_type_keys(children):
+                type_list.extend(_render_components(union_member[2]))
+        elif component_class == _ANY:
+            type_list.append(_ANY)
+        else:
+            type_list.append(component_name)
+    return type_list
+
+
+def _render_sequence_element(element_type_key):
+    """Returns the string of the element type of a sequence, a str() of its member list if it is a union."""
+    components = element_type_key[2]
+    if components[0][0] == _UNIONTYPE:
+        return str([_render_components(union_member[2])[0] for union_member in _get_type_keys(components[0][2])])
+    return _render_components(components)[0]
+
+
+def render_type_key(type_key):
+    """Returns the type string of a key made by get_type_key. The result is memoized in a bounded cache.
+    Args:
+      type_key: output of get_type_key
+    Returns:
+      str, or list of str for a union type
+    """
+    rendered = _rendered_types.get(type_key)
+    if rendered is None:
+        components = type_key[2]
+        first_class = components[0][0]
+        if first_class == _UNIONTYPE:
+            rendered = tuple(_render_components(components[:1]))
+        elif first_class == _SEQUENCE:
+            rendered = '<' + _render_sequence_element(_get_type_keys(components[0][2])[0]) + '>'
+        elif first_class == _ANY:
+            rendered = _ANY
+        else:
+            rendered = _render_components(components)[0]
+        if len(_rendered_types) >= _TYPE_CACHE_SIZE:
+            _rendered_types.clear()
+        _rendered_types[type_key] = rendered
+    if isinstance(rendered, tuple):
+        return list(rendered)
+    return rendered
+
+
 def get_attribute_type(attribute_node):
     """Returns type of attribute.
     Args:
       attribute_node: attribute node
     Returns:
-      name of attribute's type
+      name of attribute's type, or list of names of a union type's members
     """
-    attr_type = attribute_node.GetOneOf(_TYPE).GetChildren()[0]
-    type_list = []
-    if attr_type.GetClass() == _UNIONTYPE:
-        union_member_list = attr_type.GetListOf(_TYPE)
-        for union_member in union_member_list:
-            for type_component in union_member.GetChildren():
-                if type_component.GetClass() == _ARRAY:
-                    type_list[-1] += '[]'
-                elif type_component.GetClass() == _SEQUENCE:
-                    for seq_type in type_component.GetOneOf(_TYPE).GetChildren():
-                        type_list.append('<' + seq_type.GetName() + '>')
-                else:
-                    type_list.append(type_component.GetName())
-        return type_list
-    elif attr_type.GetClass() == _SEQUENCE:
-        union_member_types = []
-        if attr_type.GetOneOf(_TYPE).GetChildren()[0].GetClass() == _UNIONTYPE:
-            for union_member in attr_type.GetOneOf(_TYPE).GetOneOf(_UNIONTYPE).GetListOf(_TYPE):
-                if len(union_member.GetChildren()) != 1:
-                    raise Exception('Complex type in a union in a sequence is not yet supported')
-                type_component = union_member.GetChildren()[0]
-                union_member_types.append(type_component.GetName())
-            return '<' + str(union_member_types) + '>'
-        else:
-            for type_component in attr_type.GetOneOf(_TYPE).GetChildren():
-                if type_component.GetClass() == _SEQUENCE:
-                    raise Exception('Sequence in another sequence is not yet supported')
-                else:
-                    if type_component.GetClass() == _ARRAY:
-                        type_list[-1] += []
-                    else:
-                        type_list.append(type_component.GetName())
-            return '<' + type_list[0] + '>'
-    elif attr_type.GetClass() == _ANY:
-        return _ANY
-    else:
-        for type_component in attribute_node.GetOneOf(_TYPE).GetChildren():
-            if type_component.GetClass() == _ARRAY:
-                type_list[-1] += '[]'
-            else:
-                type_list.append(type_component.GetName())
-        return type_list[0]
+    return render_type_key(get_type_key(attribute_node.GetOneOf(_TYPE)))
 
 
 get_operation_type = get_attribute_type
@@ -226,8 +479,8 @@ def attribute_node_to_dict(attribute_node):
       dictionary of attribute's information
     """
     return {
-        _NAME: attribute_node.GetName(),
-        _TYPE: get_attribute_type(attribute_node),
+        _NAME: intern_string(attribute_node.GetName()),
+        _TYPE: intern_type(get_attribute_type(attribute_node)),
         _EXTATTRIBUTES: [extattr_node_to_dict(extattr) for extattr in get_extattribute_node_list(attribute_node)],
         _READONLY: attribute_node.GetProperty(_PROP_READONLY, default=False),
         _STATIC: attribute_node.GetProperty(_PROP_STATIC, default=False),
@@ -262,8 +515,8 @@ def argument_node_to_dict(argument_node):
       dictionary of argument's information
     """
     return {
-        _NAME: argument_node.GetName(),
-        _TYPE: get_argument_type(argument_node),
+        _NAME: intern_string(argument_node.GetName()),
+        _TYPE: intern_type(get_argument_type(argument_node)),
     }
 
 
@@ -292,9 +545,9 @@ def operation_node_to_dict(operation_node):
       dictionary of operation's informantion
     """
     return {
-        _NAME: get_operation_name(operation_node),
+        _NAME: intern_string(get_operation_name(operation_node)),
         _ARGUMENTS: [argument_node_to_dict(argument) for argument in get_argument_node_list(operation_node) if argument_node_to_dict(argument)],
-        _TYPE: get_operation_type(operation_node),
+        _TYPE: intern_type(get_operation_type(operation_node)),
         _EXTATTRIBUTES: [extattr_node_to_dict(extattr) for extattr in get_extattribute_node_list(operation_node)],
         _STATIC: operation_node.GetProperty(_PROP_STATIC, default=False),
     }
@@ -320,8 +573,58 @@ def extattr_node_to_dict(extattr):
     Returns:
       dictionary of ExtAttribute's information
     """
+    return get_extattr_record(extattr.GetName())
+
+
+def get_extattribute_names(node):
+    """Returns the names of the extended attributes of |node|, as stored in idl_records.
+    Args:
+      node: IDL node
+    Returns:
+      tuple of name of ExtAttribute
+    """
+    return tuple(intern_string(extattr.GetName()) for extattr in get_extattribute_node_list(node))
+
+
+def const_node_to_record(const_node):
+    """Returns an idl_records.Const of const's information, like const_node_to_dict."""
+    return idl_records.Const(intern_string(const_node.GetName()), intern_string(get_const_type(const_node)),
+                             intern_string(get_const_value(const_node)), get_extattribute_names(const_node))
+
+
+def attribute_node_to_record(attribute_node):
+    """Returns an idl_records.Attribute of attribute's information, like attribute_node_to_dict."""
+    return idl_records.Attribute(intern_string(attribute_node.GetName()),
+                                 intern_type(get_attribute_type(attribute_node)),
+                                 get_extattribute_names(attribute_node),
+                                 attribute_node.GetProperty(_PROP_READONLY, default=False),
+                                 attribute_node.GetProperty(_PROP_STATIC, default=False))
+
+
+def argument_node_to_record(argument_node):
+    """Returns an idl_records.Argument of argument's information, like argument_node_to_dict."""
+    return idl_records.Argument(intern_string(argument_node.GetName()), intern_type(get_argument_type(argument_node)))
+
+
+def operation_node_to_record(operation_node):
+    """Returns an idl_records.Operation of operation's information, like operation_node_to_dict."""
+    return idl_records.Operation(intern_string(get_operation_name(operation_node)),
+                                 [argument_node_to_record(argument) for argument in get_argument_node_list(operation_node)],
+                                 intern_type(get_operation_type(operation_node)),
+                                 get_extattribute_names(operation_node),
+                                 operation_node.GetProperty(_PROP_STATIC, default=False))
+
+
+def implement_node_to_dict(implement_node):
+    """Returns dictionary of Implements statement's information.
+    Args:
+      implement_node: implements node
+    Returns:
+      dictionary of implementing interface's name and implemented interface's name
+    """
     return {
-        _NAME: extattr.GetName(),
+        _NAME: intern_string(implement_node.GetName()),
+        _REFERENCE: intern_string(implement_node.GetProperty(_PROP_REFERENCE)),
     }
 
 
@@ -334,7 +637,7 @@ def inherit_node_to_dict(interface_node):
     """
     inherit = interface_node.GetOneOf(_INHERIT)
     if inherit:
-        return {_PARENT: inherit.GetName()}
+        return {_PARENT: intern_string(inherit.GetName())}
     else:
         return {_PARENT: None}
 
@@ -347,8 +650,8 @@ def interface_node_to_dict(interface_node):
       A dictionary of the interface information.
     """
     return {
-        _NAME: interface_node.GetName(),
-        _FILEPATH: get_filepath(interface_node),
+        _NAME: intern_string(interface_node.GetName()),
+        _FILEPATH: intern_string(get_filepath(interface_node)),
         _CONSTS: [const_node_to_dict(const) for const in get_const_node_list(interface_node)],
         _ATTRIBUTES: [attribute_node_to_dict(attr) for attr in get_attribute_node_list(interface_node) if attr],
         _OPERATIONS: [operation_node_to_dict(operation) for operation in get_operation_node_list(interface_node) if operation],
@@ -357,6 +660,226 @@ def interface_node_to_dict(interface_node):
     }
 
 
+def interface_node_to_record(interface_node):
+    """Returns an idl_records.Interface of interface information, like interface_node_to_dict.
+    Args:
+      interface_node: interface node
+    Returns:
+      idl_records.Interface
+    """
+    return idl_records.Interface(
+        intern_string(interface_node.GetName()),
+        intern_string(get_filepath(interface_node)),
+        [const_node_to_record(const) for const in get_const_node_list(interface_node)],
+        [attribute_node_to_record(attr) for attr in get_attribute_node_list(interface_node) if attr],
+        [operation_node_to_record(operation) for operation in get_operation_node_list(interface_node) if operation],
+        get_extattribute_names(interface_node),
+        inherit_node_to_dict(interface_node)[_PARENT])
+
+
+def sort_definitions(definitions, node_to_interface=interface_node_to_dict):
+    """Sorts IDL definitions into interfaces, partial interfaces and implements in one pass.
+    Args:
+      definitions: a generator of IDL node
+      node_to_interface: interface_node_to_dict, or interface_node_to_record to get records
+    Returns:
+      A tuple of (dict of non-partial interfaces, dict of partial interfaces, list of implements dict)
+    """
+    interfaces_dict = {}
+    partials_dict = {}
+    implement_list = []
+    for definition in definitions:
+        if is_implements(definition):
+            implement_list.append(implement_node_to_dict(definition))
+        elif is_non_partial(definition):
+            interfaces_dict[definition.GetName()] = node_to_interface(definition)
+        elif is_partial(definition):
+            partials_dict[definition.GetName()] = node_to_interface(definition)
+    return interfaces_dict, partials_dict, implement_list
+
+
+def get_parser():
+    """Returns the BlinkIDLParser of this process, timing its startup in the active profile."""
+    with collector_profile.stage('parser_startup'):
+        return idl_parser_factory.get_parser()
+
+
+_worker_parser = None
+
+
+def _init_worker(profiling=False, low_memory=False):
+    """Gets the BlinkIDLParser which a worker process keeps for all of its files."""
+    global _worker_parser
+    set_low_memory(low_memory)
+    if profiling:
+        collector_profile.start()
+    _worker_parser = get_parser()
+
+
+def _sort_file_definitions_in_worker(path, contents=None):
+    return sort_file_definitions(_worker_parser, path, contents)
+
+
+def _profile_file_definitions_in_worker(path, contents=None):
+    """Returns the output of sort_file_definitions and the profile records of the worker since its last file."""
+    file_definitions = sort_file_definitions(_worker_parser, path, contents)
+    records = collector_profile.stop().get_records()
+    collector_profile.start()
+    return file_definitions, records
+
+
+def get_file_definitions(paths, jobs=1):
+    """Returns a generator of sorted definitions of each IDL file, optionally parsed in worker processes.
+    Args:
+      paths: list of IDL file path
+      jobs: number of worker processes; 1 parses in this process
+    Returns:
+      a generator which yields the output of sort_file_definitions in the order of |paths|
+    """
+    if jobs <= 1:
+        for file_definitions in parse_file_contents(prefetch_reader.iter_file_contents(paths, _prefetch_window)):
+            yield file_definitions
+        return
+    profile = collector_profile.active_profile
+    chunksize = max(1, len(paths) // (jobs * 4))
+    pool = multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(profile is not None, _low_memory))
+    try:
+        if profile is None:
+            for file_definitions in pool.imap(_sort_file_definitions_in_worker, paths, chunksize):
+                yield intern_value(file_definitions)
+        else:
+            for file_definitions, records in pool.imap(_profile_file_definitions_in_worker, paths, chunksize):
+                profile.merge(records)
+                yield intern_value(file_definitions)
+    except:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+
+def parse_file_contents(file_contents, jobs=1):
+    """Returns a generator of sorted definitions of IDL files which were already read.
+    With worker processes, at most max(|jobs|, prefetch window) files are handed to the workers but not yet
+    yielded, so only that many contents are held at a time.
+    Args:
+      file_contents: iterable of (IDL file path, contents)
+      jobs: number of worker processes; 1 parses in this process
+    Returns:
+      a generator which yields the output of sort_file_definitions in the order of |file_contents|
+    """
+    if jobs <= 1:
+        parser = get_parser()
+        for path, contents in file_contents:
+            yield sort_file_definitions(parser, path, contents)
+        return
+    profile = collector_profile.active_profile
+    worker = _sort_file_definitions_in_worker if profile is None else _profile_file_definitions_in_worker
+    window = max(jobs, _prefetch_window)
+    pending = collections.deque()
+
+    def take():
+        file_definitions = pending.popleft().get()
+        if profile is not None:
+            file_definitions, records = file_definitions
+            profile.merge(records)
+        return intern_value(file_definitions)
+
+    pool = multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(profile is not None, _low_memory))
+    try:
+        for path, contents in file_contents:
+            pending.append(pool.apply_async(worker, (path, contents)))
+            if len(pending) >= window:
+                yield take()
+        while pending:
+            yield take()
+    except:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+
+def get_cached_file_definitions(paths, cache, jobs=1):
+    """Returns sorted definitions of each IDL file, parsing only files which are not in |cache|.
+    Each file is read once: the contents read for its cache key are parsed if the cache misses.
+    Args:
+      paths: list of IDL file path
+      cache: parse_cache.ParseCache
+      jobs: number of worker processes used for files which are not cached
+    Returns:
+      list of the output of sort_file_definitions in the order of |paths|
+    """
+    keys = []
+    file_definitions_list = []
+    missing = collections.deque()
+
+    def iter_missed_contents():
+        for path, contents in prefetch_reader.iter_file_contents(paths, _prefetch_window):
+            with collector_profile.stage('cache_lookup'):
+                key = cache.get_key(path, contents)
+                file_definitions = intern_value(cache.get(key))
+            keys.append(key)
+            file_definitions_list.append(file_definitions)
+            if file_definitions is None:
+                missing.append(len(keys) - 1)
+                yield path, contents
+
+    for file_definitions in parse_file_contents(iter_missed_contents(), jobs):
+        index = missing.popleft()
+        cache.put(keys[index], file_definitions)
+        file_definitions_list[index] = file_definitions
+    return file_definitions_list
+
+
+def get_all_file_definitions(paths, jobs=1, cache=None):
+    """Returns sorted definitions of each IDL file, read from |cache| where possible.
+    Args:
+      paths: list of IDL file path
+      jobs: number of worker processes; 1 parses in this process
+      cache: parse_cache.ParseCache, or None to parse every file
+    Returns:
+      an iterable of the output of sort_file_definitions in the order of |paths|
+    """
+    if cache:
+        return get_cached_file_definitions(paths, cache, jobs)
+    return get_file_definitions(paths, jobs)
+
+
+def merge_file_definitions(file_definitions_list):
+    """Merges sorted definitions of IDL files; a later file wins when names collide.
+    Args:
+      file_definitions_list: an iterable of the output of sort_file_definitions
+    Returns:
+      A tuple of (dict of non-partial interfaces, dict of partial interfaces, list of implements dict)
+    """
+    interfaces_dict = {}
+    partials_dict = {}
+    implement_list = []
+    for interfaces, partials, implements in file_definitions_list:
+        interfaces_dict.update(interfaces)
+        partials_dict.update(partials)
+        implement_list.extend(implements)
+    return interfaces_dict, partials_dict, implement_list
+
+
+def collect_definitions(paths, jobs=1, cache=None):
+    """Parses IDL files and sorts their definitions.
+    Files are merged in the order of |paths|, so the result does not depend on |jobs| or |cache|.
+    Args:
+      paths: list of IDL file path
+      jobs: number of worker processes; 1 parses in this process
+      cache: parse_cache.ParseCache, or None to parse every file
+    Returns:
+      A tuple of (dict of non-partial interfaces, dict of partial interfaces, list of implements dict)
+    """
+    return merge_file_definitions(get_all_file_definitions(paths, jobs, cache))
+
+
 def merge_partial_dicts(interfaces_dict, partials_dict):
     """Merges partial interface into non-partial interface.
     Args:
@@ -371,61 +894,357 @@ def merge_partial_dicts(interfaces_dict, partials_dict):
             raise Exception('There is a partial interface, but the corresponding non-partial interface was not found.')
         for member in _MEMBERS:
             interface[member].extend(partial.get(member))
-            interface.setdefault(_PARTIAL_FILEPATH, []).append(partial[_FILEPATH])
+        interface.setdefault(_PARTIAL_FILEPATH, []).append(partial[_FILEPATH])
     return interfaces_dict
 
 
-def merge_implement_nodes(interfaces_dict, implement_node_list):
+def merge_implement_nodes(interfaces_dict, implement_list):
     """Combines a dict of interface information with referenced interface information.
     Args:
       interfaces_dict: dict of interface information
-      implement_nodes: list of implemented interface node
+      implement_list: list of implements dict
     Returns:
       A dict of interface information combined with implements nodes.
     """
-    for implement in implement_node_list:
-        reference = implement.GetProperty(_PROP_REFERENCE)
-        implement = implement.GetName()
-        if reference not in interfaces_dict.keys() or implement not in interfaces_dict.keys():
+    for implement in implement_list:
+        interface = interfaces_dict.get(implement[_NAME])
+        reference = interfaces_dict.get(implement[_REFERENCE])
+        if interface is None or reference is None:
             raise Exception('There is not corresponding implement or reference interface.')
         for member in _MEMBERS:
-            interfaces_dict[implement][member].extend(interfaces_dict[reference].get(member))
+            interface[member].extend(reference.get(member))
     return interfaces_dict
 
 
-def export_to_jsonfile(dictionary, json_file):
+def merge_interfaces(interfaces_dict, partials_dict, implement_list):
+    """Merges partial interfaces, then implemented interfaces, into |interfaces_dict|.
+    Args:
+      interfaces_dict: dict of non-partial interface information
+      partials_dict: dict of partial interface information
+      implement_list: list of implements dict
+    Returns:
+      A dict of merged interface information
+    """
+    with collector_profile.stage('merge_partials'):
+        dictionary = merge_partial_dicts(interfaces_dict, partials_dict)
+    with collector_profile.stage('merge_implements'):
+        return merge_implement_nodes(dictionary, implement_list)
+
+
+def merge_partial_records(records, partial_records):
+    """Merges partial interfaces into non-partial interfaces, like merge_partial_dicts for idl_records.Interface.
+    Args:
+      records: dict of non-partial idl_records.Interface
+      partial_records: dict of partial idl_records.Interface
+    Returns:
+      |records| merged with |partial_records|
+    """
+    for interface_name, partial in partial_records.iteritems():
+        interface = records.get(interface_name)
+        if not interface:
+            raise Exception('There is a partial interface, but the corresponding non-partial interface was not found.')
+        interface.extend_members(partial)
+        if interface.partial_file_paths is None:
+            interface.partial_file_paths = []
+        interface.partial_file_paths.append(partial.file_path)
+    return records
+
+
+def merge_implement_records(records, implement_list):
+    """Adds the members of implemented interfaces, like merge_implement_nodes for idl_records.Interface.
+    The member records are shared between the implementing and the implemented interface.
+    Args:
+      records: dict of idl_records.Interface
+      implement_list: list of implements dict
+    Returns:
+      |records| combined with implements statements
+    """
+    for implement in implement_list:
+        interface = records.get(implement[_NAME])
+        reference = records.get(implement[_REFERENCE])
+        if interface is None or reference is None:
+            raise Exception('There is not corresponding implement or reference interface.')
+        interface.extend_members(reference)
+    return records
+
+
+def merge_interface_records(records, partial_records, implement_list):
+    """Merges partial interfaces, then implemented interfaces, into |records|, like merge_interfaces."""
+    with collector_profile.stage('merge_partials'):
+        merge_partial_records(records, partial_records)
+    with collector_profile.stage('merge_implements'):
+        return merge_implement_records(records, implement_list)
+
+
+def get_member_counts(interface):
+    """Returns the number of members of each member type.
+    Args:
+      interface: dict of interface information
+    Returns:
+      dict of member type to number of members
+    """
+    return {member: len(interface[member]) for member in _MEMBERS}
+
+
+def add_member_counts(counts, other_counts):
+    """Adds |other_counts| to |counts| in place.
+    Args:
+      counts: output of get_member_counts
+      other_counts: output of get_member_counts
+    """
+    for member in _MEMBERS:
+        counts[member] += other_counts[member]
+
+
+def get_merge_segments(interfaces_dict, partials_dict, implement_list):
+    """Returns which definitions contribute how many members to each merged interface.
+    This must be called before merging. Members of a merged interface are the
+    concatenation of its segments, in order, so a segment can be sliced out again.
+    Args:
+      interfaces_dict: dict of non-partial interface information
+      partials_dict: dict of partial interface information
+      implement_list: list of implements dict
+    Returns:
+      dict of interface name to list of [kind, source, member counts], where kind is
+      'Interface' or 'Partial' with the file path as source, or 'Implements' with the
+      implemented interface's name as source
+    """
+    segments = {}
+    totals = {}
+    for interface_name, interface in interfaces_dict.iteritems():
+        counts = get_member_counts(interface)
+        segments[interface_name] = [[_INTERFACE, interface[_FILEPATH], counts]]
+        totals[interface_name] = dict(counts)
+    for interface_name, partial in partials_dict.iteritems():
+        if interface_name in segments:
+            counts = get_member_counts(partial)
+            segments[interface_name].append([_PARTIAL, partial[_FILEPATH], counts])
+            add_member_counts(totals[interface_name], counts)
+    for implement in implement_list:
+        implement_name = implement[_NAME]
+        reference = implement[_REFERENCE]
+        if implement_name in totals and reference in totals:
+            counts = dict(totals[reference])
+            segments[implement_name].append([_IMPLEMENT, reference, counts])
+            add_member_counts(totals[implement_name], counts)
+    return segments
+
+
+def file_definitions_to_provenance(file_definitions):
+    """Returns the names which an IDL file defines.
+    Args:
+      file_definitions: output of sort_file_definitions
+    Returns:
+      dict of interface names, partial interface names and implements dicts
+    """
+    interfaces, partials, implements = file_definitions
+    return {
+        _INTERFACES: sorted(interfaces),
+        _PARTIALS: sorted(partials),
+        _IMPLEMENT: implements,
+    }
+
+
+def get_provenance(path_list, file_definitions_list, interfaces_dict, partials_dict, implement_list):
+    """Returns where the members of each merged interface come from.
+    This must be called before merging.
+    Args:
+      path_list: list of IDL file path in the order they are merged
+      file_definitions_list: list of the output of sort_file_definitions in the order of |path_list|
+      interfaces_dict: dict of non-partial interface information
+      partials_dict: dict of partial interface information
+      implement_list: list of implements dict
+    Returns:
+      dict of the path order, the names defined by each file and the merge segments of each interface
+    """
+    return {
+        _PATHS: list(path_list),
+        _FILES: {path: file_definitions_to_provenance(file_definitions)
+                 for path, file_definitions in itertools.izip(path_list, file_definitions_list)},
+        _SEGMENTS: get_merge_segments(interfaces_dict, partials_dict, implement_list),
+    }
+
+
+def export_to_jsonfile(dictionary, json_file, indent=None, offsets=None):
     """Writes a Python dict into a JSON file.
     Args:
       dictioary: interface dictionary
       json_file: json file for output
+      indent: indent width of pretty output, or None for compact output
+      offsets: dict which is filled with the byte range of each interface, or None
     """
-    with open(json_file, 'w') as f:
-        json.dump(dictionary, f, sort_keys=True)
+    snapshot_writer.export_to_jsonfile(dictionary, json_file, indent, offsets)
 
 
 def usage():
-    sys.stdout.write('Usage: collect_idls_into_json.py <path_file.txt> <output_file.json>\n')
+    sys.stdout.write('Usage: collect_idls_into_json.py [--jobs N] [--cache-dir DIR | --no-cache] [--provenance FILE] [--pretty] [--hash-tree] [--index] [--low-memory] [--shards DIR [--shard-buckets N]] [--profile FILE] <path_file.txt> <output_file.json>\n')
 
 
-def main(args):
-    if len(args) != 2:
+def add_collector_options(option_parser):
+    """Adds the options which control how IDL files are parsed.
+    Args:
+      option_parser: optparse.OptionParser
+    """
+    option_parser.add_option('-j', '--jobs', type='int', default=1,
+                             help='number of worker processes used to parse IDL files')
+    option_parser.add_option('--cache-dir', default=parse_cache.DEFAULT_CACHE_DIR,
+                             help='directory of the per-file parse cache')
+    option_parser.add_option('--cache-size', type='int', default=parse_cache.DEFAULT_MAX_BYTES // (1024 * 1024),
+                             help='maximum size of the parse cache in megabytes')
+    option_parser.add_option('--no-cache', action='store_true', default=False,
+                             help='parse every IDL file without reading or writing the cache')
+    option_parser.add_option('--report-startup', action='store_true', default=False,
+                             help='print how long the IDL parser took to start to stderr')
+    option_parser.add_option('--low-memory', action='store_true', default=False,
+                             help='release the parse tree of each IDL file as soon as it is converted')
+    option_parser.add_option('--prefetch', type='int', default=prefetch_reader.DEFAULT_WINDOW, metavar='N',
+                             help='number of IDL files read ahead by background threads; 0 disables reading ahead')
+
+
+def parse_options(args):
+    option_parser = optparse.OptionParser(usage='%prog [--jobs N] [--cache-dir DIR | --no-cache] [--provenance FILE] [--pretty] [--hash-tree] [--index] [--low-memory] [--shards DIR [--shard-buckets N]] [--profile FILE] <path_file.txt> <output_file.json>')
+    add_collector_options(option_parser)
+    option_parser.add_option('--provenance',
+                             help='also write where the members of each interface come from, for incremental_snapshot.py')
+    option_parser.add_option('--pretty', action='store_true', default=False,
+                             help='indent the output JSON file')
+    option_parser.add_option('--hash-tree', action='store_true', default=False,
+                             help='also write the hash tree of the output to <output_file.json>.hashes')
+    option_parser.add_option('--index', action='store_true', default=False,
+                             help='also write the byte range of each interface to <output_file.json>.index')
+    option_parser.add_option('--shards', metavar='DIR',
+                             help='also write one shard per interface and a manifest to DIR, '
+                                  'rewriting only shards which changed')
+    option_parser.add_option('--shard-buckets', type='int', metavar='N',
+                             help='with --shards, write one shard per hash bucket of interface names')
+    option_parser.add_option('--profile', metavar='FILE',
+                             help='write wall time, CPU time and growth of peak memory of each stage, '
+                                  'and the slowest files to parse, to FILE as JSON')
+    option_parser.add_option('--profile-top', type='int', default=collector_profile.DEFAULT_TOP_FILES, metavar='N',
+                             help='number of slowest files listed by --profile')
+    options, args = option_parser.parse_args(args)
+    if (len(args) != 2 or options.jobs < 1 or options.prefetch < 0 or
+            (options.shard_buckets is not None and (options.shard_buckets < 1 or not options.shards))):
         usage()
         exit(1)
+    return options, args
+
+
+def create_cache(options):
+    """Returns the parse cache selected by command line options, or None if caching is disabled."""
+    if options.no_cache:
+        return None
+    # Files which the pre-scan of interface_node_path skips are cached as empty, so the pre-scan is part of the version.
+    version = parse_cache.get_version([blink_idl_parser, sys.modules.get('idl_parser.idl_parser'), interface_node_path,
+                                       sys.modules[__name__]], _CACHE_FORMAT_VERSION)
+    return parse_cache.ParseCache(options.cache_dir, version, options.cache_size * 1024 * 1024)
+
+
+def collect_interfaces(path_list, jobs=1, cache=None):
+    """Returns a dict of interface information merged with partial interfaces and implements.
+    Args:
+      path_list: list of IDL file path
+      jobs: number of worker processes used to parse IDL files
+      cache: parse_cache.ParseCache, or None to parse every file
+    Returns:
+      A dict of interface information keyed by interface name
+    """
+    with collector_profile.stage('collect'):
+        interfaces_dict, partials_dict, implement_list = collect_definitions(path_list, jobs, cache)
+    if cache:
+        with collector_profile.stage('cache_prune'):
+            cache.prune()
+    return merge_interfaces(interfaces_dict, partials_dict, implement_list)
+
+
+def file_definitions_to_records(file_definitions):
+    """Converts the dicts of the output of sort_file_definitions into idl_records.Interface."""
+    interfaces, partials, implements = file_definitions
+    return idl_records.interfaces_from_dicts(interfaces), idl_records.interfaces_from_dicts(partials), implements
+
+
+def get_file_records(paths):
+    """Returns a generator of the output of sort_file_definitions with records, parsing in this process."""
+    parser = get_parser()
+    for path, contents in prefetch_reader.iter_file_contents(paths, _prefetch_window):
+        yield sort_file_definitions(parser, path, contents, interface_node_to_record)
+
+
+def collect_interface_records(path_list, jobs=1, cache=None):
+    """Returns merged interface information as compact idl_records.Interface records.
+    Files parsed in this process are converted from parse nodes into records directly. Files read from
+    |cache| or parsed by worker processes arrive as dicts, which are converted one file at a time.
+    As in collect_interfaces, members merged from an implemented interface are shared, not copied.
+    Args:
+      path_list: list of IDL file path
+      jobs: number of worker processes used to parse IDL files
+      cache: parse_cache.ParseCache, or None to parse every file
+    Returns:
+      A dict of idl_records.Interface keyed by interface name
+    """
+    with collector_profile.stage('collect'):
+        if jobs <= 1 and not cache:
+            file_records_list = get_file_records(path_list)
+        else:
+            file_records_list = itertools.imap(file_definitions_to_records,
+                                               get_all_file_definitions(path_list, jobs, cache))
+        records, partial_records, implement_list = merge_file_definitions(file_records_list)
+    if cache:
+        with collector_profile.stage('cache_prune'):
+            cache.prune()
+    return merge_interface_records(records, partial_records, implement_list)
+
+
+def collect_interfaces_with_provenance(path_list, jobs=1, cache=None):
+    """Returns merged interface information and the provenance of its members.
+    Args:
+      path_list: list of IDL file path
+      jobs: number of worker processes used to parse IDL files
+      cache: parse_cache.ParseCache, or None to parse every file
+    Returns:
+      A tuple of (dict of interface information, output of get_provenance)
+    """
+    with collector_profile.stage('collect'):
+        file_definitions_list = list(get_all_file_definitions(path_list, jobs, cache))
+    if cache:
+        with collector_profile.stage('cache_prune'):
+            cache.prune()
+    interfaces_dict, partials_dict, implement_list = merge_file_definitions(file_definitions_list)
+    with collector_profile.stage('provenance'):
+        provenance = get_provenance(path_list, file_definitions_list, interfaces_dict, partials_dict, implement_list)
+    return merge_interfaces(interfaces_dict, partials_dict, implement_list), provenance
+
+
+def main(args):
+    options, args = parse_options(args)
     path_file = args[0]
     json_file = args[1]
-    path_list = utilities.read_file_to_list(path_file)
-    implement_node_list = [definition
-                           for definition in get_definitions(path_list)
-                           if is_implements(definition)]
-    interfaces_dict = {definition.GetName(): interface_node_to_dict(definition)
-                       for definition in get_definitions(path_list)
-                       if not is_partial(definition)}
-    partials_dict = {definition.GetName(): interface_node_to_dict(definition)
-                     for definition in get_definitions(path_list)
-                     if is_partial(definition)}
-    dictionary = merge_partial_dicts(interfaces_dict, partials_dict)
-    interfaces_dict = merge_implement_nodes(interfaces_dict, implement_node_list)
-    export_to_jsonfile(dictionary, json_file)
+    apply_collector_options(options)
+    if options.profile:
+        collector_profile.start()
+    with collector_profile.stage('read_paths'):
+        path_list = utilities.read_file_to_list(path_file)
+    cache = create_cache(options)
+    if options.provenance:
+        dictionary, provenance = collect_interfaces_with_provenance(path_list, options.jobs, cache)
+        export_to_jsonfile(provenance, options.provenance)
+    else:
+        dictionary = collect_interfaces(path_list, options.jobs, cache)
+    offsets = {} if options.index else None
+    with collector_profile.stage('export'):
+        export_to_jsonfile(dictionary, json_file, _PRETTY_INDENT if options.pretty else None, offsets)
+    if options.index:
+        lazy_snapshot.write_offset_index(offsets, json_file)
+    if options.shards:
+        with collector_profile.stage('shards'):
+            sharded_snapshot.write_sharded_snapshot(dictionary, options.shards, options.shard_buckets)
+    if options.hash_tree:
+        with collector_profile.stage('hash_tree'):
+            hash_tree.write_hash_tree(hash_tree.get_hash_tree(dictionary), json_file)
+    if options.report_startup:
+        idl_parser_factory.report_startup()
+    if options.profile:
+        collector_profile.stop().write_report(options.profile, options.profile_top)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Per-stage timing of collect_idls_into_json.py, enabled by its --profile option.
+
+Code of the collector wraps each stage in stage(name). While no profile is
+active the wrapper does nothing; otherwise it adds the stage's wall time, CPU
+time and the growth of the peak resident memory during the stage to the
+active Profile. The peak of a process only ever grows, so the growth is how
+much the stage raised it: a stage which stays below an earlier peak reports 0.
+Parse times of single files are kept to report the slowest ones. Worker
+processes record into their own Profile, whose records are merged by the
+parent.
+
+Stages may nest: 'collect' includes the 'parse' stages of files parsed in the
+collector's own process, and the stages of workers overlap each other.
+"""
+
+import collections
+import heapq
+import json
+import os
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DEFAULT_TOP_FILES = 20
+
+active_profile = None
+
+
+def get_cpu_seconds():
+    times = os.times()
+    return times[0] + times[1]
+
+
+def get_peak_rss_kb(who=None):
+    """Returns the peak resident set size of this process, or of its finished children, in KB, or None if unknown."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF if who is None else who).ru_maxrss
+
+
+class _NullTimer(object):
+    wall_seconds = 0.0
+    cpu_seconds = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer(object):
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+
+    def __enter__(self):
+        self._wall_start = time.time()
+        self._cpu_start = get_cpu_seconds()
+        self._peak_rss_start = get_peak_rss_kb()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wall_seconds = time.time() - self._wall_start
+        self.cpu_seconds = get_cpu_seconds() - self._cpu_start
+        peak_rss_kb = get_peak_rss_kb()
+        peak_rss_growth_kb = None if peak_rss_kb is None else peak_rss_kb - self._peak_rss_start
+        self.profile.add_stage(self.name, self.wall_seconds, self.cpu_seconds, peak_rss_growth_kb)
+        return False
+
+
+class Profile(object):
+    """Wall time, CPU time, calls and growth of peak memory per stage, and parse time per file."""
+
+    def __init__(self):
+        self.stages = collections.OrderedDict()
+        self.file_seconds = []
+        self._wall_start = time.time()
+        self._cpu_start = get_cpu_seconds()
+
+    def stage(self, name):
+        return _StageTimer(self, name)
+
+    def add_stage(self, name, wall_seconds, cpu_seconds, peak_rss_growth_kb, calls=1):
+        """Adds |calls| runs of a stage. Growths of the peak RSS are summed, over calls and over processes."""
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'calls': 0,
+                                         'peak_rss_growth_kb': None}
+        stage['wall_seconds'] += wall_seconds
+        stage['cpu_seconds'] += cpu_seconds
+        stage['calls'] += calls
+        if peak_rss_growth_kb is not None:
+            stage['peak_rss_growth_kb'] = (stage['peak_rss_growth_kb'] or 0) + peak_rss_growth_kb
+
+    def add_file(self, path, seconds):
+        self.file_seconds.append((seconds, path))
+
+    def get_records(self):
+        """Returns the records of this profile, to be merged into another process's profile."""
+        return self.stages, self.file_seconds
+
+    def merge(self, records):
+        """Adds records returned by get_records of another profile, e.g. of a worker process."""
+        stages, file_seconds = records
+        for name, stage in stages.iteritems():
+            self.add_stage(name, stage['wall_seconds'], stage['cpu_seconds'], stage['peak_rss_growth_kb'], stage['calls'])
+        self.file_seconds.extend(file_seconds)
+
+    def get_report(self, top_files=DEFAULT_TOP_FILES):
+        """Returns a JSON serializable report of the profile.
+        Args:
+          top_files: number of slowest files to list
+        Returns:
+          dict of totals, stages in first-run order, and the slowest files to parse
+        """
+        return {
+            'total_wall_seconds': time.time() - self._wall_start,
+            'total_cpu_seconds': get_cpu_seconds() - self._cpu_start,
+            'peak_rss_kb': get_peak_rss_kb(),
+            'peak_rss_children_kb': get_peak_rss_kb(resource.RUSAGE_CHILDREN) if resource else None,
+            'stages': [dict(stage, name=name) for name, stage in self.stages.iteritems()],
+            'files_parsed': len(self.file_seconds),
+            'slowest_files': [{'path': path, 'parse_seconds': seconds}
+                              for seconds, path in heapq.nlargest(top_files, self.file_seconds)],
+        }
+
+    def write_report(self, report_file, top_files=DEFAULT_TOP_FILES):
+        with open(report_file, 'w') as f:
+            json.dump(self.get_report(top_files), f, sort_keys=True, indent=4)
+
+
+def start():
+    """Makes a new Profile the active profile and returns it."""
+    global active_profile
+    active_profile = Profile()
+    return active_profile
+
+
+def stop():
+    """Deactivates the active profile and returns it."""
+    global active_profile
+    profile, active_profile = active_profile, None
+    return profile
+
+
+def stage(name):
+    """Returns a context manager which times stage |name| in the active profile, or does nothing without one."""
+    if active_profile is None:
+        return _NULL_TIMER
+    return active_profile.stage(name)
+
+
+def add_file(path, seconds):
+    if active_profile is not None:
+        active_profile.add_file(path, seconds)
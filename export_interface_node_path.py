@@ -8,7 +8,9 @@ blink_bindings_path = os.path.join(
     chromium_path, 'third_party', 'WebKit', 'Source', 'bindings', 'scripts')
 sys.path.insert(0, blink_bindings_path)
 
-from blink_idl_parser import parse_file, BlinkIDLParser
+import idl_parser_factory
+from blink_idl_parser import parse_file
+from interface_node_path import may_define_interfaces
 
 def get_idl_files(dir):
     file_type='.idl'
@@ -22,10 +24,12 @@ def get_idl_files(dir):
 
 
 def get_interface_nodes(dir_path):
-    parser = BlinkIDLParser(debug=False)
+    parser = idl_parser_factory.get_parser()
     class_name = 'Interface' 
     for idl_node in get_idl_files(dir_path):
         node_path = idl_node
+        if not may_define_interfaces(node_path):
+            continue
         definitions = parse_file(parser, idl_node)
         for definition in definitions.GetChildren():
             if definition.GetClass() == class_name:
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Usage: hash_tree.py snapshot_file [snapshot_file ...]
+
+Content hashes of interface snapshots, arranged as a tree:
+  member:      SHA-1 of the member's canonical JSON form
+  member list: SHA-1 of the digests of its members, in order
+  interface:   SHA-1 of every top-level field of the interface, sorted by key:
+               the digest of each member list, and the canonical JSON form of
+               the other fields (Name, FilePath, Inherit, Partial_FilePaths)
+  root:        SHA-1 of the sorted (interface name, interface digest) pairs
+
+The tree of a snapshot is stored next to it in <snapshot_file>.hashes, so
+snapshots can be compared without hashing them again: equal roots mean equal
+snapshots, and changed interfaces are those whose digests differ. A stored
+tree is ignored once the snapshot is rewritten without it.
+
+With snapshot files as arguments, writes their hash trees.
+"""
+
+import collections
+import hashlib
+import json
+import os
+import sys
+
+import binary_snapshot
+import idl_records
+
+HASH_TREE_SUFFIX = '.hashes'
+MEMBER_TYPES = ['ExtAttributes', 'Consts', 'Attributes', 'Operations']
+
+_ROOT = 'Root'
+_INTERFACES = 'Interfaces'
+_DIGEST = 'Digest'
+_LISTS = 'Lists'
+_MEMBERS = 'Members'
+_SNAPSHOT_SIZE = 'SnapshotSize'
+_FORMAT = 'Format'
+# Bump when digests are computed differently, so that stored trees are computed again.
+_FORMAT_VERSION = 2
+
+InterfaceHash = collections.namedtuple('InterfaceHash', ['digest', 'list_digests', 'member_digests'])
+HashTree = collections.namedtuple('HashTree', ['root', 'interfaces'])
+
+
+def get_member_digest(member):
+    """Returns the content hash of a member.
+    Args:
+      member: dict of const, attribute, operation or extended attribute information
+    Returns:
+      hex digest of the member's canonical JSON form
+    """
+    return hashlib.sha1(json.dumps(member, sort_keys=True, separators=(',', ':'))).hexdigest()
+
+
+def get_list_digest(member_digests):
+    """Returns the hash of a member list from the digests of its members, in order."""
+    return hashlib.sha1(','.join(member_digests)).hexdigest()
+
+
+def get_interface_hash(interface):
+    """Returns the hashes of an interface, its member lists and its members.
+    Args:
+      interface: dict of interface information, or idl_records.Interface
+    Returns:
+      InterfaceHash whose list_digests and member_digests are keyed by member type
+    """
+    interface = idl_records.as_dict(interface)
+    member_digests = {}
+    list_digests = {}
+    for member_type in MEMBER_TYPES:
+        digests = member_digests[member_type] = [get_member_digest(member) for member in interface[member_type]]
+        list_digests[member_type] = get_list_digest(digests)
+    digest = hashlib.sha1()
+    for key in sorted(interface):
+        field_digest = list_digests[key] if key in list_digests else get_member_digest(interface[key])
+        digest.update('%s:%s;' % (key, field_digest))
+    return InterfaceHash(digest.hexdigest(), list_digests, member_digests)
+
+
+def get_root_digest(interface_hashes):
+    """Returns the hash of a whole snapshot from the hashes of its interfaces."""
+    root = hashlib.sha1()
+    for name in sorted(interface_hashes):
+        root.update(name.encode('utf-8') + ':' + interface_hashes[name].digest + ';')
+    return root.hexdigest()
+
+
+def get_hash_tree(interfaces, hash_tree=None, changed_names=None):
+    """Returns the hash tree of a snapshot.
+    Args:
+      interfaces: dict-like of interface information or of idl_records.Interface keyed by interface name
+      hash_tree: HashTree of a previous version of |interfaces| to reuse, or None
+      changed_names: names of the interfaces changed since |hash_tree|, required with |hash_tree|
+    Returns:
+      HashTree
+    """
+    interface_hashes = {}
+    for name in interfaces:
+        if hash_tree is not None and name not in changed_names and name in hash_tree.interfaces:
+            interface_hashes[name] = hash_tree.interfaces[name]
+        else:
+            interface_hashes[name] = get_interface_hash(interfaces[name])
+    return HashTree(get_root_digest(interface_hashes), interface_hashes)
+
+
+def get_changed_interfaces(old_tree, new_tree):
+    """Returns the names of interfaces which were added, deleted or changed between two hash trees."""
+    if old_tree.root == new_tree.root:
+        return set()
+    names = set(old_tree.interfaces) ^ set(new_tree.interfaces)
+    for name in set(old_tree.interfaces) & set(new_tree.interfaces):
+        if old_tree.interfaces[name].digest != new_tree.interfaces[name].digest:
+            names.add(name)
+    return names
+
+
+def get_hash_tree_path(snapshot_file):
+    return snapshot_file + HASH_TREE_SUFFIX
+
+
+def write_hash_tree(hash_tree, snapshot_file):
+    """Writes the hash tree of |snapshot_file| next to it. The snapshot must be written first."""
+    interfaces = {}
+    for name, interface_hash in hash_tree.interfaces.iteritems():
+        interfaces[name] = {
+            _DIGEST: interface_hash.digest,
+            _LISTS: interface_hash.list_digests,
+            _MEMBERS: interface_hash.member_digests,
+        }
+    with open(get_hash_tree_path(snapshot_file), 'w') as f:
+        json.dump({
+            _FORMAT: _FORMAT_VERSION,
+            _ROOT: hash_tree.root,
+            _SNAPSHOT_SIZE: os.path.getsize(snapshot_file),
+            _INTERFACES: interfaces,
+        }, f, sort_keys=True)
+
+
+def load_hash_tree(snapshot_file):
+    """Returns the stored hash tree of |snapshot_file|.
+    Args:
+      snapshot_file: snapshot file path
+    Returns:
+      HashTree, or None if there is no hash tree, the snapshot was rewritten after it or it is of an older format
+    """
+    hash_tree_file = get_hash_tree_path(snapshot_file)
+    if not os.path.exists(hash_tree_file):
+        return None
+    if os.path.getmtime(hash_tree_file) < os.path.getmtime(snapshot_file):
+        return None
+    with open(hash_tree_file, 'r') as f:
+        stored = json.load(f)
+    if stored.get(_FORMAT) != _FORMAT_VERSION or stored[_SNAPSHOT_SIZE] != os.path.getsize(snapshot_file):
+        return None
+    interface_hashes = {}
+    for name, interface_hash in stored[_INTERFACES].iteritems():
+        interface_hashes[name] = InterfaceHash(interface_hash[_DIGEST], interface_hash[_LISTS], interface_hash[_MEMBERS])
+    return HashTree(stored[_ROOT], interface_hashes)
+
+
+def usage():
+    sys.stdout.write('Usage: hash_tree.py <snapshot_file> [<snapshot_file> ...]\n')
+
+
+def main(args):
+    if not args:
+        usage()
+        exit(1)
+    for snapshot_file in args:
+        hash_tree = get_hash_tree(binary_snapshot.load_snapshot(snapshot_file))
+        write_hash_tree(hash_tree, snapshot_file)
+        sys.stdout.write('%s %s\n' % (hash_tree.root, snapshot_file))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Usage: idl_corpus.py [--scale N] [--seed N] output_dir
+
+Generates a synthetic Blink-like tree of IDL files for benchmarks.
+
+At scale 1 the tree has about as many files of each kind as Blink's Source
+directory: interfaces, partial interfaces in modules/, [NoInterfaceObject]
+interfaces with implements statements, and files of only dictionaries,
+callbacks or enums, which the collector skips. Members use primitive,
+interface, nullable, sequence and union types and common extended attributes.
+Scale N multiplies every count by N. The same scale and seed always generate
+the same files.
+"""
+
+import optparse
+import os
+import random
+import sys
+
+# Number of files of each kind at scale 1.
+INTERFACE_FILES = 700
+PARTIAL_INTERFACE_FILES = 150
+IMPLEMENTS_FILES = 60
+DICTIONARY_FILES = 200
+CALLBACK_FILES = 40
+ENUM_FILES = 30
+
+_CORE_AREAS = ['animation', 'css', 'dom', 'editing', 'events', 'fetch', 'fileapi', 'frame', 'html', 'inspector',
+               'loader', 'page', 'streams', 'svg', 'timing', 'workers', 'xml']
+_MODULE_AREAS = ['accessibility', 'battery', 'bluetooth', 'crypto', 'encoding', 'filesystem', 'gamepad',
+                 'geolocation', 'indexeddb', 'mediastream', 'notifications', 'permissions', 'push_messaging',
+                 'serviceworkers', 'speech', 'storage', 'webaudio', 'webgl', 'webmidi', 'websockets']
+_PRIMITIVE_TYPES = ['boolean', 'byte', 'octet', 'short', 'unsigned short', 'long', 'unsigned long',
+                    'long long', 'unsigned long long', 'float', 'unrestricted double', 'double', 'DOMString']
+_INTERFACE_EXTATTRIBUTES = ['ActiveDOMObject', 'Constructor', 'DependentLifetime', 'Exposed=(Window,Worker)',
+                            'GarbageCollected', 'RuntimeEnabled=ExperimentalFeatures', 'SetWrapperReferenceFrom=node']
+_MEMBER_EXTATTRIBUTES = ['CallWith=ScriptState', 'CustomElementCallbacks', 'MeasureAs=Feature', 'RaisesException',
+                         'Reflect', 'RuntimeEnabled=ExperimentalFeatures', 'SameObject', 'TreatNullAs=EmptyString']
+
+
+class _CorpusGenerator(object):
+    def __init__(self, scale, seed):
+        self.scale = scale
+        self.random = random.Random(seed)
+        self.interface_names = []
+
+    def choose_extattributes(self, names, probability):
+        if self.random.random() >= probability:
+            return ''
+        chosen = self.random.sample(names, self.random.randint(1, min(2, len(names))))
+        return '[%s] ' % ', '.join(chosen)
+
+    def choose_type(self, nullable_probability=0.1):
+        roll = self.random.random()
+        if roll < 0.05:
+            idl_type = 'sequence<%s>' % self.choose_type(0)
+        elif roll < 0.08 and self.interface_names:
+            idl_type = '(%s or %s)' % (self.random.choice(self.interface_names), self.random.choice(_PRIMITIVE_TYPES))
+        elif 0.08 <= roll < 0.33 and self.interface_names:
+            idl_type = self.random.choice(self.interface_names)
+        elif roll < 0.35:
+            idl_type = 'any'
+        else:
+            idl_type = self.random.choice(_PRIMITIVE_TYPES)
+        if idl_type != 'any' and self.random.random() < nullable_probability:
+            idl_type += '?'
+        return idl_type
+
+    def make_members(self, prefix, attributes, operations, consts):
+        lines = []
+        for index in range(consts):
+            lines.append('    const unsigned short %s_CONST_%d = %d;' % (prefix.upper(), index, index))
+        for index in range(attributes):
+            lines.append('    %s%sattribute %s %sAttribute%d;' % (
+                self.choose_extattributes(_MEMBER_EXTATTRIBUTES, 0.3),
+                'readonly ' if self.random.random() < 0.6 else '', self.choose_type(), prefix, index))
+        for index in range(operations):
+            arguments = ', '.join('%s%s argument%d' % ('optional ' if self.random.random() < 0.2 else '',
+                                                       self.choose_type(), argument_index)
+                                  for argument_index in range(self.random.randint(0, 3)))
+            return_type = 'void' if self.random.random() < 0.4 else self.choose_type()
+            lines.append('    %s%s%s %sOperation%d(%s);' % (
+                self.choose_extattributes(_MEMBER_EXTATTRIBUTES, 0.3),
+                'static ' if self.random.random() < 0.05 else '', return_type, prefix, index, arguments))
+        return lines
+
+    def make_interface(self, name, member_prefix, partial=False, parent=None, extattributes=''):
+        lines = ['%s%sinterface %s%s {' % (extattributes, 'partial ' if partial else '', name,
+                                          ' : %s' % parent if parent else '')]
+        lines.extend(self.make_members(member_prefix, self.random.randint(0, 12), self.random.randint(0, 10),
+                                       self.random.randint(0, 6) if self.random.random() < 0.25 else 0))
+        lines.append('};')
+        return lines
+
+    def make_dictionary(self, name):
+        lines = ['dictionary %s {' % name]
+        for index in range(self.random.randint(1, 8)):
+            lines.append('    %s member%d;' % (self.choose_type(0), index))
+        lines.append('};')
+        return lines
+
+    def get_directory(self, index, areas):
+        area = areas[index % len(areas)]
+        repeat = index // len(areas) % self.scale
+        return area if repeat == 0 else '%s%d' % (area, repeat)
+
+    def generate(self):
+        """Returns a list of (relative path, text) of the IDL files of the corpus."""
+        files = []
+        for index in range(INTERFACE_FILES * self.scale):
+            name = 'Interface%d' % index
+            parent = None
+            if self.interface_names and self.random.random() < 0.4:
+                parent = self.random.choice(self.interface_names)
+            text = self.make_interface(name, 'interface%d' % index, parent=parent,
+                                       extattributes=self.choose_extattributes(_INTERFACE_EXTATTRIBUTES, 0.5))
+            self.interface_names.append(name)
+            files.append((os.path.join('core', self.get_directory(index, _CORE_AREAS), name + '.idl'), text))
+        for index in range(PARTIAL_INTERFACE_FILES * self.scale):
+            name = self.random.choice(self.interface_names)
+            directory = self.get_directory(index, _MODULE_AREAS)
+            text = self.make_interface(name, 'partial%d' % index, partial=True,
+                                       extattributes=self.choose_extattributes(['RuntimeEnabled=ExperimentalFeatures'], 0.5))
+            files.append((os.path.join('modules', directory, '%sPartial%d.idl' % (name, index)), text))
+        for index in range(IMPLEMENTS_FILES * self.scale):
+            name = 'Mixin%d' % index
+            implementer = self.random.choice(self.interface_names)
+            text = self.make_interface(name, 'mixin%d' % index, extattributes='[NoInterfaceObject] ')
+            text.append('%s implements %s;' % (implementer, name))
+            self.interface_names.append(name)
+            files.append((os.path.join('core', self.get_directory(index, _CORE_AREAS), name + '.idl'), text))
+        for index in range(DICTIONARY_FILES * self.scale):
+            name = 'Dictionary%d' % index
+            files.append((os.path.join('modules', self.get_directory(index, _MODULE_AREAS), name + '.idl'),
+                          self.make_dictionary(name)))
+        for index in range(CALLBACK_FILES * self.scale):
+            name = 'Callback%d' % index
+            text = ['callback %s = void (%s data);' % (name, self.choose_type(0))]
+            files.append((os.path.join('modules', self.get_directory(index, _MODULE_AREAS), name + '.idl'), text))
+        for index in range(ENUM_FILES * self.scale):
+            name = 'Enum%d' % index
+            text = ['enum %s { "first", "second", "third" };' % name]
+            files.append((os.path.join('core', self.get_directory(index, _CORE_AREAS), name + '.idl'), text))
+        return [(path, '\n'.join(lines) + '\n') for path, lines in files]
+
+
+def generate_corpus_files(scale=1, seed=0):
+    """Returns the IDL files of a synthetic corpus without writing them.
+    Args:
+      scale: multiplier of the number of files of each kind
+      seed: seed of the random choices
+    Returns:
+      list of (path relative to the Source directory, file contents)
+    """
+    if scale < 1:
+        raise Exception('The scale of a corpus must be at least 1.')
+    return _CorpusGenerator(scale, seed).generate()
+
+
+def generate_corpus(output_dir, scale=1, seed=0):
+    """Writes a synthetic corpus under |output_dir|/Source.
+    Args:
+      output_dir: directory in which Source is created
+      scale: multiplier of the number of files of each kind
+      seed: seed of the random choices
+    Returns:
+      list of the written IDL file paths
+    """
+    paths = []
+    for relative_path, text in generate_corpus_files(scale, seed):
+        path = os.path.join(output_dir, 'Source', relative_path)
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(path, 'w') as f:
+            f.write(text)
+        paths.append(path)
+    return paths
+
+
+def main(args):
+    option_parser = optparse.OptionParser(usage='%prog [--scale N] [--seed N] <output_dir>')
+    option_parser.add_option('--scale', type='int', default=1, help='multiplier of the size of the corpus')
+    option_parser.add_option('--seed', type='int', default=0, help='seed of the random choices')
+    options, args = option_parser.parse_args(args)
+    if len(args) != 1 or options.scale < 1:
+        option_parser.print_usage()
+        exit(1)
+    paths = generate_corpus(args[0], options.scale, options.seed)
+    sys.stdout.write('Wrote %d IDL files under %s\n' % (len(paths), os.path.join(args[0], 'Source')))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Usage: idl_diff.py old_snapshot new_snapshot diff_file
+
+Diffs two interface snapshots written by collect_idls_into_json.py and writes
+the diff in the format of Blink's generate_idl_diff.py: changed, added and
+deleted interfaces, whose members are tagged with 'diff_tag'. When the parent
+interface changed, the Inherit dict is tagged 'changed' and also holds the old
+parent as 'OldParent'.
+
+Every member and interface has a content hash (see hash_tree.py). Interfaces
+whose hashes are equal are skipped without looking at their members, and
+members of changed interfaces are matched by hash, so the time taken follows
+the size of the change rather than the size of the snapshots. Hash trees stored
+next to the snapshots are used instead of hashing them again. In-memory
+snapshots may hold idl_records.Interface records instead of dicts.
+"""
+
+import collections
+import sys
+
+import binary_snapshot
+import hash_tree as hash_tree_module
+import idl_records
+import snapshot_writer
+
+DIFF_TAG = 'diff_tag'
+DIFF_TAG_ADDED = 'added'
+DIFF_TAG_DELETED = 'deleted'
+DIFF_TAG_CHANGED = 'changed'
+_INHERIT = 'Inherit'
+_PARENT = 'Parent'
+_OLD_PARENT = 'OldParent'
+_MEMBER_TYPES = hash_tree_module.MEMBER_TYPES
+
+
+def _get_interface_hash(hash_tree, interface, name):
+    if hash_tree is not None:
+        return hash_tree.interfaces[name]
+    return hash_tree_module.get_interface_hash(interface)
+
+
+def annotate_all_members(interface, diff_tag):
+    """Returns a copy of |interface| whose members and itself are tagged with |diff_tag|."""
+    annotated = dict(interface)
+    for member_type in _MEMBER_TYPES:
+        annotated[member_type] = [dict(member, **{DIFF_TAG: diff_tag}) for member in interface[member_type]]
+    annotated[DIFF_TAG] = diff_tag
+    return annotated
+
+
+def members_diff(old_interface, new_interface, old_hash, new_hash):
+    """Returns |new_interface| with added members, deleted members of |old_interface| and a changed parent tagged.
+    Args:
+      old_interface: dict of interface information of the old revision
+      new_interface: dict of interface information of the new revision
+      old_hash: hash_tree.InterfaceHash of |old_interface|
+      new_hash: hash_tree.InterfaceHash of |new_interface|
+    Returns:
+      A tuple of (annotated interface, True if any member was added or deleted or the parent changed)
+    """
+    annotated = dict(new_interface)
+    is_changed = False
+    old_parent = (old_interface.get(_INHERIT) or {}).get(_PARENT)
+    new_parent = (new_interface.get(_INHERIT) or {}).get(_PARENT)
+    if old_parent != new_parent:
+        annotated[_INHERIT] = {_PARENT: new_parent, _OLD_PARENT: old_parent, DIFF_TAG: DIFF_TAG_CHANGED}
+        is_changed = True
+    for member_type in _MEMBER_TYPES:
+        old_digests = old_hash.member_digests[member_type]
+        new_digests = new_hash.member_digests[member_type]
+        remaining = collections.Counter(old_digests)
+        added_members = []
+        unchanged_members = []
+        for member, digest in zip(new_interface[member_type], new_digests):
+            if remaining[digest] > 0:
+                remaining[digest] -= 1
+                unchanged_members.append(member)
+            else:
+                added_members.append(dict(member, **{DIFF_TAG: DIFF_TAG_ADDED}))
+        deleted_members = []
+        for member, digest in reversed(zip(old_interface[member_type], old_digests)):
+            # The last unmatched copies of a digest are the deleted ones.
+            if remaining[digest] > 0:
+                remaining[digest] -= 1
+                deleted_members.append(dict(member, **{DIFF_TAG: DIFF_TAG_DELETED}))
+        deleted_members.reverse()
+        if added_members or deleted_members:
+            is_changed = True
+        annotated[member_type] = added_members + unchanged_members + deleted_members
+    return annotated, is_changed
+
+
+def interfaces_diff(old_interfaces, new_interfaces, old_tree=None, new_tree=None):
+    """Returns the diff of two snapshots. The snapshots are not modified.
+    Args:
+      old_interfaces: dict-like of interface information or of idl_records.Interface of the old revision
+      new_interfaces: dict-like of interface information or of idl_records.Interface of the new revision
+      old_tree: hash_tree.HashTree of |old_interfaces|, or None to hash on demand
+      new_tree: hash_tree.HashTree of |new_interfaces|, or None to hash on demand
+    Returns:
+      A dict of changed, added and deleted interfaces annotated with diff tags
+    """
+    if old_tree is not None and new_tree is not None:
+        names = hash_tree_module.get_changed_interfaces(old_tree, new_tree)
+    else:
+        names = set(new_interfaces)
+        names.update(old_interfaces)
+    annotated = {}
+    for name in names:
+        if name not in old_interfaces:
+            annotated[name] = annotate_all_members(idl_records.as_dict(new_interfaces[name]), DIFF_TAG_ADDED)
+        elif name not in new_interfaces:
+            annotated[name] = annotate_all_members(idl_records.as_dict(old_interfaces[name]), DIFF_TAG_DELETED)
+        else:
+            old_interface = idl_records.as_dict(old_interfaces[name])
+            new_interface = idl_records.as_dict(new_interfaces[name])
+            old_hash = _get_interface_hash(old_tree, old_interface, name)
+            new_hash = _get_interface_hash(new_tree, new_interface, name)
+            if old_hash.digest == new_hash.digest:
+                continue
+            annotated_interface, is_changed = members_diff(old_interface, new_interface, old_hash, new_hash)
+            if is_changed:
+                annotated[name] = annotated_interface
+    return annotated
+
+
+def usage():
+    sys.stdout.write('Usage: idl_diff.py <old_snapshot> <new_snapshot> <diff_file>\n')
+
+
+def main(args):
+    if len(args) != 3:
+        usage()
+        exit(1)
+    old_interfaces = binary_snapshot.load_snapshot(args[0])
+    new_interfaces = binary_snapshot.load_snapshot(args[1])
+    diff = interfaces_diff(old_interfaces, new_interfaces,
+                           hash_tree_module.load_hash_tree(args[0]), hash_tree_module.load_hash_tree(args[1]))
+    snapshot_writer.export_to_jsonfile(diff, args[2])
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
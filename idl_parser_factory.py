@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Usage: idl_parser_factory.py [tables_dir]
+
+Shared BlinkIDLParser for the scripts of this project.
+
+Building a BlinkIDLParser in a fresh interpreter makes PLY generate its lexer
+and parser tables, unless they were written before. get_parser() keeps the
+tables in a directory of this project's cache, named after a hash of the
+parser sources so that a parser update regenerates them, and keeps one parser
+per process, so only the first call of a process pays for construction.
+
+Running this script precompiles the tables and reports the startup time.
+"""
+
+import os
+import sys
+import time
+
+import parse_cache
+
+import blink_idl_parser
+from blink_idl_parser import BlinkIDLParser
+
+DEFAULT_TABLES_ROOT = os.path.join(parse_cache.DEFAULT_CACHE_DIR, 'parser_tables')
+_TABLES_FORMAT_VERSION = '1'
+_PICKLE_FILE = 'parsetab.pickle'
+_PARSER_MODULES = ['idl_lexer', 'idl_parser', 'idl_parser.idl_lexer', 'idl_parser.idl_parser',
+                   'blink_idl_lexer', 'ply.lex', 'ply.yacc']
+
+_parser = None
+_startup = {}
+
+
+def get_tables_dir(tables_root=DEFAULT_TABLES_ROOT):
+    """Returns the directory of the lexer and parser tables of the current parser sources."""
+    modules = [blink_idl_parser] + [sys.modules.get(name) for name in _PARSER_MODULES]
+    return os.path.join(tables_root, parse_cache.get_version(modules, _TABLES_FORMAT_VERSION))
+
+
+def create_parser(tables_dir, rewrite_tables=False):
+    """Returns a new BlinkIDLParser which reads its tables from, or writes them into, |tables_dir|.
+    Args:
+      tables_dir: directory of the lexer and parser tables
+      rewrite_tables: True to generate the tables even if they exist
+    Returns:
+      BlinkIDLParser
+    """
+    if not os.path.isdir(tables_dir):
+        try:
+            os.makedirs(tables_dir)
+        except OSError:
+            if not os.path.isdir(tables_dir):
+                raise
+    return BlinkIDLParser(outputdir=tables_dir, rewrite_tables=rewrite_tables, write_tables=True,
+                          picklefile=os.path.join(tables_dir, _PICKLE_FILE))
+
+
+def get_parser(tables_root=DEFAULT_TABLES_ROOT):
+    """Returns the BlinkIDLParser of this process, creating it on the first call.
+    Args:
+      tables_root: directory under which the tables of each parser version are kept
+    Returns:
+      BlinkIDLParser
+    """
+    global _parser
+    if _parser is None:
+        tables_dir = get_tables_dir(tables_root)
+        tables_existed = os.path.exists(os.path.join(tables_dir, _PICKLE_FILE))
+        start = time.time()
+        _parser = create_parser(tables_dir)
+        _startup.update(seconds=time.time() - start, tables_dir=tables_dir, tables_existed=tables_existed)
+    return _parser
+
+
+def get_startup_report():
+    """Returns a line which describes how long the parser of this process took to start, or None before it started."""
+    if not _startup:
+        return None
+    return 'BlinkIDLParser started in %.3f s with %s tables in %s' % (
+        _startup['seconds'], 'cached' if _startup['tables_existed'] else 'generated', _startup['tables_dir'])
+
+
+def report_startup(out=sys.stderr):
+    report = get_startup_report()
+    if report:
+        out.write(report + '\n')
+
+
+def main(args):
+    tables_root = args[0] if args else DEFAULT_TABLES_ROOT
+    tables_dir = get_tables_dir(tables_root)
+    start = time.time()
+    create_parser(tables_dir, rewrite_tables=True)
+    sys.stdout.write('Generated tables in %s in %.3f s\n' % (tables_dir, time.time() - start))
+    start = time.time()
+    create_parser(tables_dir)
+    sys.stdout.write('BlinkIDLParser starts in %.3f s with these tables\n' % (time.time() - start))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
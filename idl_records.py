@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Compact record classes of the collector's interface information.
+
+Each record stores its fields in __slots__ instead of a per-object dict, and
+converts to and from the dicts written by collect_idls_into_json.py with
+to_dict() and from_dict(). Extended attributes are kept as a tuple of names,
+and names and types are interned.
+
+collect_idls_into_json.collect_interface_records builds records while
+collecting, and hash_tree.py and idl_diff.py accept records wherever they
+accept interface dicts.
+"""
+
+_NAME = 'Name'
+_TYPE = 'Type'
+_VALUE = 'Value'
+_READONLY = 'Readonly'
+_STATIC = 'Static'
+_ARGUMENTS = 'Arguments'
+_EXTATTRIBUTES = 'ExtAttributes'
+_FILEPATH = 'FilePath'
+_CONSTS = 'Consts'
+_ATTRIBUTES = 'Attributes'
+_OPERATIONS = 'Operations'
+_INHERIT = 'Inherit'
+_PARENT = 'Parent'
+_PARTIAL_FILEPATH = 'Partial_FilePaths'
+
+
+def intern_string(string):
+    """Returns the shared copy of |string|, using the builtin intern() so that it is freed once unused.
+    Args:
+      string: str, unicode or any other value, which is returned as is
+    Returns:
+      value equal to |string|; an ASCII unicode string becomes a str
+    """
+    if isinstance(string, unicode):
+        # intern() accepts only str. IDL names are ASCII, and json writes both types the same way.
+        try:
+            string = string.encode('ascii')
+        except UnicodeEncodeError:
+            return string
+    if isinstance(string, str):
+        return intern(string)
+    return string
+
+
+def _intern_type(idl_type):
+    if isinstance(idl_type, list):
+        return [intern_string(type_name) for type_name in idl_type]
+    return intern_string(idl_type)
+
+
+def _extattributes_to_list(extattributes):
+    return [{_NAME: name} for name in extattributes]
+
+
+def _extattributes_from_list(extattr_list):
+    return tuple(intern_string(extattr[_NAME]) for extattr in extattr_list)
+
+
+class _Record(object):
+    """Base class which compares records field by field."""
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__,
+                           ', '.join('%s=%r' % (field, getattr(self, field)) for field in self.__slots__))
+
+
+class Argument(_Record):
+    __slots__ = ('name', 'type')
+
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+
+    def to_dict(self):
+        return {_NAME: self.name, _TYPE: self.type}
+
+    @classmethod
+    def from_dict(cls, argument):
+        return cls(intern_string(argument[_NAME]), _intern_type(argument[_TYPE]))
+
+
+class Const(_Record):
+    __slots__ = ('name', 'type', 'value', 'extattributes')
+
+    def __init__(self, name, type, value, extattributes=()):
+        self.name = name
+        self.type = type
+        self.value = value
+        self.extattributes = extattributes
+
+    def to_dict(self):
+        return {
+            _NAME: self.name,
+            _TYPE: self.type,
+            _VALUE: self.value,
+            _EXTATTRIBUTES: _extattributes_to_list(self.extattributes),
+        }
+
+    @classmethod
+    def from_dict(cls, const):
+        return cls(intern_string(const[_NAME]), intern_string(const[_TYPE]), intern_string(const[_VALUE]),
+                   _extattributes_from_list(const[_EXTATTRIBUTES]))
+
+
+class Attribute(_Record):
+    __slots__ = ('name', 'type', 'extattributes', 'readonly', 'static')
+
+    def __init__(self, name, type, extattributes=(), readonly=False, static=False):
+        self.name = name
+        self.type = type
+        self.extattributes = extattributes
+        self.readonly = readonly
+        self.static = static
+
+    def to_dict(self):
+        return {
+            _NAME: self.name,
+            _TYPE: self.type,
+            _EXTATTRIBUTES: _extattributes_to_list(self.extattributes),
+            _READONLY: self.readonly,
+            _STATIC: self.static,
+        }
+
+    @classmethod
+    def from_dict(cls, attribute):
+        return cls(intern_string(attribute[_NAME]), _intern_type(attribute[_TYPE]),
+                   _extattributes_from_list(attribute[_EXTATTRIBUTES]),
+                   attribute[_READONLY], attribute[_STATIC])
+
+
+class Operation(_Record):
+    __slots__ = ('name', 'arguments', 'type', 'extattributes', 'static')
+
+    def __init__(self, name, arguments, type, extattributes=(), static=False):
+        self.name = name
+        self.arguments = arguments
+        self.type = type
+        self.extattributes = extattributes
+        self.static = static
+
+    def to_dict(self):
+        return {
+            _NAME: self.name,
+            _ARGUMENTS: [argument.to_dict() for argument in self.arguments],
+            _TYPE: self.type,
+            _EXTATTRIBUTES: _extattributes_to_list(self.extattributes),
+            _STATIC: self.static,
+        }
+
+    @classmethod
+    def from_dict(cls, operation):
+        return cls(intern_string(operation[_NAME]), [Argument.from_dict(argument) for argument in operation[_ARGUMENTS]],
+                   _intern_type(operation[_TYPE]), _extattributes_from_list(operation[_EXTATTRIBUTES]), operation[_STATIC])
+
+
+class Interface(_Record):
+    __slots__ = ('name', 'file_path', 'consts', 'attributes', 'operations', 'extattributes', 'parent',
+                 'partial_file_paths')
+
+    def __init__(self, name, file_path, consts, attributes, operations, extattributes=(), parent=None,
+                 partial_file_paths=None):
+        self.name = name
+        self.file_path = file_path
+        self.consts = consts
+        self.attributes = attributes
+        self.operations = operations
+        self.extattributes = extattributes
+        self.parent = parent
+        self.partial_file_paths = partial_file_paths
+
+    def extend_members(self, other):
+        """Appends the consts, attributes and operations of |other|, whose member records are shared, not copied."""
+        self.consts.extend(other.consts)
+        self.attributes.extend(other.attributes)
+        self.operations.extend(other.operations)
+
+    def to_dict(self):
+        interface = {
+            _NAME: self.name,
+            _FILEPATH: self.file_path,
+            _CONSTS: [const.to_dict() for const in self.consts],
+            _ATTRIBUTES: [attribute.to_dict() for attribute in self.attributes],
+            _OPERATIONS: [operation.to_dict() for operation in self.operations],
+            _EXTATTRIBUTES: _extattributes_to_list(self.extattributes),
+            _INHERIT: {_PARENT: self.parent},
+        }
+        if self.partial_file_paths is not None:
+            interface[_PARTIAL_FILEPATH] = list(self.partial_file_paths)
+        return interface
+
+    @classmethod
+    def from_dict(cls, interface):
+        return cls(intern_string(interface[_NAME]), intern_string(interface[_FILEPATH]),
+                   [Const.from_dict(const) for const in interface[_CONSTS]],
+                   [Attribute.from_dict(attribute) for attribute in interface[_ATTRIBUTES]],
+                   [Operation.from_dict(operation) for operation in interface[_OPERATIONS]],
+                   _extattributes_from_list(interface[_EXTATTRIBUTES]),
+                   intern_string(interface[_INHERIT][_PARENT]),
+                   _intern_paths(interface.get(_PARTIAL_FILEPATH)))
+
+
+def _intern_paths(paths):
+    if paths is None:
+        return None
+    return [intern_string(path) for path in paths]
+
+
+def as_dict(interface):
+    """Returns interface information as a dict.
+    Args:
+      interface: Interface, or dict of interface information which is returned as is
+    Returns:
+      dict of interface information
+    """
+    if isinstance(interface, Interface):
+        return interface.to_dict()
+    return interface
+
+
+def interfaces_from_dicts(dictionary):
+    """Returns a dict of Interface records keyed by interface name.
+    Args:
+      dictionary: dict of interface information, as written by collect_idls_into_json.py
+    Returns:
+      dict of Interface
+    """
+    return dict((name, Interface.from_dict(interface)) for name, interface in dictionary.iteritems())
+
+
+def interfaces_to_dicts(records):
+    """Returns a dict of interface information which can be written as a snapshot.
+    Args:
+      records: dict of Interface keyed by interface name
+    Returns:
+      dict of interface information
+    """
+    return dict((name, interface.to_dict()) for name, interface in records.iteritems())
@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Usage: incremental_snapshot.py [options] snapshot.json provenance.json changes.txt
+
+Updates a snapshot written by "collect_idls_into_json.py --provenance" for a
+list of changed IDL files, parsing only those files.
+
+changes.txt: lines of a status letter and a path, as printed by
+  "git diff --name-status": A (added), M (modified), D (deleted), R (renamed).
+  Paths are resolved against the current directory, like the paths of the
+  original path_file.txt.
+
+Only interfaces defined, extended by a partial interface, or implementing
+another interface in the changed files are recomputed, plus the interfaces
+which implement those. The provenance records how many members each
+definition contributed to a merged interface, so the members of unchanged
+definitions are sliced out of the previous snapshot instead of being parsed
+again. Added files are merged after all previously known files.
+
+If the snapshot has a hash tree (see hash_tree.py), the updated snapshot gets
+one too, in which only the recomputed interfaces are hashed again.
+"""
+
+import bisect
+import json
+import optparse
+import os
+import sys
+import utilities
+
+import collect_idls_into_json
+import hash_tree
+import idl_parser_factory
+
+from interface_node_path import is_idl_file
+
+_INTERFACE = 'Interface'
+_IMPLEMENT = 'Implements'
+_PARTIAL = 'Partial'
+_NAME = 'Name'
+_FILEPATH = 'FilePath'
+_REFERENCE = 'Reference'
+_PARTIAL_FILEPATH = 'Partial_FilePaths'
+_MEMBERS = ['Consts', 'Attributes', 'Operations']
+_PATHS = 'Paths'
+_FILES = 'Files'
+_INTERFACES = 'Interfaces'
+_PARTIALS = 'Partials'
+_SEGMENTS = 'Segments'
+_ADDED = 'A'
+_MODIFIED = 'M'
+_DELETED = 'D'
+_RENAMED = 'R'
+_COPIED = 'C'
+
+
+def read_changes(changes_file):
+    """Returns changed IDL files listed in the output of "git diff --name-status".
+    Args:
+      changes_file: text file
+    Returns:
+      A tuple of (list of added path, list of modified path, list of deleted path)
+    """
+    added = []
+    modified = []
+    deleted = []
+    for line in utilities.read_file_to_list(changes_file):
+        fields = line.split()
+        if not fields:
+            continue
+        status = fields[0][0]
+        if status == _ADDED:
+            added.append(fields[1])
+        elif status == _MODIFIED:
+            modified.append(fields[1])
+        elif status == _DELETED:
+            deleted.append(fields[1])
+        elif status == _RENAMED:
+            deleted.append(fields[1])
+            added.append(fields[2])
+        elif status == _COPIED:
+            added.append(fields[2])
+        else:
+            raise Exception('Unknown change status: %s' % line)
+    return ([path for path in added if is_idl_file(path)],
+            [path for path in modified if is_idl_file(path)],
+            [path for path in deleted if is_idl_file(path)])
+
+
+def get_defined_names(file_provenance):
+    """Returns names of interfaces which an IDL file defines, extends or makes implement another interface.
+    Args:
+      file_provenance: output of collect_idls_into_json.file_definitions_to_provenance, or None
+    Returns:
+      set of interface name
+    """
+    if not file_provenance:
+        return set()
+    names = set(file_provenance[_INTERFACES])
+    names.update(file_provenance[_PARTIALS])
+    names.update(implement[_NAME] for implement in file_provenance[_IMPLEMENT])
+    return names
+
+
+def get_implementers_closure(names, implement_list):
+    """Returns |names| plus every interface which implements one of them, directly or not.
+    Args:
+      names: set of interface name
+      implement_list: list of implements dict
+    Returns:
+      set of interface name
+    """
+    implementers = {}
+    for implement in implement_list:
+        implementers.setdefault(implement[_REFERENCE], []).append(implement[_NAME])
+    closure = set(names)
+    pending = list(names)
+    while pending:
+        for implementer in implementers.get(pending.pop(), []):
+            if implementer not in closure:
+                closure.add(implementer)
+                pending.append(implementer)
+    return closure
+
+
+def slice_segment(interface, segments, kind, source):
+    """Returns the members which one definition contributed to a merged interface.
+    Args:
+      interface: dict of merged interface information
+      segments: merge segments of |interface|
+      kind: 'Interface' or 'Partial'
+      source: file path of the definition
+    Returns:
+      dict of member type to list of member, or None if no such segment exists
+    """
+    offsets = dict.fromkeys(_MEMBERS, 0)
+    for segment_kind, segment_source, counts in segments:
+        if segment_kind == kind and segment_source == source:
+            return {member: interface[member][offsets[member]:offsets[member] + counts[member]] for member in _MEMBERS}
+        collect_idls_into_json.add_member_counts(offsets, counts)
+    return None
+
+
+def slice_before_implements(interface, segments, implement_count):
+    """Returns the members of a merged interface as they were before its |implement_count|+1-th implements was merged.
+    Args:
+      interface: dict of merged interface information
+      segments: merge segments of |interface|
+      implement_count: number of implements statements of |interface| merged so far
+    Returns:
+      dict of member type to list of member
+    """
+    counts = dict.fromkeys(_MEMBERS, 0)
+    for segment_kind, segment_source, segment_counts in segments:
+        if segment_kind == _IMPLEMENT:
+            if not implement_count:
+                break
+            implement_count -= 1
+        collect_idls_into_json.add_member_counts(counts, segment_counts)
+    return {member: interface[member][:counts[member]] for member in _MEMBERS}
+
+
+def update_snapshot(interfaces, provenance, added, modified, deleted, jobs=1, cache=None):
+    """Updates a snapshot and its provenance in place for changed IDL files.
+    The result is the same as collecting all files again in the order of the updated provenance.
+    Args:
+      interfaces: dict of interface information written by collect_idls_into_json.py
+      provenance: provenance written by collect_idls_into_json.py --provenance
+      added: list of added IDL file path
+      modified: list of modified IDL file path
+      deleted: list of deleted IDL file path
+      jobs: number of worker processes used to parse changed files
+      cache: parse_cache.ParseCache, or None to parse every changed file
+    Returns:
+      set of names of the recomputed interfaces
+    """
+    files = provenance[_FILES]
+    segments = provenance[_SEGMENTS]
+    known_paths = {os.path.relpath(path): path for path in provenance[_PATHS]}
+
+    def resolve(path):
+        return known_paths.get(os.path.relpath(path), path)
+
+    changed_paths = []
+    for path in added + modified:
+        path = resolve(path)
+        if path not in changed_paths:
+            changed_paths.append(path)
+    deleted_paths = set(resolve(path) for path in deleted if resolve(path) in files) - set(changed_paths)
+    new_paths = ([path for path in provenance[_PATHS] if path not in deleted_paths] +
+                 [path for path in changed_paths if path not in files])
+
+    affected = set()
+    for path in changed_paths + list(deleted_paths):
+        affected.update(get_defined_names(files.pop(path, None)))
+    loaded = dict(zip(changed_paths, collect_idls_into_json.get_all_file_definitions(changed_paths, jobs, cache)))
+    for path, file_definitions in loaded.iteritems():
+        files[path] = collect_idls_into_json.file_definitions_to_provenance(file_definitions)
+        affected.update(get_defined_names(files[path]))
+
+    implement_list = [implement for path in new_paths for implement in files[path][_IMPLEMENT]]
+    affected = get_implementers_closure(affected, implement_list)
+
+    interface_paths = {}
+    partial_paths = {}
+    for path in new_paths:
+        for name in files[path][_INTERFACES]:
+            interface_paths[name] = path
+        for name in files[path][_PARTIALS]:
+            partial_paths[name] = path
+
+    def get_definition(name, path, index, kind):
+        if path not in loaded and name in interfaces:
+            members = slice_segment(interfaces[name], segments.get(name, []), kind, os.path.relpath(path))
+            if members is not None:
+                if kind == _INTERFACE:
+                    definition = {key: value for key, value in interfaces[name].iteritems()
+                                  if key not in _MEMBERS and key != _PARTIAL_FILEPATH}
+                else:
+                    definition = {_FILEPATH: os.path.relpath(path)}
+                definition.update(members)
+                return definition
+        # The definition was shadowed by another one in the previous snapshot, so parse it.
+        if path not in loaded:
+            loaded[path] = list(collect_idls_into_json.get_all_file_definitions([path], 1, cache))[0]
+        return loaded[path][index][name]
+
+    rebuilt = {}
+    rebuilt_partials = {}
+    for name in affected:
+        if name in interface_paths:
+            rebuilt[name] = get_definition(name, interface_paths[name], 0, _INTERFACE)
+        if name in partial_paths:
+            rebuilt_partials[name] = get_definition(name, partial_paths[name], 1, _PARTIAL)
+    new_segments = collect_idls_into_json.get_merge_segments(rebuilt, rebuilt_partials, [])
+    collect_idls_into_json.merge_partial_dicts(rebuilt, rebuilt_partials)
+
+    implement_positions = {}
+    for index, implement in enumerate(implement_list):
+        implement_positions.setdefault(implement[_NAME], []).append(index)
+    for index, implement in enumerate(implement_list):
+        implement_name = implement[_NAME]
+        reference = implement[_REFERENCE]
+        if implement_name not in affected:
+            continue
+        if implement_name not in rebuilt or reference not in (rebuilt if reference in affected else interfaces):
+            raise Exception('There is not corresponding implement or reference interface.')
+        if reference in affected:
+            reference_interface = rebuilt[reference]
+        else:
+            implement_count = bisect.bisect_left(implement_positions.get(reference, []), index)
+            reference_interface = slice_before_implements(interfaces[reference], segments[reference], implement_count)
+        new_segments[implement_name].append([_IMPLEMENT, reference, collect_idls_into_json.get_member_counts(reference_interface)])
+        for member in _MEMBERS:
+            rebuilt[implement_name][member].extend(reference_interface[member])
+
+    for name in affected:
+        if name in rebuilt:
+            interfaces[name] = rebuilt[name]
+            segments[name] = new_segments[name]
+        else:
+            interfaces.pop(name, None)
+            segments.pop(name, None)
+    provenance[_PATHS] = new_paths
+    return affected
+
+
+def load_jsonfile(json_file):
+    with open(json_file, 'r') as f:
+        return json.load(f)
+
+
+def usage():
+    sys.stdout.write('Usage: incremental_snapshot.py [--jobs N] [--cache-dir DIR | --no-cache] [--output FILE] [--output-provenance FILE] <snapshot.json> <provenance.json> <changes.txt>\n')
+
+
+def parse_options(args):
+    option_parser = optparse.OptionParser(usage='%prog [--jobs N] [--cache-dir DIR | --no-cache] [--output FILE] [--output-provenance FILE] <snapshot.json> <provenance.json> <changes.txt>')
+    collect_idls_into_json.add_collector_options(option_parser)
+    option_parser.add_option('--output', help='updated snapshot; defaults to updating snapshot.json in place')
+    option_parser.add_option('--output-provenance', help='updated provenance; defaults to updating provenance.json in place')
+    options, args = option_parser.parse_args(args)
+    if len(args) != 3 or options.jobs < 1:
+        usage()
+        exit(1)
+    return options, args
+
+
+def main(args):
+    options, args = parse_options(args)
+    json_file, provenance_file, changes_file = args
+    collect_idls_into_json.apply_collector_options(options)
+    interfaces = load_jsonfile(json_file)
+    provenance = load_jsonfile(provenance_file)
+    old_hash_tree = hash_tree.load_hash_tree(json_file)
+    added, modified, deleted = read_changes(changes_file)
+    changed_names = update_snapshot(interfaces, provenance, added, modified, deleted,
+                                    options.jobs, collect_idls_into_json.create_cache(options))
+    if options.report_startup:
+        idl_parser_factory.report_startup()
+    collect_idls_into_json.export_to_jsonfile(interfaces, options.output or json_file)
+    if old_hash_tree is not None:
+        # Only the recomputed interfaces are hashed again.
+        hash_tree.write_hash_tree(hash_tree.get_hash_tree(interfaces, old_hash_tree, changed_names),
+                                  options.output or json_file)
+    collect_idls_into_json.export_to_jsonfile(provenance, options.output_provenance or provenance_file)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
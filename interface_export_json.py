@@ -10,7 +10,9 @@ blink_bindings_path = os.path.join(
     chromium_path, 'third_party', 'WebKit', 'Source', 'bindings', 'scripts')
 sys.path.insert(0, blink_bindings_path)
 
-from blink_idl_parser import parse_file, BlinkIDLParser
+import idl_parser_factory
+from blink_idl_parser import parse_file
+from interface_node_path import may_define_interfaces
 
 
 def load_filepath(path_file):
@@ -19,8 +21,10 @@ def load_filepath(path_file):
 
 
 def get_interfaces(file_path):
-    parser = BlinkIDLParser(debug=False)
+    parser = idl_parser_factory.get_parser()
     class_name = 'Interface'
+    if not may_define_interfaces(file_path):
+        return None
     definitions = parse_file(parser, file_path)
     for definition in definitions.GetChildren():
             if definition.GetClass() == class_name:
@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Builders of interface dicts for the tests, in the form collect_idls_into_json.py writes."""
+
+
+def make_interface(name, attributes, extattributes=()):
+    """Returns the dict of an interface.
+    Args:
+      name: interface name
+      attributes: list of names of long attributes
+      extattributes: list of names of extended attributes of the interface
+    Returns:
+      dict of interface information
+    """
+    return {
+        'Name': name,
+        'FilePath': name + '.idl',
+        'Consts': [],
+        'Attributes': [{'Name': attribute, 'Type': 'long', 'ExtAttributes': [], 'Readonly': False, 'Static': False}
+                       for attribute in attributes],
+        'Operations': [],
+        'ExtAttributes': [{'Name': extattr} for extattr in extattributes],
+        'Inherit': {'Parent': None},
+    }
@@ -3,37 +3,224 @@
 # Use of this source code is governed by a BSD-style license that can be
 # found in the LICENSE file.
 
-"""Usage: interface_node_path.py directory-path text_file
+"""Usage: interface_node_path.py [--prune GLOB ...] [--dir-cache FILE] directory-path text_file
 
 The goal of this script is to integrate IDL file path under the directory to text file.
+
+Directories matching a --prune glob are not entered. A glob is matched against
+both the directory name and its path relative to directory-path, with '/'
+separators, e.g. LayoutTests or web/tests. With --dir-cache, the IDL files and
+subdirectories of each directory are stored with its mtime, and a directory
+whose mtime has not changed is not listed again on the next run.
 """
+import fnmatch
+import json
+import optparse
 import os
+import re
 import sys
+import time
+
+import snapshot_writer
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
 
 _IDL_SUFFIX = '.idl'
 _NON_IDL_FILES = frozenset([
     'InspectorInstrumentation.idl',
 ])
+_COMMENT_OR_STRING = re.compile(r'//[^\n]*|/\*.*?\*/|"[^"]*"', re.S)
+_INTERFACE_KEYWORD = re.compile(r'\b(?:interface|implements)\b')
+# A directory modified this recently may change again within its mtime's granularity, so it is not cached.
+_MTIME_GRANULARITY = 2
+
+
+def is_idl_file(file_name):
+    """Returns True if |file_name| is an IDL file which should be collected, otherwise False.
+    Args:
+      file_name: file name or path
+    Returns:
+      True if |file_name| is an IDL file which should be collected, otherwise False
+    """
+    return file_name.endswith(_IDL_SUFFIX) and os.path.basename(file_name) not in _NON_IDL_FILES
+
+
+def may_define_interfaces(path):
+    """Returns False if an IDL file surely declares no interface, partial interface or implements statement.
+    This is a cheap check before parsing: it looks for the 'interface' and 'implements' keywords outside
+    comments and strings, so files of only dictionaries, enums, callbacks or typedefs can be skipped.
+    Args:
+      path: IDL file path
+    Returns:
+      True if |path| may declare an interface or implements statement, otherwise False
+    """
+    with open(path, 'r') as f:
+        return may_define_interfaces_in_text(f.read())
+
+
+def may_define_interfaces_in_text(data):
+    """Returns False if the contents of an IDL file surely declare no interface; see may_define_interfaces."""
+    if not _INTERFACE_KEYWORD.search(data):
+        return False
+    return _INTERFACE_KEYWORD.search(_COMMENT_OR_STRING.sub(' ', data)) is not None
+
+
+def list_directory(dir_path):
+    """Returns the files and subdirectories of a directory, in the order of os.listdir.
+    Symbolic links to directories are not returned as subdirectories, as os.walk does not follow them.
+    Args:
+      dir_path: directory path
+    Returns:
+      A tuple of (list of file name, list of subdirectory name)
+    """
+    file_names = []
+    dir_names = []
+    if scandir is not None:
+        for entry in scandir(dir_path):
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if not is_dir:
+                file_names.append(entry.name)
+            elif not entry.is_symlink():
+                dir_names.append(entry.name)
+    else:
+        for name in os.listdir(dir_path):
+            path = os.path.join(dir_path, name)
+            if not os.path.isdir(path):
+                file_names.append(name)
+            elif not os.path.islink(path):
+                dir_names.append(name)
+    return file_names, dir_names
+
+
+class DirectoryCache(object):
+    """Persisted listing of directories, keyed by absolute path and valid while the directory's mtime is unchanged."""
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self._entries = {}
+        self._visited = {}
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'r') as f:
+                    self._entries = json.load(f)
+            except ValueError:
+                self._entries = {}
+
+    def list_idl_directory(self, dir_path):
+        """Returns the IDL-suffixed files and subdirectories of a directory, listing it only if it changed.
+        Args:
+          dir_path: directory path
+        Returns:
+          A tuple of (list of file name ending with .idl, list of subdirectory name)
+        """
+        key = os.path.abspath(dir_path)
+        mtime = os.stat(dir_path).st_mtime
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != mtime:
+            file_names, dir_names = list_directory(dir_path)
+            entry = [mtime, [name for name in file_names if name.endswith(_IDL_SUFFIX)], dir_names]
+        elif isinstance(dir_path, str):
+            # Names loaded from JSON are unicode; keep paths of the same type as os.walk would return.
+            entry = [mtime, [name.encode('utf-8') for name in entry[1]], [name.encode('utf-8') for name in entry[2]]]
+        if mtime < time.time() - _MTIME_GRANULARITY:
+            self._visited[key] = entry
+        return entry[1], entry[2]
+
+    def save(self):
+        """Writes the directories listed since the cache was loaded, dropping all others."""
+        snapshot_writer.write_file_atomically(self.cache_file, json.dumps(self._visited))
+
 
+class IdlFileFinder(object):
+    """Finds IDL files under a directory, skipping pruned directories and optionally using a DirectoryCache."""
 
-def get_idl_files(path):
+    def __init__(self, prune_patterns=(), cache_file=None):
+        self.prune_patterns = list(prune_patterns)
+        self.cache_file = cache_file
+
+    def is_pruned(self, dir_name, relative_path):
+        for pattern in self.prune_patterns:
+            if fnmatch.fnmatch(dir_name, pattern) or fnmatch.fnmatch(relative_path, pattern):
+                return True
+        return False
+
+    def get_idl_files(self, path):
+        """Returns a generator of IDL file paths under |path|, in the same order as os.walk.
+        Args:
+          path: directory path
+        Returns:
+          a generator which yields IDL file path
+        """
+        directory_cache = DirectoryCache(self.cache_file) if self.cache_file else None
+        stack = [(path, '')]
+        while stack:
+            dir_path, relative_path = stack.pop()
+            try:
+                if directory_cache:
+                    file_names, dir_names = directory_cache.list_idl_directory(dir_path)
+                else:
+                    file_names, dir_names = list_directory(dir_path)
+            except OSError:
+                # os.walk skips directories which cannot be listed.
+                continue
+            for file_name in file_names:
+                if is_idl_file(file_name):
+                    yield os.path.join(dir_path, file_name)
+            subdirectories = []
+            for dir_name in dir_names:
+                sub_relative_path = relative_path + '/' + dir_name if relative_path else dir_name
+                if not self.is_pruned(dir_name, sub_relative_path):
+                    subdirectories.append((os.path.join(dir_path, dir_name), sub_relative_path))
+            stack.extend(reversed(subdirectories))
+        if directory_cache:
+            directory_cache.save()
+
+
+def get_idl_files(path, prune_patterns=(), cache_file=None):
     """Return a generator which has absolute path of IDL files.
     Args:
       path: directory path
+      prune_patterns: list of glob of directories which are not entered
+      cache_file: path of a DirectoryCache file, or None to list every directory
     Returns:
       a generator which yields absolute IDL file path
     """
-    for dir_path, dir_names, file_names in os.walk(path):
-        for file_name in file_names:
-            if file_name.endswith(_IDL_SUFFIX) and file_name not in _NON_IDL_FILES:
-                yield os.path.join(dir_path, file_name)
+    return IdlFileFinder(prune_patterns, cache_file).get_idl_files(path)
+
+
+def add_discovery_options(option_parser):
+    """Adds the options of IDL file discovery to an optparse.OptionParser."""
+    option_parser.add_option('--prune', action='append', default=[], metavar='GLOB',
+                             help='do not enter directories matching GLOB; may be repeated')
+    option_parser.add_option('--dir-cache', metavar='FILE',
+                             help='file which caches directory listings between runs')
+
+
+def create_finder(options):
+    """Returns the IdlFileFinder selected by command line options."""
+    return IdlFileFinder(options.prune, options.dir_cache)
 
 
 def main(args):
+    option_parser = optparse.OptionParser(usage='%prog [--prune GLOB ...] [--dir-cache FILE] <directory-path> <text_file>')
+    add_discovery_options(option_parser)
+    options, args = option_parser.parse_args(args)
+    if len(args) != 2:
+        option_parser.print_usage()
+        exit(1)
     path = args[0]
     filename = args[1]
     with open(filename, 'w') as f:
-        for filepath in get_idl_files(path):
+        for filepath in create_finder(options).get_idl_files(path):
             f.write(filepath + '\n')
 
 
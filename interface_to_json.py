@@ -9,9 +9,12 @@ The goal of this script is to integrate and dump interface node information to j
 
 import os
 import sys
-import json
 
-from blink_idl_parser import parse_file, BlinkIDLParser
+import idl_parser_factory
+import snapshot_writer
+
+from blink_idl_parser import parse_file
+from interface_node_path import may_define_interfaces
 
 
 def load_filepaths(path_file):
@@ -33,9 +36,11 @@ def get_interfaces(path_file):
     Return:
       definition: a generator, interface node objects
     """
-    parser = BlinkIDLParser(debug=False)
+    parser = idl_parser_factory.get_parser()
     class_name = 'Interface'
     for node_path in load_filepaths(path_file):
+        if not may_define_interfaces(node_path):
+            continue
         definitions = parse_file(parser, node_path)
         for definition in definitions.GetChildren():
             if definition.GetClass() == class_name:
@@ -288,15 +293,17 @@ def merge_partial_interface(interface_dict_list, partial_dict_list):
     Return:
       interface_dict_list: list, list of interface node's dictionry merged with partial interface node
     """
+    interfaces_by_name = {}
+    for interface in interface_dict_list:
+        interfaces_by_name.setdefault(interface['Name'], []).append(interface)
     for partial in partial_dict_list:
-        for interface in interface_dict_list:
-            if interface['Name'] == partial['Name']:
-                interface['Attribute'].append(partial['Attribute'])
-                interface['Operation'].append(partial['Operation'])
-                interface['ExtAttributes'].append(partial['ExtAttributes'])
-                interface.setdefault('Partial_FilePath', []).append(partial['FilePath'])
-                if interface['Constant']:
-                    interface.setdefault('Constant', []).append(partial['Constant'])
+        for interface in interfaces_by_name.get(partial['Name'], []):
+            interface['Attribute'].append(partial['Attribute'])
+            interface['Operation'].append(partial['Operation'])
+            interface['ExtAttributes'].append(partial['ExtAttributes'])
+            interface.setdefault('Partial_FilePath', []).append(partial['FilePath'])
+            if interface['Constant']:
+                interface.setdefault('Constant', []).append(partial['Constant'])
     return interface_dict_list
 
 
@@ -323,8 +330,7 @@ def export_jsonfile(dictionary, json_file):
     """
     filename = json_file
     indent_size = 4
-    with open(filename, 'w') as f:
-        json.dump(dictionary, f, sort_keys=True, indent=indent_size)
+    snapshot_writer.export_to_jsonfile(dictionary, filename, indent_size)
 
 
 def main(args):
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Usage: lazy_snapshot.py snapshot.json [interface_name ...]
+
+Read-only, dict-like view of a JSON snapshot which decodes an interface only
+when it is accessed.
+
+The view needs the byte range of each interface in the file. The ranges are
+kept in <snapshot.json>.index, written by "collect_idls_into_json.py --index"
+or by the first LazySnapshot opened on the file; without a valid index file
+the snapshot is scanned once to build one.
+
+Without interface names, writes the index of snapshot.json. Otherwise prints
+the named interfaces.
+"""
+
+import collections
+import json
+import mmap
+import os
+import re
+import sys
+
+OFFSET_INDEX_SUFFIX = '.index'
+_SNAPSHOT_SIZE = 'SnapshotSize'
+_OFFSETS = 'Offsets'
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def get_offset_index_path(snapshot_file):
+    return snapshot_file + OFFSET_INDEX_SUFFIX
+
+
+def write_offset_index(offsets, snapshot_file):
+    """Writes the byte ranges of the interfaces of |snapshot_file| next to it. The snapshot must be written first.
+    Args:
+      offsets: dict of (start, end) keyed by interface name, filled by snapshot_writer
+      snapshot_file: snapshot file path
+    """
+    with open(get_offset_index_path(snapshot_file), 'w') as f:
+        json.dump({_SNAPSHOT_SIZE: os.path.getsize(snapshot_file), _OFFSETS: offsets}, f, sort_keys=True)
+
+
+def load_offset_index(snapshot_file):
+    """Returns the stored byte ranges of the interfaces of |snapshot_file|.
+    Args:
+      snapshot_file: snapshot file path
+    Returns:
+      dict of [start, end] keyed by interface name, or None if there is no index or the snapshot was rewritten after it
+    """
+    index_file = get_offset_index_path(snapshot_file)
+    if not os.path.exists(index_file):
+        return None
+    if os.path.getmtime(index_file) < os.path.getmtime(snapshot_file):
+        return None
+    with open(index_file, 'r') as f:
+        stored = json.load(f)
+    if stored[_SNAPSHOT_SIZE] != os.path.getsize(snapshot_file):
+        return None
+    return stored[_OFFSETS]
+
+
+def build_offset_index(data):
+    """Returns the byte ranges of the interfaces in the text of a JSON snapshot.
+    Each interface is decoded once to find where it ends, and then dropped.
+    Args:
+      data: str which is the contents of a snapshot file
+    Returns:
+      dict of (start, end) keyed by interface name
+    """
+    decoder = json.JSONDecoder()
+    offsets = {}
+    position = _WHITESPACE.match(data, 0).end()
+    if data[position:position + 1] != '{':
+        raise Exception('A snapshot must be a JSON object.')
+    position = _WHITESPACE.match(data, position + 1).end()
+    if data[position:position + 1] == '}':
+        return offsets
+    while True:
+        if data[position:position + 1] != '"':
+            raise Exception('Expected an interface name at byte %d.' % position)
+        name, position = json.decoder.scanstring(data, position + 1)
+        position = _WHITESPACE.match(data, position).end()
+        if data[position:position + 1] != ':':
+            raise Exception('Expected ":" at byte %d.' % position)
+        start = _WHITESPACE.match(data, position + 1).end()
+        _, end = decoder.raw_decode(data, start)
+        offsets[name] = (start, end)
+        position = _WHITESPACE.match(data, end).end()
+        if data[position:position + 1] == '}':
+            return offsets
+        if data[position:position + 1] != ',':
+            raise Exception('Expected "," or "}" at byte %d.' % position)
+        position = _WHITESPACE.match(data, position + 1).end()
+
+
+def ensure_offset_index(snapshot_file):
+    """Returns the byte ranges of the interfaces of |snapshot_file|, building and writing them if needed."""
+    offsets = load_offset_index(snapshot_file)
+    if offsets is None:
+        with open(snapshot_file, 'r') as f:
+            offsets = build_offset_index(f.read())
+        try:
+            write_offset_index(offsets, snapshot_file)
+        except (IOError, OSError):
+            # The snapshot may be in a read-only directory; the index is only rebuilt next time.
+            pass
+    return offsets
+
+
+class LazySnapshot(collections.Mapping):
+    """Read-only dict of interface information backed by a memory-mapped JSON snapshot.
+    Each access decodes the interface again and returns a new dict.
+    """
+
+    def __init__(self, snapshot_file):
+        self._offsets = ensure_offset_index(snapshot_file)
+        with open(snapshot_file, 'rb') as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __getitem__(self, name):
+        start, end = self._offsets[name]
+        return json.loads(self._buffer[start:end])
+
+    def __contains__(self, name):
+        return name in self._offsets
+
+    def __iter__(self):
+        return iter(self._offsets)
+
+    def __len__(self):
+        return len(self._offsets)
+
+
+def usage():
+    sys.stdout.write('Usage: lazy_snapshot.py <snapshot.json> [<interface_name> ...]\n')
+
+
+def main(args):
+    if not args:
+        usage()
+        exit(1)
+    snapshot_file = args[0]
+    if len(args) == 1:
+        with open(snapshot_file, 'r') as f:
+            write_offset_index(build_offset_index(f.read()), snapshot_file)
+        return
+    with LazySnapshot(snapshot_file) as snapshot:
+        for name in args[1:]:
+            if name not in snapshot:
+                raise Exception('%s is not in %s.' % (name, snapshot_file))
+            sys.stdout.write(json.dumps(snapshot[name], sort_keys=True, indent=4) + '\n')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -8,7 +8,9 @@ blink_bindings_path = os.path.join(
     chromium_path, 'third_party', 'WebKit', 'Source', 'bindings', 'scripts')
 sys.path.insert(0, blink_bindings_path)
 
-from blink_idl_parser import parse_file, BlinkIDLParser
+import idl_parser_factory
+from blink_idl_parser import parse_file
+from interface_node_path import may_define_interfaces
 
 def get_idl_files(dir):
     file_type='.idl'
@@ -22,9 +24,11 @@ def get_idl_files(dir):
 
 
 def get_interface_nodes(dir_path):
-    parser = BlinkIDLParser(debug=False)
+    parser = idl_parser_factory.get_parser()
     class_name = 'Interface' 
     for node_path in get_idl_files(dir_path):
+        if not may_define_interfaces(node_path):
+            continue
         definitions = parse_file(parser, node_path)
         for definition in definitions.GetChildren():
             if definition.GetClass() == class_name:
@@ -157,14 +161,16 @@ def format_interface_dict(interface_node):
 
 
 def merge_partial_interface(interface_dict_list, partial_dict_list):
+    interfaces_by_name = {}
+    for interface in interface_dict_list:
+        interfaces_by_name.setdefault(interface['Name'], []).append(interface)
     for partial in partial_dict_list:
-        for interface in interface_dict_list:
-            if interface['Name'] == partial['Name']:
-                interface['Attribute'].append(partial['Attribute'])
-                #interface['File name'].append(partial['File name'])
-                interface['Operation'].append(partial['Operation'])
-                interface['ExtAttributes'].append(partial['ExtAttributes'])
-                interface['Const'].append(partial['Const'])
+        for interface in interfaces_by_name.get(partial['Name'], []):
+            interface['Attribute'].append(partial['Attribute'])
+            #interface['File name'].append(partial['File name'])
+            interface['Operation'].append(partial['Operation'])
+            interface['ExtAttributes'].append(partial['ExtAttributes'])
+            interface['Const'].append(partial['Const'])
     return interface_dict_list
 
 
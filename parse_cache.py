@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""On-disk cache of the per-file output of collect_idls_into_json.py.
+
+An entry is keyed by the SHA-1 of the parser version, the IDL file's path and
+its contents, so a file is parsed again only when it or the parser changes.
+The cache is capped in size and the least recently used entries are evicted.
+"""
+
+import hashlib
+import json
+import os
+
+import snapshot_writer
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'blink_idl_diff')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_ENTRY_SUFFIX = '.json'
+
+
+def get_module_source_path(module):
+    """Returns the source path of |module|, or None if it has none.
+    Args:
+      module: Python module
+    Returns:
+      str which is path to the .py file of |module|
+    """
+    path = getattr(module, '__file__', None)
+    if not path:
+        return None
+    if path.endswith(('.pyc', '.pyo')):
+        path = path[:-1]
+    return path
+
+
+def get_version(modules, format_version):
+    """Returns a version string which changes whenever any of |modules| changes.
+    Args:
+      modules: list of Python module which affects the cached output
+      format_version: str which is bumped when the entry layout changes
+    Returns:
+      str which is hex digest of the modules' sources
+    """
+    digest = hashlib.sha1(format_version)
+    for module in modules:
+        path = get_module_source_path(module)
+        if path and os.path.isfile(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ParseCache(object):
+    """Content-hash keyed cache with a size cap and LRU eviction.
+    The access time of an entry is tracked by its mtime, which is refreshed on each hit.
+    """
+
+    def __init__(self, cache_dir, version, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.version = version
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, path, contents=None):
+        """Returns the cache key of an IDL file.
+        Args:
+          path: IDL file path
+          contents: contents of the file if they were already read, otherwise None
+        Returns:
+          str which is hex digest of parser version, relative path and contents
+        """
+        digest = hashlib.sha1(self.version)
+        digest.update('\0' + os.path.relpath(path) + '\0')
+        if contents is None:
+            with open(path, 'rb') as f:
+                contents = f.read()
+        digest.update(contents)
+        return digest.hexdigest()
+
+    def _get_entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + _ENTRY_SUFFIX)
+
+    def get(self, key):
+        """Returns the cached value of |key|, or None if it is not cached.
+        Args:
+          key: cache key
+        Returns:
+          cached value
+        """
+        entry_path = self._get_entry_path(key)
+        try:
+            with open(entry_path, 'r') as f:
+                value = json.load(f)
+            os.utime(entry_path, None)
+        except (IOError, OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Stores |value| for |key|.
+        The entry is written to a temporary file and renamed, so concurrent runs never see a partial entry.
+        Args:
+          key: cache key
+          value: JSON serializable value
+        """
+        snapshot_writer.write_file_atomically(self._get_entry_path(key), json.dumps(value))
+
+    def prune(self):
+        """Removes least recently used entries until the cache fits in |max_bytes|.
+        Returns:
+          number of removed entries
+        """
+        entries = []
+        total_bytes = 0
+        for dir_path, dir_names, file_names in os.walk(self.cache_dir):
+            for file_name in file_names:
+                if not file_name.endswith(_ENTRY_SUFFIX):
+                    continue
+                entry_path = os.path.join(dir_path, file_name)
+                try:
+                    stat = os.stat(entry_path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry_path))
+                total_bytes += stat.st_size
+        removed = 0
+        for mtime, size, entry_path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                continue
+            total_bytes -= size
+            removed += 1
+        return removed
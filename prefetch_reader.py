@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Reads upcoming files in background threads while the caller processes the current one.
+
+On network file systems opening and reading a file is mostly waiting, which
+threads can overlap with parsing even under the GIL. iter_file_contents keeps
+at most |window| files read ahead of the caller, so memory stays bounded by the
+window however long the path list is.
+"""
+
+import Queue
+import threading
+
+DEFAULT_WINDOW = 8
+# Seconds between checks whether the other side has gone away, so that waits can be interrupted.
+_WAIT_TIMEOUT = 0.1
+
+
+class _PendingRead(object):
+    def __init__(self, path):
+        self.path = path
+        self.contents = None
+        self.error = None
+        self.done = threading.Event()
+
+
+def _read(pending):
+    try:
+        with open(pending.path, 'rb') as f:
+            pending.contents = f.read()
+    except Exception as error:
+        pending.error = error
+    pending.done.set()
+
+
+def _put(queue, item, stopped):
+    """Puts |item| into a bounded queue, giving up when |stopped| is set. Returns False if it gave up."""
+    while not stopped.is_set():
+        try:
+            queue.put(item, timeout=_WAIT_TIMEOUT)
+            return True
+        except Queue.Full:
+            pass
+    return False
+
+
+def _get(queue):
+    # Queue.get without a timeout cannot be interrupted by KeyboardInterrupt in Python 2.
+    while True:
+        try:
+            return queue.get(timeout=_WAIT_TIMEOUT)
+        except Queue.Empty:
+            pass
+
+
+def _feed(paths, ordered, work, stopped):
+    try:
+        for path in paths:
+            pending = _PendingRead(path)
+            # |ordered| is bounded by the window, so this blocks while the caller is behind.
+            if not _put(ordered, pending, stopped):
+                return
+            work.put(pending)
+    except Exception as error:
+        # An error of |paths| itself is raised to the caller in place of the next file.
+        pending = _PendingRead(None)
+        pending.error = error
+        pending.done.set()
+        _put(ordered, pending, stopped)
+        return
+    _put(ordered, None, stopped)
+
+
+def _read_work(work):
+    while True:
+        pending = work.get()
+        if pending is None:
+            return
+        _read(pending)
+
+
+def iter_file_contents(paths, window=DEFAULT_WINDOW):
+    """Returns a generator of the contents of files, read up to |window| files ahead by |window| threads.
+    Args:
+      paths: iterable of file path
+      window: maximum number of files read but not yet consumed; 0 reads each file when it is consumed
+    Returns:
+      a generator which yields (path, contents) in the order of |paths|, and raises the error of a file
+      which cannot be read when that file is reached
+    """
+    if window <= 0:
+        for path in paths:
+            with open(path, 'rb') as f:
+                yield path, f.read()
+        return
+    ordered = Queue.Queue(window)
+    work = Queue.Queue()
+    stopped = threading.Event()
+    threads = [threading.Thread(target=_feed, args=(paths, ordered, work, stopped))]
+    threads.extend(threading.Thread(target=_read_work, args=(work,)) for _ in range(window))
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    try:
+        while True:
+            pending = _get(ordered)
+            if pending is None:
+                return
+            while not pending.done.wait(_WAIT_TIMEOUT):
+                pass
+            if pending.error is not None:
+                raise pending.error
+            yield pending.path, pending.contents
+    finally:
+        stopped.set()
+        for _ in range(window):
+            work.put(None)
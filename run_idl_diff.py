@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Usage: run_idl_diff.py [options] old_source new_source
+
+Collects interface information of two Blink source trees, diffs them and prints
+the diff, all in one process. It replaces subprocess_idl_diff.py, which runs
+interface_node_path.py, collect_idls_into_json.py, generate_idl_diff.py and
+print_idl_diff.py as separate processes connected by text and JSON files.
+The diff itself is computed by idl_diff.py.
+
+A source can also be a snapshot file written by collect_idls_into_json.py or
+binary_snapshot.py, which is loaded instead of collected.
+
+With --range, any number of sources are taken as consecutive revisions. Each
+snapshot is built and hashed once, with up to --jobs snapshots built at the
+same time, and the diff of each adjacent pair is printed (or written to
+--output-dir) as soon as both sides are ready. --index writes the first
+revision in which each interface and member appeared or disappeared.
+"""
+
+import collections
+import itertools
+import multiprocessing
+import optparse
+import os
+import sys
+
+import binary_snapshot
+import collect_idls_into_json
+import hash_tree
+import idl_diff
+import idl_parser_factory
+import interface_node_path
+import print_idl_diff
+import sharded_snapshot
+import snapshot_writer
+
+
+_ORDERS = ('ALPHABET', 'TAG')
+_APPEARED = 'Appeared'
+_DISAPPEARED = 'Disappeared'
+_FIRST_CHANGE_KEYS = {idl_diff.DIFF_TAG_ADDED: _APPEARED, idl_diff.DIFF_TAG_DELETED: _DISAPPEARED}
+
+
+def is_snapshot(source):
+    """Returns True if |source| is a snapshot file or shard directory rather than a source tree."""
+    return os.path.isfile(source) or sharded_snapshot.is_sharded_snapshot(source)
+
+
+def build_snapshot(source_dir, jobs=1, cache=None, finder=None):
+    """Returns interface information of all IDL files under a source tree.
+    Args:
+      source_dir: directory path, e.g. third_party/WebKit/Source, snapshot file path or shard directory
+      jobs: number of worker processes used to parse IDL files
+      cache: parse_cache.ParseCache, or None to parse every file
+      finder: interface_node_path.IdlFileFinder, or None to find every IDL file
+    Returns:
+      A dict-like of interface information loaded from a snapshot, or a dict of compact
+      idl_records.Interface collected from a source tree
+    """
+    if is_snapshot(source_dir):
+        return binary_snapshot.load_snapshot(source_dir)
+    finder = finder or interface_node_path.IdlFileFinder()
+    path_list = list(finder.get_idl_files(source_dir))
+    return collect_idls_into_json.collect_interface_records(path_list, jobs, cache)
+
+
+def _build_snapshot_in_worker(args):
+    source_dir, cache, finder = args
+    return build_snapshot(source_dir, cache=cache, finder=finder)
+
+
+def build_snapshots(source_dirs, jobs=1, cache=None, finder=None):
+    """Returns interface information of several source trees or snapshot files.
+    With a single job per tree the trees are collected concurrently, one process each.
+    Otherwise they are collected one after another, each with |jobs| worker processes.
+    Args:
+      source_dirs: list of directory path or snapshot file path
+      jobs: number of worker processes used to parse IDL files
+      cache: parse_cache.ParseCache, or None to parse every file
+      finder: interface_node_path.IdlFileFinder, or None to find every IDL file
+    Returns:
+      list of the output of build_snapshot in the order of |source_dirs|
+    """
+    tree_dirs = [source_dir for source_dir in source_dirs if not is_snapshot(source_dir)]
+    if jobs > 1 or len(tree_dirs) < 2:
+        return [build_snapshot(source_dir, jobs, cache, finder) for source_dir in source_dirs]
+    pool = multiprocessing.Pool(len(tree_dirs))
+    try:
+        tree_snapshots = pool.map(_build_snapshot_in_worker,
+                                  [(source_dir, cache, finder) for source_dir in tree_dirs])
+    except:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+    tree_snapshots.reverse()
+    return [build_snapshot(source_dir) if is_snapshot(source_dir) else tree_snapshots.pop()
+            for source_dir in source_dirs]
+
+
+def _build_tree_snapshot_in_worker(args):
+    source, cache, finder = args
+    if is_snapshot(source):
+        return None
+    return build_snapshot(source, cache=cache, finder=finder)
+
+
+def iter_snapshots(sources, jobs=1, cache=None, finder=None):
+    """Returns a generator of the snapshots of |sources|, each built once, in order.
+    With more than one job, up to |jobs| source trees are collected at the same time, one process each.
+    A source is submitted only when a finished snapshot is taken, so at most |jobs| snapshots are being
+    built or wait to be consumed, however many sources there are.
+    Args:
+      sources: iterable of directory path or snapshot file path
+      jobs: number of worker processes
+      cache: parse_cache.ParseCache, or None to parse every file
+      finder: interface_node_path.IdlFileFinder, or None to find every IDL file
+    Returns:
+      a generator which yields the output of build_snapshot
+    """
+    if jobs == 1:
+        for source in sources:
+            yield build_snapshot(source, cache=cache, finder=finder)
+        return
+    pool = multiprocessing.Pool(jobs)
+
+    def submit(source):
+        return source, pool.apply_async(_build_tree_snapshot_in_worker, ((source, cache, finder),))
+
+    try:
+        sources = iter(sources)
+        pending = collections.deque(submit(source) for source in itertools.islice(sources, jobs))
+        while pending:
+            source, result = pending.popleft()
+            snapshot = result.get()
+            for next_source in itertools.islice(sources, 1):
+                pending.append(submit(next_source))
+            # Snapshot files are memory-mapped in this process rather than sent between processes.
+            yield build_snapshot(source) if snapshot is None else snapshot
+    except:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+
+def iter_range_diffs(sources, jobs=1, cache=None, finder=None):
+    """Returns a generator of the diffs of adjacent revisions.
+    Args:
+      sources: list of directory path or snapshot file path, in revision order
+      jobs: number of worker processes
+      cache: parse_cache.ParseCache, or None to parse every file
+      finder: interface_node_path.IdlFileFinder, or None to find every IDL file
+    Returns:
+      a generator which yields (old source, new source, diff) for each adjacent pair
+    """
+    old_source = old_interfaces = old_tree = None
+    for source, interfaces in itertools.izip(sources, iter_snapshots(sources, jobs, cache, finder)):
+        tree = None
+        if os.path.isfile(source):
+            tree = hash_tree.load_hash_tree(source)
+        if tree is None:
+            tree = hash_tree.get_hash_tree(interfaces)
+        if old_interfaces is not None:
+            yield old_source, source, idl_diff.interfaces_diff(old_interfaces, interfaces, old_tree, tree)
+        old_source, old_interfaces, old_tree = source, interfaces, tree
+
+
+def add_to_first_change_index(index, revision, diff):
+    """Records in |index| the first revision in which each interface and member was added or deleted.
+    Args:
+      index: dict of {interface name: {'Appeared'|'Disappeared': revision, member type: {member name: {...}}}}
+      revision: name of the new revision of |diff|
+      diff: output of diff_snapshots
+    """
+    for interface_name, interface in diff.iteritems():
+        entry = index.setdefault(interface_name, {})
+        if idl_diff.DIFF_TAG in interface:
+            entry.setdefault(_FIRST_CHANGE_KEYS[interface[idl_diff.DIFF_TAG]], revision)
+        for member_type in hash_tree.MEMBER_TYPES:
+            for member in interface[member_type]:
+                if idl_diff.DIFF_TAG in member:
+                    member_entry = entry.setdefault(member_type, {}).setdefault(member['Name'], {})
+                    member_entry.setdefault(_FIRST_CHANGE_KEYS[member[idl_diff.DIFF_TAG]], revision)
+
+
+def diff_snapshots(old_interfaces, new_interfaces):
+    """Returns the diff of two dicts of interface information.
+    Args:
+      old_interfaces: dict of interface information of the old revision
+      new_interfaces: dict of interface information of the new revision
+    Returns:
+      A dict of interfaces annotated with diff tags, as written by generate_idl_diff.py
+    """
+    return idl_diff.interfaces_diff(old_interfaces, new_interfaces)
+
+
+def print_diff(diff, order, out=sys.stdout):
+    """Prints a diff the same way as print_idl_diff.py.
+    Args:
+      diff: output of diff_snapshots
+      order: 'ALPHABET' or 'TAG'
+      out: file to print to
+    """
+    if order == 'TAG':
+        sorted_diff = print_idl_diff.sort_diff_by_tags(diff)
+    else:
+        sorted_diff = print_idl_diff.sort_diff_in_alphabetical_order(diff)
+    print_idl_diff.print_diff(sorted_diff, print_idl_diff.Colorize(out))
+
+
+def usage():
+    sys.stdout.write('Usage: run_idl_diff.py [--jobs N] [--cache-dir DIR | --no-cache] [--prune GLOB ...] [--dir-cache FILE] [--order ALPHABET|TAG] <old_source> <new_source>\n'
+                     '       run_idl_diff.py --range [--output-dir DIR] [--index FILE] [options] <source> <source> ...\n')
+
+
+def parse_options(args):
+    option_parser = optparse.OptionParser(usage='%prog [--jobs N] [--cache-dir DIR | --no-cache] [--prune GLOB ...] [--dir-cache FILE] [--order ALPHABET|TAG] [--range [--output-dir DIR] [--index FILE]] <old_source> <new_source> ...')
+    collect_idls_into_json.add_collector_options(option_parser)
+    interface_node_path.add_discovery_options(option_parser)
+    option_parser.add_option('--order', default='ALPHABET',
+                             help='how to sort the printed diff, either ALPHABET or TAG')
+    option_parser.add_option('--range', action='store_true', default=False,
+                             help='diff each adjacent pair of any number of sources')
+    option_parser.add_option('--output-dir',
+                             help='with --range, write each diff to DIR/<number>.json instead of printing it')
+    option_parser.add_option('--index',
+                             help='with --range, write the first revision in which each member appeared or disappeared')
+    options, args = option_parser.parse_args(args)
+    if options.range:
+        valid_args = len(args) >= 2
+    else:
+        valid_args = len(args) == 2 and not options.output_dir and not options.index
+    if not valid_args or options.jobs < 1 or options.order not in _ORDERS:
+        usage()
+        exit(1)
+    return options, args
+
+
+def run_range(sources, options, cache, finder):
+    index = {}
+    if options.output_dir and not os.path.isdir(options.output_dir):
+        os.makedirs(options.output_dir)
+    range_diffs = iter_range_diffs(sources, options.jobs, cache, finder)
+    for number, (old_source, new_source, diff) in enumerate(range_diffs, 1):
+        if options.output_dir:
+            snapshot_writer.export_to_jsonfile(diff, os.path.join(options.output_dir, '%d.json' % number))
+        else:
+            sys.stdout.write('=== %s -> %s\n' % (old_source, new_source))
+            print_diff(diff, options.order)
+        if options.index:
+            add_to_first_change_index(index, new_source, diff)
+    if options.index:
+        snapshot_writer.export_to_jsonfile(index, options.index)
+
+
+def main(args):
+    options, args = parse_options(args)
+    cache = collect_idls_into_json.create_cache(options)
+    collect_idls_into_json.apply_collector_options(options)
+    finder = interface_node_path.create_finder(options)
+    if options.range:
+        run_range(args, options, cache, finder)
+        if options.report_startup:
+            idl_parser_factory.report_startup()
+        return
+    old_interfaces, new_interfaces = build_snapshots(args, options.jobs, cache, finder)
+    if options.report_startup:
+        idl_parser_factory.report_startup()
+    print_diff(diff_snapshots(old_interfaces, new_interfaces), options.order)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Usage: sharded_snapshot.py [--buckets N] snapshot_file shard_dir
+
+Writes a snapshot as a directory of shards, so that consumers can load only
+the interfaces they need or process shards in parallel.
+
+Each shard is a small snapshot file, {interface name: interface dict}, under
+shard_dir/shards/: one file per interface by default, or one file per hash
+bucket of the interface name with --buckets. shard_dir/manifest.json lists
+each shard with the interfaces it holds and the SHA-1 of its file, plus a root
+hash of all shards. Rewriting a shard directory leaves the files of unchanged
+shards untouched, removes the shards which are gone and writes the manifest
+last.
+
+binary_snapshot.load_snapshot and the scripts which use it accept a shard
+directory wherever they accept a snapshot file.
+"""
+
+import collections
+import hashlib
+import json
+import optparse
+import os
+import re
+import sys
+
+import snapshot_writer
+
+MANIFEST_FILE = 'manifest.json'
+_SHARDS_DIR = 'shards'
+_SHARD_SUFFIX = '.json'
+_FORMAT_VERSION = 1
+_FORMAT = 'Format'
+_BUCKETS = 'Buckets'
+_ROOT = 'Root'
+_SHARDS = 'Shards'
+_FILE = 'File'
+_HASH = 'Hash'
+_INTERFACES = 'Interfaces'
+# Interface names are IDL identifiers, which are safe file names.
+_SHARD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_-]*$')
+
+
+def get_manifest_path(shard_dir):
+    return os.path.join(shard_dir, MANIFEST_FILE)
+
+
+def is_sharded_snapshot(path):
+    """Returns True if |path| is a directory written by write_sharded_snapshot."""
+    return os.path.isdir(path) and os.path.isfile(get_manifest_path(path))
+
+
+def get_bucket(name, buckets):
+    """Returns the bucket of an interface name; the same in every process and Python version."""
+    return int(hashlib.sha1(name.encode('utf-8')).hexdigest()[:8], 16) % buckets
+
+
+def get_shard_names(interfaces, buckets=None):
+    """Returns the interface names of each shard.
+    Args:
+      interfaces: dict-like of interface information keyed by interface name
+      buckets: number of hash buckets, or None for one shard per interface
+    Returns:
+      dict of sorted list of interface name keyed by shard name
+    """
+    shards = {}
+    if buckets is None:
+        for name in interfaces:
+            if not _SHARD_NAME.match(name):
+                raise Exception('%s cannot be a shard file name; use buckets.' % name)
+            shards[name] = [name]
+    else:
+        width = len(str(buckets - 1))
+        for name in interfaces:
+            shards.setdefault('%0*d' % (width, get_bucket(name, buckets)), []).append(name)
+    for names in shards.itervalues():
+        names.sort()
+    return shards
+
+
+def load_manifest(shard_dir):
+    """Returns the manifest of a shard directory, or None if it has none."""
+    manifest_path = get_manifest_path(shard_dir)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+    if manifest.get(_FORMAT) != _FORMAT_VERSION:
+        raise Exception('%s has an unknown format.' % manifest_path)
+    return manifest
+
+
+def get_root_hash(shards):
+    """Returns a hash of the hashes of all shards of a manifest."""
+    digest = hashlib.sha1()
+    for shard_name in sorted(shards):
+        digest.update('%s\0%s\0' % (shard_name, shards[shard_name][_HASH]))
+    return digest.hexdigest()
+
+
+def write_sharded_snapshot(interfaces, shard_dir, buckets=None):
+    """Writes a snapshot as shards, rewriting only shards whose contents changed.
+    Args:
+      interfaces: dict-like of interface information keyed by interface name
+      shard_dir: output directory
+      buckets: number of hash buckets, or None for one shard per interface
+    Returns:
+      A tuple of (number of shards written, number of unchanged shards, number of shards removed)
+    """
+    if buckets is not None and buckets < 1:
+        raise Exception('The number of buckets must be at least 1.')
+    shards_dir = os.path.join(shard_dir, _SHARDS_DIR)
+    if not os.path.isdir(shards_dir):
+        os.makedirs(shards_dir)
+    old_manifest = load_manifest(shard_dir)
+    old_shards = old_manifest[_SHARDS] if old_manifest else {}
+    shards = {}
+    written = 0
+    for shard_name, names in get_shard_names(interfaces, buckets).iteritems():
+        data = ''.join(snapshot_writer.iter_encode_interfaces((name, interfaces[name]) for name in names))
+        shard_file = _SHARDS_DIR + '/' + shard_name + _SHARD_SUFFIX
+        shard = {_FILE: shard_file, _HASH: hashlib.sha1(data).hexdigest(), _INTERFACES: names}
+        old_shard = old_shards.get(shard_name)
+        shard_path = os.path.join(shard_dir, shard_file)
+        if old_shard is None or old_shard[_HASH] != shard[_HASH] or not os.path.exists(shard_path):
+            snapshot_writer.write_file_atomically(shard_path, data)
+            written += 1
+        shards[shard_name] = shard
+    manifest = {_FORMAT: _FORMAT_VERSION, _BUCKETS: buckets, _ROOT: get_root_hash(shards), _SHARDS: shards}
+    snapshot_writer.write_file_atomically(get_manifest_path(shard_dir), json.dumps(manifest, sort_keys=True))
+    # Shards are loaded lazily, so stale shards are removed only once no new reader can find them in the manifest.
+    removed = 0
+    for shard_name, old_shard in old_shards.iteritems():
+        if shard_name not in shards and os.path.exists(os.path.join(shard_dir, old_shard[_FILE])):
+            os.remove(os.path.join(shard_dir, old_shard[_FILE]))
+            removed += 1
+    return written, len(shards) - written, removed
+
+
+def get_changed_shards(old_manifest, new_manifest):
+    """Returns the names of shards which were added, removed or changed between two manifests."""
+    if old_manifest[_ROOT] == new_manifest[_ROOT]:
+        return set()
+    old_shards = old_manifest[_SHARDS]
+    new_shards = new_manifest[_SHARDS]
+    names = set(old_shards) ^ set(new_shards)
+    for name in set(old_shards) & set(new_shards):
+        if old_shards[name][_HASH] != new_shards[name][_HASH]:
+            names.add(name)
+    return names
+
+
+class ShardedSnapshot(collections.Mapping):
+    """Read-only dict of interface information which loads a shard when one of its interfaces is accessed.
+    Loaded shards are kept, so interfaces must not be modified.
+    """
+
+    def __init__(self, shard_dir):
+        self.shard_dir = shard_dir
+        self.manifest = load_manifest(shard_dir)
+        if self.manifest is None:
+            raise Exception('%s is not a sharded snapshot.' % shard_dir)
+        self._shard_names = {}
+        for shard_name, shard in self.manifest[_SHARDS].iteritems():
+            for name in shard[_INTERFACES]:
+                self._shard_names[name] = shard_name
+        self._loaded = {}
+
+    def load_shard(self, shard_name):
+        """Returns the interfaces of a shard as a dict keyed by interface name."""
+        shard = self._loaded.get(shard_name)
+        if shard is None:
+            with open(os.path.join(self.shard_dir, self.manifest[_SHARDS][shard_name][_FILE]), 'r') as f:
+                shard = self._loaded[shard_name] = json.load(f)
+        return shard
+
+    def __getitem__(self, name):
+        return self.load_shard(self._shard_names[name])[name]
+
+    def __contains__(self, name):
+        return name in self._shard_names
+
+    def __iter__(self):
+        return iter(self._shard_names)
+
+    def __len__(self):
+        return len(self._shard_names)
+
+
+def main(args):
+    option_parser = optparse.OptionParser(usage='%prog [--buckets N] <snapshot_file> <shard_dir>')
+    option_parser.add_option('--buckets', type='int',
+                             help='write one shard per hash bucket of interface names instead of per interface')
+    options, args = option_parser.parse_args(args)
+    if len(args) != 2 or (options.buckets is not None and options.buckets < 1):
+        option_parser.print_usage()
+        exit(1)
+    with open(args[0], 'r') as f:
+        interfaces = json.load(f)
+    written, unchanged, removed = write_sharded_snapshot(interfaces, args[1], options.buckets)
+    sys.stdout.write('%d shards written, %d unchanged, %d removed\n' % (written, unchanged, removed))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
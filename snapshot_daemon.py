@@ -0,0 +1,398 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Usage: snapshot_daemon.py [options] serve source_dir
+       snapshot_daemon.py [--socket FILE] query snapshot|diff|status|rebase|stop [interface_name ...]
+
+Keeps the snapshot of a source tree up to date while its IDL files are edited,
+and answers queries on a Unix socket.
+
+"serve" collects the IDL files under source_dir once and then keeps the
+parser, the merged interfaces, their provenance and their hash tree in memory.
+Changed files are found with inotify if pyinotify is installed, otherwise by
+comparing the stat of every IDL file every --interval seconds, and also before
+each query. Only the changed files are parsed again, and only the interfaces
+they touch are merged again, as in incremental_snapshot.py. If an update
+fails, e.g. while a file is half edited, the last good snapshot is still
+served and everything is collected again on the next change.
+
+"query" prints the answer of a running daemon:
+  snapshot  the current snapshot, or only the named interfaces, as JSON
+  diff      the diff of the current snapshot against the baseline, as JSON
+  status    the number of interfaces and files, updates and the last error
+  rebase    makes the current snapshot the baseline
+  stop      stops the daemon
+
+The baseline is the snapshot at startup, or --baseline, which is a snapshot
+file or another source tree.
+"""
+
+import json
+import optparse
+import os
+import socket
+import SocketServer
+import StringIO
+import sys
+import threading
+import time
+
+import collect_idls_into_json
+import hash_tree
+import idl_diff
+import incremental_snapshot
+import interface_node_path
+import run_idl_diff
+import snapshot_writer
+
+try:
+    import pyinotify
+except ImportError:
+    pyinotify = None
+
+DEFAULT_SOCKET = 'idl_snapshot_daemon.sock'
+_DEFAULT_INTERVAL = 0.5
+_COMMANDS = ('snapshot', 'diff', 'status', 'rebase', 'stop')
+_OK = 'OK'
+_ERROR = 'ERROR'
+
+
+def _is_pruned_directory(finder, source_dir, dir_path):
+    """Returns True if |finder| does not enter a directory under |source_dir|, or one of its parents."""
+    relative_dir = os.path.relpath(dir_path, source_dir)
+    if relative_dir == os.curdir:
+        return False
+    relative_path = ''
+    for dir_name in relative_dir.split(os.sep):
+        relative_path = relative_path + '/' + dir_name if relative_path else dir_name
+        if finder.is_pruned(dir_name, relative_path):
+            return True
+    return False
+
+
+class PollingWatcher(object):
+    """Finds changed IDL files by listing the tree and comparing the mtime and size of each file."""
+
+    name = 'polling'
+
+    def __init__(self, source_dir, finder):
+        self.source_dir = source_dir
+        self.finder = finder
+        self._stats = self._scan()
+
+    def _scan(self):
+        stats = {}
+        for path in self.finder.get_idl_files(self.source_dir):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = (stat.st_mtime, stat.st_size)
+        return stats
+
+    def get_changes(self):
+        """Returns the IDL files changed since the previous call.
+        Returns:
+          A tuple of (list of added path, list of modified path, list of deleted path),
+          or None if the changes are unknown and everything must be collected again
+        """
+        stats = self._scan()
+        added = sorted(path for path in stats if path not in self._stats)
+        modified = sorted(path for path in stats if path in self._stats and stats[path] != self._stats[path])
+        deleted = sorted(path for path in self._stats if path not in stats)
+        self._stats = stats
+        return added, modified, deleted
+
+
+class InotifyWatcher(object):
+    """Finds changed IDL files from the inotify events of the tree."""
+
+    name = 'inotify'
+
+    def __init__(self, source_dir, finder):
+        self.source_dir = source_dir
+        self.finder = finder
+        self._paths = set(finder.get_idl_files(source_dir))
+        self._touched = set()
+        self._rescan = False
+        self._overflowed = False
+        mask = (pyinotify.IN_CLOSE_WRITE | pyinotify.IN_CREATE | pyinotify.IN_DELETE |
+                pyinotify.IN_MOVED_FROM | pyinotify.IN_MOVED_TO)
+        self._watch_manager = pyinotify.WatchManager()
+        self._notifier = pyinotify.Notifier(self._watch_manager, self._process_event, timeout=0)
+        self._watch_manager.add_watch(source_dir, mask, rec=True, auto_add=True,
+                                      exclude_filter=lambda path: _is_pruned_directory(finder, source_dir, path))
+
+    def _process_event(self, event):
+        if event.mask & pyinotify.IN_Q_OVERFLOW:
+            self._overflowed = True
+        elif event.dir:
+            # Files may be created in a new directory before it is watched.
+            self._rescan = True
+        elif interface_node_path.is_idl_file(event.pathname):
+            path = os.path.join(self.source_dir, os.path.relpath(event.pathname, self.source_dir))
+            if not _is_pruned_directory(self.finder, self.source_dir, os.path.dirname(path)):
+                self._touched.add(path)
+
+    def get_changes(self):
+        """Returns the IDL files changed since the previous call, in the same form as PollingWatcher.get_changes."""
+        while self._notifier.check_events(timeout=0):
+            self._notifier.read_events()
+            self._notifier.process_events()
+        touched, self._touched = self._touched, set()
+        if self._overflowed:
+            self._overflowed = self._rescan = False
+            self._paths = set(self.finder.get_idl_files(self.source_dir))
+            return None
+        paths = set(path for path in self._paths | touched if os.path.isfile(path))
+        if self._rescan:
+            self._rescan = False
+            paths = set(self.finder.get_idl_files(self.source_dir))
+        added = sorted(paths - self._paths)
+        modified = sorted((touched & paths & self._paths))
+        deleted = sorted(self._paths - paths)
+        self._paths = paths
+        return added, modified, deleted
+
+
+def create_watcher(source_dir, finder, polling=False):
+    """Returns an InotifyWatcher, or a PollingWatcher if pyinotify is missing or |polling| is True."""
+    if pyinotify is None or polling:
+        return PollingWatcher(source_dir, finder)
+    return InotifyWatcher(source_dir, finder)
+
+
+class SnapshotDaemon(object):
+    """The live snapshot of a source tree and its baseline. All access goes through |lock|."""
+
+    def __init__(self, source_dir, watcher, finder=None, cache=None, jobs=1):
+        self.source_dir = source_dir
+        self.watcher = watcher
+        self.finder = finder or interface_node_path.IdlFileFinder()
+        self.cache = cache
+        self.jobs = jobs
+        self.lock = threading.Lock()
+        self.updates = 0
+        self.last_update_seconds = None
+        self.error = None
+        self._stale = False
+        self._collect()
+        self.set_baseline(self.interfaces, self.tree)
+
+    def _collect(self):
+        path_list = list(self.finder.get_idl_files(self.source_dir))
+        self.interfaces, self.provenance = collect_idls_into_json.collect_interfaces_with_provenance(
+            path_list, self.jobs, self.cache)
+        self.tree = hash_tree.get_hash_tree(self.interfaces)
+
+    def set_baseline(self, interfaces, tree=None):
+        """Makes |interfaces| the snapshot which diff queries compare against.
+        Args:
+          interfaces: dict-like of interface information; interface dicts of the live snapshot are never modified,
+            so a shallow copy of it is enough
+          tree: hash_tree.HashTree of |interfaces|, or None to hash them
+        """
+        self.baseline = dict(interfaces)
+        self.baseline_tree = tree or hash_tree.get_hash_tree(self.baseline)
+
+    def refresh(self):
+        """Applies the changes of the IDL files since the previous refresh. The caller must hold |lock|.
+        Returns:
+          True if the snapshot was updated, otherwise False
+        """
+        changes = self.watcher.get_changes()
+        if changes is not None and not any(changes):
+            return False
+        start = time.time()
+        try:
+            if changes is None or self._stale:
+                self._collect()
+            else:
+                added, modified, deleted = changes
+                changed_names = incremental_snapshot.update_snapshot(self.interfaces, self.provenance,
+                                                                     added, modified, deleted, self.jobs,
+                                                                     self.cache)
+                self.tree = hash_tree.get_hash_tree(self.interfaces, self.tree, changed_names)
+        except Exception as error:
+            # update_snapshot may have updated the provenance but not the interfaces, so collect everything next time.
+            self._stale = True
+            self.error = '%s: %s' % (type(error).__name__, error)
+            return False
+        self._stale = False
+        self.error = None
+        self.updates += 1
+        self.last_update_seconds = time.time() - start
+        return True
+
+    def get_status(self):
+        return {
+            'SourceDir': self.source_dir,
+            'Watcher': self.watcher.name,
+            'Interfaces': len(self.interfaces),
+            'Files': len(self.provenance['Paths']),
+            'Updates': self.updates,
+            'LastUpdateSeconds': self.last_update_seconds,
+            'Error': self.error,
+            'RootDigest': self.tree.root,
+            'BaselineRootDigest': self.baseline_tree.root,
+        }
+
+    def write_answer(self, command, names, out):
+        """Writes the JSON answer of a query. The caller must hold |lock|."""
+        if command == 'snapshot':
+            for name in names:
+                if name not in self.interfaces:
+                    raise Exception('%s is not in the snapshot.' % name)
+            names = sorted(names or self.interfaces)
+            snapshot_writer.write_interfaces(((name, self.interfaces[name]) for name in names), out)
+        elif command == 'diff':
+            diff = idl_diff.interfaces_diff(self.baseline, self.interfaces, self.baseline_tree, self.tree)
+            snapshot_writer.write_interfaces(((name, diff[name]) for name in sorted(diff)), out)
+        else:
+            if command == 'rebase':
+                self.set_baseline(self.interfaces, self.tree)
+            json.dump(self.get_status(), out, sort_keys=True)
+        out.write('\n')
+
+    def watch(self, interval, stopped):
+        """Refreshes the snapshot every |interval| seconds until the threading.Event |stopped| is set."""
+        while not stopped.wait(interval):
+            with self.lock:
+                self.refresh()
+
+
+class _QueryHandler(SocketServer.StreamRequestHandler):
+    def handle(self):
+        fields = self.rfile.readline().split()
+        daemon = self.server.snapshot_daemon
+        if not fields or fields[0] not in _COMMANDS:
+            self.wfile.write('%s unknown query; expected one of %s\n' % (_ERROR, ', '.join(_COMMANDS)))
+            return
+        command = fields[0]
+        if command == 'stop':
+            self.wfile.write(_OK + '\n')
+            self.server.stopped.set()
+            threading.Thread(target=self.server.shutdown).start()
+            return
+        with daemon.lock:
+            daemon.refresh()
+            try:
+                # The answer is built before the status line so that a failed query gets only an error.
+                answer = StringIO.StringIO()
+                daemon.write_answer(command, fields[1:], answer)
+            except Exception as error:
+                self.wfile.write('%s %s\n' % (_ERROR, error))
+                return
+        self.wfile.write(_OK + '\n')
+        self.wfile.write(answer.getvalue())
+
+
+class _QueryServer(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+    daemon_threads = True
+
+
+def _remove_stale_socket(socket_file):
+    if not os.path.exists(socket_file):
+        return
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_file)
+    except socket.error:
+        os.remove(socket_file)
+        return
+    finally:
+        client.close()
+    raise Exception('A daemon is already serving %s.' % socket_file)
+
+
+def serve(source_dir, options):
+    """Collects |source_dir| and answers queries on options.socket until a stop query."""
+    cache = collect_idls_into_json.create_cache(options)
+    finder = interface_node_path.create_finder(options)
+    # The watcher must see the same files as the collector, or changes of some files would be missed.
+    watcher = create_watcher(source_dir, finder, options.poll)
+    start = time.time()
+    daemon = SnapshotDaemon(source_dir, watcher, finder, cache, options.jobs)
+    if options.baseline:
+        daemon.set_baseline(run_idl_diff.build_snapshot(options.baseline, options.jobs, cache, finder))
+    _remove_stale_socket(options.socket)
+    server = _QueryServer(options.socket, _QueryHandler)
+    server.snapshot_daemon = daemon
+    server.stopped = threading.Event()
+    watch_thread = threading.Thread(target=daemon.watch, args=(options.interval, server.stopped))
+    watch_thread.daemon = True
+    watch_thread.start()
+    sys.stderr.write('Serving %d interfaces of %d files on %s in %.1f s, watching by %s\n' % (
+        len(daemon.interfaces), len(daemon.provenance['Paths']), options.socket, time.time() - start, watcher.name))
+    try:
+        server.serve_forever()
+    finally:
+        server.stopped.set()
+        server.server_close()
+        os.remove(options.socket)
+
+
+def query(socket_file, command, names=(), out=sys.stdout):
+    """Sends a query to the daemon on |socket_file| and writes its answer to |out|.
+    Returns:
+      True if the daemon answered, False if it reported an error, which is written to stderr
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_file)
+        client.sendall(' '.join([command] + list(names)) + '\n')
+        reader = client.makefile('r')
+        status = reader.readline()
+        if not status.startswith(_OK):
+            sys.stderr.write(status[len(_ERROR) + 1:] if status.startswith(_ERROR) else 'No answer from the daemon.\n')
+            return False
+        while True:
+            chunk = reader.read(1 << 16)
+            if not chunk:
+                return True
+            out.write(chunk)
+    finally:
+        client.close()
+
+
+def usage():
+    sys.stdout.write('Usage: snapshot_daemon.py [options] serve <source_dir>\n'
+                     '       snapshot_daemon.py [--socket FILE] query snapshot|diff|status|rebase|stop [<interface_name> ...]\n')
+
+
+def parse_options(args):
+    option_parser = optparse.OptionParser(usage='%prog [options] serve <source_dir> | query <command> [<interface_name> ...]')
+    collect_idls_into_json.add_collector_options(option_parser)
+    interface_node_path.add_discovery_options(option_parser)
+    option_parser.add_option('--socket', default=DEFAULT_SOCKET, help='Unix socket of the daemon')
+    option_parser.add_option('--baseline', metavar='SOURCE',
+                             help='snapshot file or source tree which diff queries compare against; '
+                                  'defaults to the snapshot at startup')
+    option_parser.add_option('--interval', type='float', default=_DEFAULT_INTERVAL,
+                             help='seconds between checks for changed IDL files')
+    option_parser.add_option('--poll', action='store_true', default=False,
+                             help='compare file stats even if pyinotify is installed')
+    options, args = option_parser.parse_args(args)
+    if not args or options.jobs < 1 or options.interval <= 0:
+        usage()
+        exit(1)
+    if not ((args[0] == 'serve' and len(args) == 2) or
+            (args[0] == 'query' and len(args) >= 2 and args[1] in _COMMANDS)):
+        usage()
+        exit(1)
+    return options, args
+
+
+def main(args):
+    options, args = parse_options(args)
+    if args[0] == 'serve':
+        collect_idls_into_json.apply_collector_options(options)
+        serve(args[1], options)
+    elif not query(options.socket, args[1], args[2:]):
+        exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Usage: snapshot_store.py [--store DIR] add revision snapshot_file
+       snapshot_store.py [--store DIR] list
+       snapshot_store.py [--store DIR] diff old_revision new_revision [diff_file]
+       snapshot_store.py [--store DIR] export revision snapshot_file
+
+Content-addressed store of interface snapshots of many revisions.
+
+Each distinct interface dict is written once under objects/, keyed by the
+SHA-1 of its canonical JSON form. A revision is a manifest under revisions/
+mapping interface name to that key, so an interface which does not change
+between revisions is stored and loaded only once. Diffing two revisions loads
+only the interfaces whose keys differ.
+"""
+
+import hashlib
+import json
+import optparse
+import os
+import sys
+
+import binary_snapshot
+import idl_diff
+import snapshot_writer
+
+DEFAULT_STORE_DIR = 'idl_snapshot_store'
+_OBJECTS_DIR = 'objects'
+_REVISIONS_DIR = 'revisions'
+_MANIFEST_SUFFIX = '.json'
+_REVISION = 'Revision'
+_ORDER = 'Order'
+_INTERFACES = 'Interfaces'
+
+
+def encode_interface(interface):
+    """Returns the canonical JSON form of an interface dict."""
+    return json.dumps(interface, sort_keys=True, separators=(',', ':'))
+
+
+class SnapshotStore(object):
+    """A directory of interface blobs and revision manifests.
+    Interfaces loaded through one store are shared between revisions, so they must not be modified.
+    """
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR):
+        self.store_dir = store_dir
+        self._interfaces = {}
+
+    def _get_object_path(self, key):
+        return os.path.join(self.store_dir, _OBJECTS_DIR, key[:2], key + '.json')
+
+    def _get_manifest_path(self, revision):
+        if not revision or os.sep in revision or revision.startswith('.'):
+            raise Exception('Invalid revision name: %s' % revision)
+        return os.path.join(self.store_dir, _REVISIONS_DIR, revision + _MANIFEST_SUFFIX)
+
+    def put_interface(self, interface):
+        """Stores an interface dict unless it is already stored.
+        Args:
+          interface: dict of interface information
+        Returns:
+          A tuple of (key of the interface, True if it was not stored yet)
+        """
+        encoded = encode_interface(interface)
+        key = hashlib.sha1(encoded).hexdigest()
+        object_path = self._get_object_path(key)
+        if os.path.exists(object_path):
+            return key, False
+        snapshot_writer.write_file_atomically(object_path, encoded)
+        return key, True
+
+    def get_interface(self, key):
+        """Returns the interface dict stored under |key|."""
+        interface = self._interfaces.get(key)
+        if interface is None:
+            with open(self._get_object_path(key), 'r') as f:
+                interface = self._interfaces[key] = json.load(f)
+        return interface
+
+    def add_snapshot(self, revision, interfaces):
+        """Stores a snapshot as |revision|, replacing a previous snapshot of the same name.
+        Args:
+          revision: revision name, e.g. a commit hash
+          interfaces: dict-like of interface information keyed by interface name
+        Returns:
+          number of interfaces which were not stored yet
+        """
+        manifest_path = self._get_manifest_path(revision)
+        keys = {}
+        new_objects = 0
+        for name in interfaces:
+            keys[name], stored = self.put_interface(interfaces[name])
+            new_objects += stored
+        if os.path.exists(manifest_path):
+            order = self.load_manifest(revision)[_ORDER]
+        else:
+            order = len(self.list_revisions())
+        snapshot_writer.write_file_atomically(
+            manifest_path, json.dumps({_REVISION: revision, _ORDER: order, _INTERFACES: keys}, sort_keys=True))
+        return new_objects
+
+    def load_manifest(self, revision):
+        """Returns the manifest of |revision|, a dict with the interface keys under 'Interfaces'."""
+        manifest_path = self._get_manifest_path(revision)
+        if not os.path.exists(manifest_path):
+            raise Exception('Revision %s is not in the store %s.' % (revision, self.store_dir))
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+
+    def list_revisions(self):
+        """Returns the names of stored revisions in the order they were added."""
+        revisions_dir = os.path.join(self.store_dir, _REVISIONS_DIR)
+        if not os.path.isdir(revisions_dir):
+            return []
+        manifests = []
+        for file_name in os.listdir(revisions_dir):
+            if file_name.endswith(_MANIFEST_SUFFIX):
+                manifest = self.load_manifest(file_name[:-len(_MANIFEST_SUFFIX)])
+                manifests.append((manifest[_ORDER], manifest[_REVISION]))
+        return [revision for _, revision in sorted(manifests)]
+
+    def load_revision(self, revision):
+        """Returns the snapshot of |revision| as a dict of interface information keyed by interface name."""
+        keys = self.load_manifest(revision)[_INTERFACES]
+        return dict((name, self.get_interface(key)) for name, key in keys.iteritems())
+
+    def diff_revisions(self, old_revision, new_revision):
+        """Returns the diff of two revisions, loading only interfaces whose keys differ.
+        Args:
+          old_revision: revision name
+          new_revision: revision name
+        Returns:
+          output of idl_diff.interfaces_diff
+        """
+        old_keys = self.load_manifest(old_revision)[_INTERFACES]
+        new_keys = self.load_manifest(new_revision)[_INTERFACES]
+        old_interfaces = {}
+        new_interfaces = {}
+        for name in set(old_keys) | set(new_keys):
+            old_key = old_keys.get(name)
+            new_key = new_keys.get(name)
+            if old_key == new_key:
+                continue
+            if old_key is not None:
+                old_interfaces[name] = self.get_interface(old_key)
+            if new_key is not None:
+                new_interfaces[name] = self.get_interface(new_key)
+        return idl_diff.interfaces_diff(old_interfaces, new_interfaces)
+
+
+def usage():
+    sys.stdout.write('Usage: snapshot_store.py [--store DIR] add <revision> <snapshot_file> | list | '
+                     'diff <old_revision> <new_revision> [<diff_file>] | export <revision> <snapshot_file>\n')
+
+
+def parse_options(args):
+    option_parser = optparse.OptionParser(usage='%prog [--store DIR] add|list|diff|export [arguments]')
+    option_parser.add_option('--store', default=DEFAULT_STORE_DIR, help='directory of the snapshot store')
+    options, args = option_parser.parse_args(args)
+    command_args = {'add': (2,), 'list': (0,), 'diff': (2, 3), 'export': (2,)}
+    if not args or args[0] not in command_args or len(args) - 1 not in command_args[args[0]]:
+        usage()
+        exit(1)
+    return options, args
+
+
+def main(args):
+    options, args = parse_options(args)
+    store = SnapshotStore(options.store)
+    command = args[0]
+    if command == 'add':
+        new_objects = store.add_snapshot(args[1], binary_snapshot.load_snapshot(args[2]))
+        sys.stdout.write('%s: %d new interfaces stored\n' % (args[1], new_objects))
+    elif command == 'list':
+        for revision in store.list_revisions():
+            sys.stdout.write('%s %d\n' % (revision, len(store.load_manifest(revision)[_INTERFACES])))
+    elif command == 'diff':
+        diff = store.diff_revisions(args[1], args[2])
+        if len(args) == 4:
+            snapshot_writer.export_to_jsonfile(diff, args[3])
+        else:
+            snapshot_writer.write_interfaces(((name, diff[name]) for name in sorted(diff)), sys.stdout)
+            sys.stdout.write('\n')
+    else:
+        snapshot_writer.export_to_jsonfile(store.load_revision(args[1]), args[2])
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
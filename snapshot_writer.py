@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# Copyright 2015 The Chromium Authors. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Streaming writer of interface snapshots.
+
+Interfaces are encoded and written one at a time in sorted-name order, so the
+serialized snapshot is never held in memory as a whole. The output is
+byte-identical to json.dump(dictionary, f, sort_keys=True[, indent=indent]).
+The writer can also record the byte range of each interface, which
+lazy_snapshot.py uses to decode single interfaces.
+
+write_file_atomically is shared by every module which replaces files that
+other processes may be reading.
+"""
+
+import json
+import os
+import tempfile
+
+
+def _get_umask():
+    # The umask can only be read by setting it.
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Mode which open() gives new files; tempfile.mkstemp creates files which only their owner can read.
+_FILE_MODE = 0666 & ~_get_umask()
+
+
+def _iter_encode_chunks(items, indent):
+    # Yields (chunk, JSON key) for interface values and (chunk, None) for the rest.
+    encoder = json.JSONEncoder(sort_keys=True, indent=indent)
+    if indent is None:
+        separator = encoder.item_separator
+        closing = '}'
+    else:
+        newline_indent = '\n' + ' ' * indent
+        separator = encoder.item_separator + newline_indent
+        closing = '\n}'
+    first = True
+    for name, interface in items:
+        encoded = encoder.encode(interface)
+        if indent is not None:
+            # Nested lines are indented one more level than in a standalone document.
+            encoded = encoded.replace('\n', newline_indent)
+        if first:
+            yield '{' + ('' if indent is None else newline_indent), None
+            first = False
+        else:
+            yield separator, None
+        if not isinstance(name, basestring):
+            # json.dump turns keys such as None into strings such as "null".
+            name = encoder.encode(name)
+        yield encoder.encode(name) + encoder.key_separator, None
+        yield encoded, name
+    yield ('{}' if first else closing), None
+
+
+def write_file_atomically(path, data):
+    """Writes |data| to a temporary file and renames it to |path|, so readers never see a partial file.
+    The directory of |path| is created if needed, and the file gets the same permissions as with open().
+    Args:
+      path: file path
+      data: str
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError:
+            # Another process may have created it.
+            if not os.path.isdir(directory):
+                raise
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(data)
+        os.chmod(temp_path, _FILE_MODE)
+        os.rename(temp_path, path)
+    except:
+        os.remove(temp_path)
+        raise
+
+
+def iter_encode_interfaces(items, indent=None):
+    """Returns a generator of JSON chunks of a snapshot.
+    Args:
+      items: an iterable of (interface name, interface dict) sorted by name
+      indent: indent width of the pretty form, or None for the compact form
+    Returns:
+      a generator which yields str
+    """
+    for chunk, _ in _iter_encode_chunks(items, indent):
+        yield chunk
+
+
+def write_interfaces(items, f, indent=None, offsets=None):
+    """Writes a snapshot to a file object.
+    Args:
+      items: an iterable of (interface name, interface dict) sorted by name
+      f: file object
+      indent: indent width of the pretty form, or None for the compact form
+      offsets: dict which is filled with (start, end) byte offsets of each interface keyed by name, or None
+    """
+    position = 0
+    for chunk, name in _iter_encode_chunks(items, indent):
+        if name is not None and offsets is not None:
+            offsets[name] = (position, position + len(chunk))
+        f.write(chunk)
+        position += len(chunk)
+
+
+def export_to_jsonfile(dictionary, json_file, indent=None, offsets=None):
+    """Writes a dict keyed by interface name into a JSON file, one interface at a time.
+    Args:
+      dictionary: dict of interface information
+      json_file: json file for output
+      indent: indent width of the pretty form, or None for the compact form
+      offsets: dict which is filled with (start, end) byte offsets of each interface keyed by name, or None
+    """
+    with open(json_file, 'w') as f:
+        write_interfaces(((name, dictionary[name]) for name in sorted(dictionary)), f, indent, offsets)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+import unittest
+import binary_snapshot
+
+_SNAPSHOT = {
+    u'Node': {u'Name': u'Node', u'Consts': [{u'Name': u'ELEMENT_NODE', u'Type': u'unsigned short', u'Value': u'1'}],
+              u'Attributes': [{u'Name': u'parentNode', u'Type': u'Node', u'Readonly': True, u'Static': False}],
+              u'Inherit': {u'Parent': u'EventTarget'}},
+    u'EventTarget': {u'Name': u'EventTarget', u'Attributes': [{u'Name': u'union', u'Type': [u'Node', u'DOMString']}],
+                     u'Inherit': {u'Parent': None}},
+}
+
+
+class TestBinarySnapshot(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.binary_file = os.path.join(self.temp_dir, 'snapshot.bin')
+        binary_snapshot.write_binary_snapshot(_SNAPSHOT, self.binary_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_round_trip(self):
+        with binary_snapshot.BinarySnapshot(self.binary_file) as snapshot:
+            self.assertEqual(len(snapshot), 2)
+            self.assertEqual(list(snapshot), [u'EventTarget', u'Node'])
+            self.assertEqual(snapshot[u'Node'], _SNAPSHOT[u'Node'])
+            self.assertEqual(dict(snapshot.items()), _SNAPSHOT)
+
+    def test_missing_interface(self):
+        with binary_snapshot.BinarySnapshot(self.binary_file) as snapshot:
+            self.assertFalse(u'Element' in snapshot)
+            self.assertRaises(KeyError, lambda: snapshot[u'Element'])
+
+    def test_is_binary_snapshot(self):
+        self.assertTrue(binary_snapshot.is_binary_snapshot(self.binary_file))
+        json_file = os.path.join(self.temp_dir, 'snapshot.json')
+        binary_snapshot.main(['to-json', self.binary_file, json_file])
+        self.assertFalse(binary_snapshot.is_binary_snapshot(json_file))
+        self.assertEqual(binary_snapshot.load_snapshot(json_file), _SNAPSHOT)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,16 @@
 #!/usr/bin/env python
 
+import gc
+import os
+import shutil
+import StringIO
+import sys
+import tempfile
 import unittest
 import collect_idls_into_json
+import collector_profile
+import idl_records
+import parse_cache
 import utilities
 
 from blink_idl_parser import parse_file, BlinkIDLParser
@@ -23,6 +32,13 @@ class TestFunctions(unittest.TestCase):
         for actual in collect_idls_into_json.get_definitions(pathfile):
             self.assertEqual(actual.GetName(), self.definition.GetName())
 
+    def test_sort_definitions(self):
+        pathfile = utilities.read_file_to_list(_FILE)
+        interfaces_dict, partials_dict, implement_list = collect_idls_into_json.sort_definitions(collect_idls_into_json.get_definitions(pathfile))
+        self.assertEqual(interfaces_dict.keys(), [self.definition.GetName()])
+        self.assertEqual(partials_dict, {})
+        self.assertEqual(implement_list, [])
+
     def test_is_non_partial(self):
         if self.definition.GetClass() == 'Interface' and not self.definition.GetProperty('Partial'):
             self.assertTrue(collect_idls_into_json.is_non_partial(self.definition))
@@ -108,5 +124,145 @@ class TestFunctions(unittest.TestCase):
         self.assertEqual(collect_idls_into_json.merge_partial_dicts({key_name: collect_idls_into_json.interface_node_to_dict(self.definition)}, _PARTIAL)[key_name]['Partial_FilePaths'], ['Source/core/timing/WorkerGlobalScopePerformance.idl'])
 
 
+class TestLowMemory(unittest.TestCase):
+    _TEXT = 'interface Node : EventTarget { readonly attribute Node parentNode; Node appendChild(Node node); };\n'
+
+    def tearDown(self):
+        collect_idls_into_json.set_low_memory(False)
+
+    def test_release_tree(self):
+        tree = collect_idls_into_json.get_parser().ParseText('Node.idl', self._TEXT)
+        definition = tree.GetChildren()[0]
+        members = definition.GetChildren()
+        collect_idls_into_json.release_tree(tree)
+        self.assertEqual(tree.GetChildren(), [])
+        self.assertEqual(definition.GetChildren(), [])
+        self.assertEqual(definition.GetName(), 'Node')
+        for member in members:
+            self.assertIsNone(member._parent)
+
+    def test_sort_file_definitions(self):
+        parser = collect_idls_into_json.get_parser()
+        expected = collect_idls_into_json.sort_file_definitions(parser, 'Node.idl', self._TEXT)
+        collect_idls_into_json.set_low_memory(True)
+        self.assertEqual(collect_idls_into_json.sort_file_definitions(parser, 'Node.idl', self._TEXT), expected)
+        self.assertEqual(sorted(expected[0]), ['Node'])
+
+
+class TestTypeKeys(unittest.TestCase):
+    def test_render_type_key(self):
+        def type_key(*components):
+            return ('Type', None, components)
+        node = ('Typeref', 'Node', ())
+        string = ('StringType', 'DOMString', ())
+        array = ('Array', None, ())
+        self.assertEqual(collect_idls_into_json.render_type_key(type_key(node, array)), 'Node[]')
+        self.assertEqual(collect_idls_into_json.render_type_key(type_key(('UnionType', None, (type_key(node), type_key(string))))),
+                         ['Node', 'DOMString'])
+        self.assertEqual(collect_idls_into_json.render_type_key(type_key(('Sequence', None, (type_key(('Sequence', None, (type_key(string),))),)))),
+                         '<<DOMString>>')
+        self.assertEqual(collect_idls_into_json.render_type_key(type_key(('Sequence', None, (type_key(('UnionType', None, (type_key(node), type_key(string)))),)))),
+                         "<['Node', 'DOMString']>")
+        self.assertEqual(collect_idls_into_json.render_type_key(type_key(('Sequence', None, (type_key(('Any', None, ())),)))),
+                         '<Any>')
+
+
+class TestInterning(unittest.TestCase):
+    def test_intern_string(self):
+        name = collect_idls_into_json.intern_string(''.join(['Dom', 'String']))
+        self.assertTrue(collect_idls_into_json.intern_string(u'DomString') is name)
+        self.assertTrue(collect_idls_into_json.intern_string('DomString') is name)
+        self.assertEqual(collect_idls_into_json.intern_string(u'\u00e9'), u'\u00e9')
+        self.assertEqual(collect_idls_into_json.intern_string(None), None)
+        self.assertEqual(collect_idls_into_json.intern_string(1), 1)
+
+    def test_extattr_record(self):
+        record = collect_idls_into_json.get_extattr_record('TestOnlyExtAttribute')
+        self.assertTrue(collect_idls_into_json.get_extattr_record(u'TestOnlyExtAttribute') is record)
+        self.assertRaises(TypeError, record.__setitem__, 'diff_tag', 'added')
+        del record
+        gc.collect()
+        self.assertFalse('TestOnlyExtAttribute' in collect_idls_into_json._extattr_records)
+
+
+class TestInterfaceRecords(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.paths = []
+        for name, text in [
+                ('Node.idl', 'interface Node : EventTarget { const unsigned short ELEMENT_NODE = 1; '
+                             '[SameObject] readonly attribute Node parentNode; '
+                             '[RaisesException] Node appendChild(Node node); };\n'),
+                ('NodePartial.idl', 'partial interface Node { attribute (Node or DOMString) baseURI; };\n'),
+                ('ParentNode.idl', 'interface ParentNode { readonly attribute Element firstElementChild; };\n'
+                                   'Node implements ParentNode;\n')]:
+            path = os.path.join(self.temp_dir, name)
+            with open(path, 'w') as f:
+                f.write(text)
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_collect_interface_records(self):
+        expected = collect_idls_into_json.collect_interfaces(self.paths)
+        for jobs in [1, 2]:
+            records = collect_idls_into_json.collect_interface_records(self.paths, jobs)
+            self.assertEqual(idl_records.interfaces_to_dicts(records), expected)
+            self.assertTrue(isinstance(records['Node'], idl_records.Interface))
+            # Members of an implemented interface are shared, not copied.
+            self.assertTrue(records['Node'].attributes[-1] is records['ParentNode'].attributes[0])
+
+
+class TestCachedFileDefinitions(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.paths = []
+        for name, text in [('Node.idl', 'interface Node { attribute long nodeType; };\n'),
+                           ('NodePartial.idl', 'partial interface Node { attribute DOMString baseURI; };\n'),
+                           ('ParentNode.idl', 'interface ParentNode {};\nNode implements ParentNode;\n')]:
+            path = os.path.join(self.temp_dir, name)
+            with open(path, 'w') as f:
+                f.write(text)
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_get_cached_file_definitions(self):
+        # Definitions read from the cache are lists instead of tuples.
+        expected = [list(file_definitions) for file_definitions in collect_idls_into_json.get_file_definitions(self.paths)]
+        for jobs in [1, 2]:
+            cache = parse_cache.ParseCache(os.path.join(self.temp_dir, 'cache%d' % jobs), 'version')
+            profile = collector_profile.start()
+            try:
+                parsed = collect_idls_into_json.get_cached_file_definitions(self.paths, cache, jobs)
+            finally:
+                collector_profile.stop()
+            # Missed files are parsed from the contents read for their cache keys, not read again.
+            self.assertEqual(profile.stages['parse']['calls'], len(self.paths))
+            self.assertFalse('read' in profile.stages)
+            self.assertEqual(map(list, parsed), expected)
+            cached = collect_idls_into_json.get_cached_file_definitions(self.paths, cache, jobs)
+            self.assertEqual(map(list, cached), expected)
+
+
+class TestParseOptions(unittest.TestCase):
+    def setUp(self):
+        # usage() writes to stdout.
+        self.stdout = sys.stdout
+        sys.stdout = StringIO.StringIO()
+
+    def tearDown(self):
+        sys.stdout = self.stdout
+
+    def test_shard_buckets(self):
+        options, _ = collect_idls_into_json.parse_options(['--shards', 'shards', '--shard-buckets', '4', 'a.txt', 'b.json'])
+        self.assertEqual((options.shards, options.shard_buckets), ('shards', 4))
+        self.assertRaises(SystemExit, collect_idls_into_json.parse_options, ['--shard-buckets', '4', 'a.txt', 'b.json'])
+        self.assertRaises(SystemExit, collect_idls_into_json.parse_options,
+                          ['--shards', 'shards', '--shard-buckets', '0', 'a.txt', 'b.json'])
+
+
 if __name__ == '__main__':
     unittest.main()
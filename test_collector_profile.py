@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import collector_profile
+
+
+class TestCollectorProfile(unittest.TestCase):
+    def tearDown(self):
+        collector_profile.stop()
+
+    def test_stage_without_profile(self):
+        with collector_profile.stage('parse') as timer:
+            pass
+        self.assertEqual(timer.wall_seconds, 0.0)
+        collector_profile.add_file('A.idl', 1.0)
+        self.assertIsNone(collector_profile.active_profile)
+
+    def test_stages_and_files(self):
+        profile = collector_profile.start()
+        for _ in range(2):
+            with collector_profile.stage('parse'):
+                pass
+        with collector_profile.stage('export'):
+            pass
+        for path, seconds in [('A.idl', 0.5), ('B.idl', 2.0), ('C.idl', 1.0)]:
+            collector_profile.add_file(path, seconds)
+        report = profile.get_report(top_files=2)
+        self.assertEqual([stage['name'] for stage in report['stages']], ['parse', 'export'])
+        self.assertEqual(report['stages'][0]['calls'], 2)
+        self.assertEqual(report['files_parsed'], 3)
+        self.assertEqual([item['path'] for item in report['slowest_files']], ['B.idl', 'C.idl'])
+
+    def test_peak_rss_growth(self):
+        peak_rss_kb = collector_profile.get_peak_rss_kb()
+        if peak_rss_kb is None:
+            return
+        profile = collector_profile.start()
+        with collector_profile.stage('grow'):
+            # Added to what is already resident, this exceeds the peak so far.
+            data = ' ' * (peak_rss_kb * 1024)
+        del data
+        with collector_profile.stage('small'):
+            data = ' ' * 1024
+        self.assertTrue(profile.stages['grow']['peak_rss_growth_kb'] > 0)
+        self.assertEqual(profile.stages['small']['peak_rss_growth_kb'], 0)
+
+    def test_merge(self):
+        worker_profile = collector_profile.Profile()
+        worker_profile.add_stage('parse', 1.0, 0.5, 100)
+        worker_profile.add_file('A.idl', 1.0)
+        profile = collector_profile.Profile()
+        profile.add_stage('parse', 2.0, 1.0, 50)
+        profile.merge(worker_profile.get_records())
+        self.assertEqual(profile.stages['parse'],
+                         {'wall_seconds': 3.0, 'cpu_seconds': 1.5, 'calls': 2, 'peak_rss_growth_kb': 150})
+        self.assertEqual(profile.file_seconds, [(1.0, 'A.idl')])
+
+    def test_write_report(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            profile = collector_profile.Profile()
+            profile.add_file('A.idl', 1.0)
+            report_file = os.path.join(temp_dir, 'profile.json')
+            profile.write_report(report_file)
+            with open(report_file, 'r') as f:
+                self.assertEqual(json.load(f)['slowest_files'], [{'path': 'A.idl', 'parse_seconds': 1.0}])
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
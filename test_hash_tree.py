@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import hash_tree
+import idl_records
+
+from interface_fixtures import make_interface
+
+
+class TestHashTree(unittest.TestCase):
+    def test_interface_hash(self):
+        self.assertEqual(hash_tree.get_interface_hash(make_interface('Node', ['a', 'b'])).digest,
+                         hash_tree.get_interface_hash(make_interface('Node', ['a', 'b'])).digest)
+        self.assertNotEqual(hash_tree.get_interface_hash(make_interface('Node', ['a', 'b'])).digest,
+                            hash_tree.get_interface_hash(make_interface('Node', ['b', 'a'])).digest)
+        node_hash = hash_tree.get_interface_hash(make_interface('Node', ['a']))
+        other_hash = hash_tree.get_interface_hash(make_interface('Node', ['a', 'b']))
+        self.assertNotEqual(node_hash.digest, other_hash.digest)
+        self.assertEqual(node_hash.list_digests['Consts'], other_hash.list_digests['Consts'])
+        self.assertEqual(node_hash.member_digests['Attributes'][0], other_hash.member_digests['Attributes'][0])
+
+    def test_fields(self):
+        interface = dict(make_interface('Node', ['a']), FilePath='Node.idl', Inherit={'Parent': 'EventTarget'})
+        root = hash_tree.get_hash_tree({'Node': interface}).root
+        for key, value in [('Inherit', {'Parent': 'Element'}), ('FilePath', 'dom/Node.idl'),
+                           ('Partial_FilePaths', ['NodePartial.idl'])]:
+            changed = dict(interface, **{key: value})
+            self.assertNotEqual(hash_tree.get_hash_tree({'Node': changed}).root, root)
+
+    def test_changed_interfaces(self):
+        old = hash_tree.get_hash_tree({'A': make_interface('A', ['a']), 'B': make_interface('B', []),
+                                       'C': make_interface('C', [])})
+        new = hash_tree.get_hash_tree({'A': make_interface('A', ['a', 'b']), 'B': make_interface('B', []),
+                                       'D': make_interface('D', [])})
+        self.assertEqual(hash_tree.get_changed_interfaces(old, new), set(['A', 'C', 'D']))
+        self.assertEqual(hash_tree.get_changed_interfaces(old, old), set())
+
+    def test_reuse(self):
+        interfaces = {'A': make_interface('A', ['a']), 'B': make_interface('B', [])}
+        tree = hash_tree.get_hash_tree(interfaces)
+        interfaces['A']['Attributes'] = []
+        self.assertEqual(hash_tree.get_hash_tree(interfaces, tree, set(['A'])), hash_tree.get_hash_tree(interfaces))
+
+    def test_records(self):
+        interface = dict(make_interface('A', ['a']), FilePath='A.idl', Inherit={'Parent': None})
+        interface['Attributes'][0].update(ExtAttributes=[{'Name': 'Reflect'}], Readonly=False, Static=False)
+        self.assertEqual(hash_tree.get_hash_tree({'A': idl_records.Interface.from_dict(interface)}),
+                         hash_tree.get_hash_tree({'A': interface}))
+
+    def test_write_and_load(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            snapshot_file = os.path.join(temp_dir, 'snapshot.json')
+            interfaces = {'A': make_interface('A', ['a'])}
+            with open(snapshot_file, 'w') as f:
+                json.dump(interfaces, f)
+            self.assertEqual(hash_tree.load_hash_tree(snapshot_file), None)
+            tree = hash_tree.get_hash_tree(interfaces)
+            hash_tree.write_hash_tree(tree, snapshot_file)
+            self.assertEqual(hash_tree.load_hash_tree(snapshot_file), tree)
+            with open(snapshot_file, 'w') as f:
+                json.dump({}, f)
+            self.assertEqual(hash_tree.load_hash_tree(snapshot_file), None)
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+import os
+import re
+import shutil
+import tempfile
+import unittest
+import idl_corpus
+
+
+class TestIdlCorpus(unittest.TestCase):
+    def test_deterministic(self):
+        self.assertEqual(idl_corpus.generate_corpus_files(1, seed=3), idl_corpus.generate_corpus_files(1, seed=3))
+        self.assertNotEqual(idl_corpus.generate_corpus_files(1, seed=3), idl_corpus.generate_corpus_files(1, seed=4))
+
+    def test_scale(self):
+        files = idl_corpus.generate_corpus_files(2)
+        self.assertEqual(len(files), 2 * len(idl_corpus.generate_corpus_files(1)))
+        self.assertEqual(len(set(path for path, _ in files)), len(files))
+        self.assertRaises(Exception, idl_corpus.generate_corpus_files, 0)
+
+    def test_references(self):
+        text = ''.join(text for _, text in idl_corpus.generate_corpus_files(1))
+        defined = set(re.findall(r'(?<!partial )interface (\w+)', text))
+        partials = set(re.findall(r'partial interface (\w+)', text))
+        implements = re.findall(r'^(\w+) implements (\w+);', text, re.M)
+        self.assertEqual(len(defined), idl_corpus.INTERFACE_FILES + idl_corpus.IMPLEMENTS_FILES)
+        self.assertTrue(partials and partials <= defined)
+        self.assertEqual(len(implements), idl_corpus.IMPLEMENTS_FILES)
+        for name, reference in implements:
+            self.assertIn(name, defined)
+            self.assertIn(reference, defined)
+
+    def test_generate_corpus(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            paths = idl_corpus.generate_corpus(temp_dir)
+            self.assertTrue(all(os.path.isfile(path) for path in paths))
+            self.assertTrue(all(path.startswith(os.path.join(temp_dir, 'Source')) for path in paths))
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
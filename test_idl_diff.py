@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+import copy
+import unittest
+import hash_tree
+import idl_diff
+import idl_records
+
+from interface_fixtures import make_interface
+
+
+class TestIdlDiff(unittest.TestCase):
+    def test_interfaces_diff(self):
+        old = {'Node': make_interface('Node', ['a', 'b']), 'Old': make_interface('Old', []),
+               'Same': make_interface('Same', ['x'])}
+        new = {'Node': make_interface('Node', ['b', 'c'], ['Exposed']), 'New': make_interface('New', ['n']),
+               'Same': make_interface('Same', ['x'])}
+        old_copy = copy.deepcopy(old)
+        diff = idl_diff.interfaces_diff(old, new)
+        self.assertEqual(sorted(diff), ['New', 'Node', 'Old'])
+        self.assertEqual([(a['Name'], a.get('diff_tag')) for a in diff['Node']['Attributes']],
+                         [('c', 'added'), ('b', None), ('a', 'deleted')])
+        self.assertEqual(diff['Node']['ExtAttributes'], [{'Name': 'Exposed', 'diff_tag': 'added'}])
+        self.assertEqual(diff['New']['diff_tag'], 'added')
+        self.assertEqual(diff['New']['Attributes'][0]['diff_tag'], 'added')
+        self.assertEqual(diff['Old']['diff_tag'], 'deleted')
+        self.assertEqual(old, old_copy)
+
+    def test_precomputed_hashes(self):
+        old = {'Node': make_interface('Node', ['a'])}
+        new = {'Node': make_interface('Node', ['a'])}
+        tree = hash_tree.get_hash_tree(old)
+        self.assertEqual(idl_diff.interfaces_diff(old, new, tree, tree), {})
+        new['Node']['Attributes'].pop()
+        diff = idl_diff.interfaces_diff(old, new, tree, hash_tree.get_hash_tree(new))
+        self.assertEqual(diff['Node']['Attributes'][0]['diff_tag'], 'deleted')
+
+    def test_records(self):
+        old = {'Node': make_interface('Node', ['a', 'b']), 'Old': make_interface('Old', [])}
+        new = {'Node': make_interface('Node', ['b', 'c'], ['Exposed']), 'New': make_interface('New', ['n'])}
+        self.assertEqual(idl_diff.interfaces_diff(idl_records.interfaces_from_dicts(old),
+                                                  idl_records.interfaces_from_dicts(new)),
+                         idl_diff.interfaces_diff(old, new))
+
+    def test_inherit(self):
+        old = {'Node': make_interface('Node', ['a'])}
+        new = {'Node': make_interface('Node', ['a'])}
+        new['Node']['Inherit'] = {'Parent': 'EventTarget'}
+        for trees in [(None, None), (hash_tree.get_hash_tree(old), hash_tree.get_hash_tree(new))]:
+            diff = idl_diff.interfaces_diff(old, new, *trees)
+            self.assertEqual(diff['Node']['Inherit'],
+                             {'Parent': 'EventTarget', 'OldParent': None, 'diff_tag': 'changed'})
+            self.assertEqual(diff['Node']['Attributes'], new['Node']['Attributes'])
+
+    def test_duplicate_members(self):
+        old = {'Node': make_interface('Node', ['a', 'a'])}
+        new = {'Node': make_interface('Node', ['a'])}
+        diff = idl_diff.interfaces_diff(old, new)
+        self.assertEqual([a.get('diff_tag') for a in diff['Node']['Attributes']], [None, 'deleted'])
+
+
+if __name__ == '__main__':
+    unittest.main()
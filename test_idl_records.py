@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+
+import unittest
+import idl_records
+
+_INTERFACE = {
+    'Name': 'Node',
+    'FilePath': 'Node.idl',
+    'Consts': [{'Name': 'ELEMENT_NODE', 'Type': 'unsigned short', 'Value': '1', 'ExtAttributes': []}],
+    'Attributes': [{'Name': 'parentNode', 'Type': 'Node', 'ExtAttributes': [{'Name': 'SameObject'}],
+                    'Readonly': True, 'Static': False}],
+    'Operations': [{'Name': 'appendChild', 'Arguments': [{'Name': 'node', 'Type': 'Node'}], 'Type': 'Node',
+                    'ExtAttributes': [{'Name': 'RaisesException'}, {'Name': 'CustomElementCallbacks'}],
+                    'Static': False}],
+    'ExtAttributes': [{'Name': 'DependentLifetime'}],
+    'Inherit': {'Parent': 'EventTarget'},
+}
+
+
+class TestIdlRecords(unittest.TestCase):
+    def test_round_trip(self):
+        record = idl_records.Interface.from_dict(_INTERFACE)
+        self.assertEqual(record.to_dict(), _INTERFACE)
+        merged = dict(_INTERFACE, Partial_FilePaths=['NodePartial.idl'])
+        self.assertEqual(idl_records.Interface.from_dict(merged).to_dict(), merged)
+
+    def test_fields(self):
+        record = idl_records.Interface.from_dict(_INTERFACE)
+        self.assertEqual(record.parent, 'EventTarget')
+        self.assertEqual(record.operations[0].arguments[0], idl_records.Argument('node', 'Node'))
+        self.assertEqual(record.operations[0].extattributes, ('RaisesException', 'CustomElementCallbacks'))
+        self.assertTrue(record.attributes[0].readonly)
+        self.assertFalse(hasattr(record, '__dict__'))
+
+    def test_equality(self):
+        self.assertEqual(idl_records.Interface.from_dict(_INTERFACE), idl_records.Interface.from_dict(_INTERFACE))
+        self.assertNotEqual(idl_records.Argument('node', 'Node'), idl_records.Argument('node', 'Element'))
+
+    def test_interfaces_dicts(self):
+        dictionary = {'Node': _INTERFACE}
+        self.assertEqual(idl_records.interfaces_to_dicts(idl_records.interfaces_from_dicts(dictionary)), dictionary)
+
+    def test_interning(self):
+        record = idl_records.Interface.from_dict(_INTERFACE)
+        other = idl_records.Interface.from_dict({'Name': u'Element', 'FilePath': u'Element.idl', 'Consts': [],
+                                                 'Attributes': [], 'ExtAttributes': [], 'Inherit': {'Parent': u'Node'},
+                                                 'Operations': []})
+        self.assertTrue(other.parent is record.name)
+        self.assertTrue(isinstance(other.name, str))
+
+    def test_extend_members(self):
+        record = idl_records.Interface.from_dict(_INTERFACE)
+        other = idl_records.Interface.from_dict(_INTERFACE)
+        record.extend_members(other)
+        self.assertEqual(len(record.attributes), 2)
+        self.assertTrue(record.attributes[1] is other.attributes[0])
+        self.assertEqual(idl_records.as_dict(record), record.to_dict())
+        self.assertTrue(idl_records.as_dict(_INTERFACE) is _INTERFACE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+import copy
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import collect_idls_into_json
+import incremental_snapshot
+
+_INTERFACE = {'Name': 'Node', 'FilePath': 'Node.idl', 'Consts': ['c1'], 'Attributes': ['a1', 'a2', 'a3'], 'Operations': ['o1', 'o2']}
+_SEGMENTS = [['Interface', 'Node.idl', {'Consts': 1, 'Attributes': 1, 'Operations': 1}],
+             ['Partial', 'NodePartial.idl', {'Consts': 0, 'Attributes': 1, 'Operations': 0}],
+             ['Implements', 'ParentNode', {'Consts': 0, 'Attributes': 1, 'Operations': 1}]]
+
+
+class TestIncrementalSnapshot(unittest.TestCase):
+    def test_read_changes(self):
+        fd, changes_file = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as f:
+            f.write('A\ta/New.idl\nM\ta/Node.idl\nD\ta/Old.idl\nR100\ta/From.idl\ta/To.idl\nM\ta/README\n')
+        try:
+            self.assertEqual(incremental_snapshot.read_changes(changes_file),
+                             (['a/New.idl', 'a/To.idl'], ['a/Node.idl'], ['a/Old.idl', 'a/From.idl']))
+        finally:
+            os.remove(changes_file)
+
+    def test_get_implementers_closure(self):
+        implement_list = [{'Name': 'Node', 'Reference': 'ParentNode'},
+                          {'Name': 'Element', 'Reference': 'Node'},
+                          {'Name': 'Window', 'Reference': 'WindowTimers'}]
+        self.assertEqual(incremental_snapshot.get_implementers_closure(set(['ParentNode']), implement_list),
+                         set(['ParentNode', 'Node', 'Element']))
+
+    def test_slice_segment(self):
+        self.assertEqual(incremental_snapshot.slice_segment(_INTERFACE, _SEGMENTS, 'Partial', 'NodePartial.idl'),
+                         {'Consts': [], 'Attributes': ['a2'], 'Operations': []})
+        self.assertEqual(incremental_snapshot.slice_segment(_INTERFACE, _SEGMENTS, 'Partial', 'Other.idl'), None)
+
+    def test_slice_before_implements(self):
+        self.assertEqual(incremental_snapshot.slice_before_implements(_INTERFACE, _SEGMENTS, 0),
+                         {'Consts': ['c1'], 'Attributes': ['a1', 'a2'], 'Operations': ['o1']})
+        self.assertEqual(incremental_snapshot.slice_before_implements(_INTERFACE, _SEGMENTS, 1),
+                         {'Consts': ['c1'], 'Attributes': ['a1', 'a2', 'a3'], 'Operations': ['o1', 'o2']})
+
+
+def write_file(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+class TestUpdateSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.files = {
+            'Node.idl': 'interface Node : EventTarget { const short ONE = 1; attribute long nodeType; };\n',
+            'NodePartial.idl': 'partial interface Node { [Custom] readonly attribute DOMString baseURI; };\n',
+            'EventTarget.idl': 'interface EventTarget { void addEventListener(DOMString type); };\n',
+            'ParentNode.idl': 'interface ParentNode { readonly attribute Element firstElementChild; };\n',
+            'NodeImplements.idl': 'Node implements ParentNode;\n',
+            'Element.idl': 'interface Element : Node { attribute DOMString id; };\nElement implements Node;\n',
+            'Old.idl': 'interface Old { void old(); };\n',
+        }
+        self.paths = []
+        for name in sorted(self.files):
+            path = os.path.join(self.temp_dir, name)
+            write_file(path, self.files[name])
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def collect(self, paths):
+        # Snapshots are updated after a round trip through JSON, as incremental_snapshot.main does.
+        interfaces, provenance = collect_idls_into_json.collect_interfaces_with_provenance(paths)
+        return json.loads(json.dumps(interfaces)), json.loads(json.dumps(provenance))
+
+    def test_same_as_full_collect(self):
+        interfaces, provenance = self.collect(self.paths)
+        original = copy.deepcopy(interfaces)
+        path = lambda name: os.path.join(self.temp_dir, name)
+        write_file(path('NodePartial.idl'), 'partial interface Node { attribute DOMString textContent; };\n')
+        write_file(path('ParentNode.idl'),
+                   'interface ParentNode { readonly attribute Element firstElementChild; '
+                   'readonly attribute long childElementCount; };\n')
+        write_file(path('ChildNode.idl'), 'interface ChildNode { void remove(); };\nElement implements ChildNode;\n')
+        os.remove(path('Old.idl'))
+        os.remove(path('NodeImplements.idl'))
+        changed_names = incremental_snapshot.update_snapshot(
+            interfaces, provenance, [path('ChildNode.idl')], [path('NodePartial.idl'), path('ParentNode.idl')],
+            [path('Old.idl'), path('NodeImplements.idl')])
+        expected_interfaces, expected_provenance = self.collect(provenance['Paths'])
+        self.assertEqual(interfaces, expected_interfaces)
+        self.assertEqual(provenance, expected_provenance)
+        self.assertEqual(set(name for name in set(original) | set(interfaces)
+                             if original.get(name) != interfaces.get(name)) - changed_names, set())
+        self.assertTrue('Old' not in interfaces)
+        self.assertEqual([attribute['Name'] for attribute in interfaces['Element']['Attributes']],
+                         ['id', 'nodeType', 'textContent'])
+        self.assertEqual([operation['Name'] for operation in interfaces['Element']['Operations']], ['remove'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+import unittest
+import interface_node_path
+
+
+def touch(path):
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    open(path, 'w').close()
+
+
+class TestInterfaceNodePath(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for path in ['Node.idl', 'README', 'InspectorInstrumentation.idl', 'core/Element.idl',
+                     'core/dom/Text.idl', 'LayoutTests/Test.idl', 'web/tests/WebTest.idl', 'web/WebNode.idl']:
+            touch(os.path.join(self.root, path))
+        self.cache_file = os.path.join(tempfile.mkdtemp(), 'dir_cache.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+        shutil.rmtree(os.path.dirname(self.cache_file))
+
+    def walk(self):
+        return [os.path.join(dir_path, file_name) for dir_path, _, file_names in os.walk(self.root)
+                for file_name in file_names if interface_node_path.is_idl_file(file_name)]
+
+    def relative(self, paths):
+        return sorted(os.path.relpath(path, self.root) for path in paths)
+
+    def test_same_as_os_walk(self):
+        self.assertEqual(list(interface_node_path.get_idl_files(self.root)), self.walk())
+
+    def test_prune(self):
+        self.assertEqual(self.relative(interface_node_path.get_idl_files(self.root, ['LayoutTests', 'web/tests'])),
+                         ['Node.idl', 'core/Element.idl', 'core/dom/Text.idl', 'web/WebNode.idl'])
+        self.assertEqual(self.relative(interface_node_path.get_idl_files(self.root, ['co*'])),
+                         ['LayoutTests/Test.idl', 'Node.idl', 'web/WebNode.idl', 'web/tests/WebTest.idl'])
+
+    def test_directory_cache(self):
+        old_time = os.path.getmtime(self.root) - 3600
+        for dir_path, _, _ in os.walk(self.root):
+            os.utime(dir_path, (old_time, old_time))
+        expected = self.walk()
+        self.assertEqual(list(interface_node_path.get_idl_files(self.root, cache_file=self.cache_file)), expected)
+        self.assertTrue(os.path.exists(self.cache_file))
+        self.assertEqual(list(interface_node_path.get_idl_files(self.root, cache_file=self.cache_file)), expected)
+        touch(os.path.join(self.root, 'core', 'New.idl'))
+        self.assertEqual(list(interface_node_path.get_idl_files(self.root, cache_file=self.cache_file)), self.walk())
+
+    def test_may_define_interfaces(self):
+        contents = {
+            'interface Node { };': True,
+            'partial interface Window { attribute long x; };': True,
+            'Window implements WindowTimers;': True,
+            'callback interface EventListener { void handleEvent(); };': True,
+            'dictionary Init { DOMString interfaceName = "interface"; };': False,
+            '// An interface would be here.\nenum Mode { "a" };\n/* implements */': False,
+            'typedef long MyLong;': False,
+        }
+        path = os.path.join(self.root, 'Test.idl')
+        for content, expected in contents.iteritems():
+            with open(path, 'w') as f:
+                f.write(content)
+            self.assertEqual(interface_node_path.may_define_interfaces(path), expected, content)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import lazy_snapshot
+import snapshot_writer
+
+_SNAPSHOT = {
+    'Node': {'Name': 'Node', 'Attributes': [{'Name': 'parentNode', 'Type': 'Node'}], 'Inherit': {'Parent': 'EventTarget'}},
+    'EventTarget': {'Name': 'EventTarget', 'Attributes': [], 'Inherit': {'Parent': None}},
+    'Text': {'Name': 'Text', 'Attributes': [{'Name': 'wholeText', 'Type': 'DOMString'}], 'Inherit': {'Parent': 'Node'}},
+}
+
+
+class TestLazySnapshot(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.snapshot_file = os.path.join(self.temp_dir, 'snapshot.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_build_offset_index(self):
+        for indent in (None, 4):
+            data = json.dumps(_SNAPSHOT, sort_keys=True, indent=indent)
+            offsets = lazy_snapshot.build_offset_index(data)
+            self.assertEqual(sorted(offsets), sorted(_SNAPSHOT))
+            for name, (start, end) in offsets.iteritems():
+                self.assertEqual(json.loads(data[start:end]), _SNAPSHOT[name])
+        self.assertEqual(lazy_snapshot.build_offset_index(' {} '), {})
+
+    def test_writer_offsets(self):
+        offsets = {}
+        snapshot_writer.export_to_jsonfile(_SNAPSHOT, self.snapshot_file, 4, offsets)
+        with open(self.snapshot_file, 'r') as f:
+            self.assertEqual(offsets, lazy_snapshot.build_offset_index(f.read()))
+
+    def test_lazy_snapshot(self):
+        with open(self.snapshot_file, 'w') as f:
+            json.dump(_SNAPSHOT, f)
+        self.assertEqual(lazy_snapshot.load_offset_index(self.snapshot_file), None)
+        with lazy_snapshot.LazySnapshot(self.snapshot_file) as snapshot:
+            self.assertEqual(snapshot['Node'], _SNAPSHOT['Node'])
+            self.assertTrue('Text' in snapshot)
+            self.assertFalse('Window' in snapshot)
+            self.assertEqual(dict(snapshot), _SNAPSHOT)
+        self.assertNotEqual(lazy_snapshot.load_offset_index(self.snapshot_file), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+import unittest
+import parse_cache
+
+_VALUE = [{'Node': {'Name': 'Node'}}, {}, [{'Name': 'Node', 'Reference': 'ParentNode'}]]
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.idl_path = os.path.join(self.temp_dir, 'Node.idl')
+        with open(self.idl_path, 'w') as f:
+            f.write('interface Node {};\n')
+        self.cache = parse_cache.ParseCache(os.path.join(self.temp_dir, 'cache'), 'version')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_get_put(self):
+        key = self.cache.get_key(self.idl_path)
+        self.assertEqual(self.cache.get(key), None)
+        self.cache.put(key, _VALUE)
+        self.assertEqual(self.cache.get(key), _VALUE)
+
+    def test_get_key(self):
+        key = self.cache.get_key(self.idl_path)
+        self.assertEqual(key, self.cache.get_key(self.idl_path))
+        other_version = parse_cache.ParseCache(self.cache.cache_dir, 'other version')
+        self.assertNotEqual(key, other_version.get_key(self.idl_path))
+        with open(self.idl_path, 'w') as f:
+            f.write('interface Node { attribute long x; };\n')
+        self.assertNotEqual(key, self.cache.get_key(self.idl_path))
+
+    def test_prune(self):
+        self.cache.put('aa1', _VALUE)
+        self.cache.put('bb2', _VALUE)
+        entry_size = os.path.getsize(os.path.join(self.cache.cache_dir, 'aa', 'aa1.json'))
+        os.utime(os.path.join(self.cache.cache_dir, 'aa', 'aa1.json'), (0, 0))
+        self.cache.max_bytes = entry_size
+        self.assertEqual(self.cache.prune(), 1)
+        self.assertEqual(self.cache.get('aa1'), None)
+        self.assertEqual(self.cache.get('bb2'), _VALUE)
+
+
+if __name__ == '__main__':
+    unittest.main()
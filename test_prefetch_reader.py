@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import prefetch_reader
+
+
+class TestPrefetchReader(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.paths = []
+        for index in range(50):
+            path = os.path.join(self.temp_dir, '%d.idl' % index)
+            with open(path, 'w') as f:
+                f.write('interface I%d {};\n' % index)
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_order(self):
+        for window in [0, 1, 4, 100]:
+            contents = list(prefetch_reader.iter_file_contents(self.paths, window))
+            self.assertEqual(contents, [(path, 'interface I%d {};\n' % index) for index, path in enumerate(self.paths)])
+
+    def test_window(self):
+        taken = []
+
+        def generate_paths():
+            for path in self.paths:
+                taken.append(path)
+                yield path
+
+        for index, (path, _) in enumerate(prefetch_reader.iter_file_contents(generate_paths(), 3)):
+            # The reader may hold the window, one file being handed over and one waiting to be queued.
+            self.assertTrue(len(taken) <= index + 3 + 2)
+
+    def test_error(self):
+        paths = self.paths[:2] + [os.path.join(self.temp_dir, 'missing.idl')] + self.paths[2:]
+        contents = prefetch_reader.iter_file_contents(paths, 4)
+        self.assertEqual(next(contents)[0], self.paths[0])
+        self.assertEqual(next(contents)[0], self.paths[1])
+        self.assertRaises(IOError, next, contents)
+
+    def test_close(self):
+        thread_count = threading.active_count()
+        contents = prefetch_reader.iter_file_contents(self.paths, 4)
+        next(contents)
+        contents.close()
+        for thread in threading.enumerate():
+            if thread is not threading.current_thread():
+                thread.join(1)
+        self.assertEqual(threading.active_count(), thread_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import run_idl_diff
+
+
+class TestRunIdlDiff(unittest.TestCase):
+    def test_add_to_first_change_index(self):
+        index = {}
+        run_idl_diff.add_to_first_change_index(index, 'r2', {
+            'Node': {'Consts': [], 'Operations': [], 'ExtAttributes': [],
+                     'Attributes': [{'Name': 'a', 'diff_tag': 'deleted'}, {'Name': 'b'}]},
+            'Window': {'diff_tag': 'added', 'Consts': [], 'Operations': [], 'ExtAttributes': [],
+                       'Attributes': [{'Name': 'w', 'diff_tag': 'added'}]},
+        })
+        run_idl_diff.add_to_first_change_index(index, 'r3', {
+            'Node': {'Consts': [], 'Operations': [], 'ExtAttributes': [],
+                     'Attributes': [{'Name': 'a', 'diff_tag': 'added'}]},
+            'Window': {'diff_tag': 'deleted', 'Consts': [], 'Operations': [], 'ExtAttributes': [],
+                       'Attributes': [{'Name': 'w', 'diff_tag': 'deleted'}]},
+        })
+        self.assertEqual(index, {
+            'Node': {'Attributes': {'a': {'Disappeared': 'r2', 'Appeared': 'r3'}}},
+            'Window': {'Appeared': 'r2', 'Disappeared': 'r3',
+                       'Attributes': {'w': {'Appeared': 'r2', 'Disappeared': 'r3'}}},
+        })
+
+
+class TestIterSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.sources = []
+        for index in range(6):
+            source = os.path.join(self.temp_dir, '%d.json' % index)
+            with open(source, 'w') as f:
+                json.dump({'Interface%d' % index: {'Name': 'Interface%d' % index}}, f)
+            self.sources.append(source)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_order(self):
+        snapshots = [dict(snapshot) for snapshot in run_idl_diff.iter_snapshots(self.sources, 1)]
+        self.assertEqual([dict(snapshot) for snapshot in run_idl_diff.iter_snapshots(self.sources, 2)], snapshots)
+        self.assertEqual([sorted(snapshot) for snapshot in snapshots], [['Interface%d' % index] for index in range(6)])
+
+    def test_window(self):
+        taken = []
+
+        def generate_sources():
+            for source in self.sources:
+                taken.append(source)
+                yield source
+
+        for index, _ in enumerate(run_idl_diff.iter_snapshots(generate_sources(), 2)):
+            # The snapshot being consumed and the next |jobs| sources at most.
+            self.assertTrue(len(taken) <= index + 1 + 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
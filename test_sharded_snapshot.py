@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+import binary_snapshot
+import sharded_snapshot
+import snapshot_writer
+
+from interface_fixtures import make_interface
+
+
+class TestShardedSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.interfaces = {name: make_interface(name, ['a', 'b']) for name in ['Node', 'Window', 'Document']}
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_rewrite(self):
+        self.assertEqual(sharded_snapshot.write_sharded_snapshot(self.interfaces, self.temp_dir), (3, 0, 0))
+        old_manifest = sharded_snapshot.load_manifest(self.temp_dir)
+        self.assertEqual(sharded_snapshot.write_sharded_snapshot(self.interfaces, self.temp_dir), (0, 3, 0))
+        self.interfaces['Node'] = make_interface('Node', ['a'])
+        del self.interfaces['Window']
+        self.assertEqual(sharded_snapshot.write_sharded_snapshot(self.interfaces, self.temp_dir), (1, 1, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, 'shards', 'Window.json')))
+        self.assertEqual(sharded_snapshot.get_changed_shards(old_manifest, sharded_snapshot.load_manifest(self.temp_dir)),
+                         set(['Node', 'Window']))
+
+    def test_failed_manifest_write(self):
+        sharded_snapshot.write_sharded_snapshot(self.interfaces, self.temp_dir)
+        snapshot = sharded_snapshot.ShardedSnapshot(self.temp_dir)
+        del self.interfaces['Window']
+        write_file_atomically = snapshot_writer.write_file_atomically
+
+        def fail_on_manifest(path, data):
+            if path == sharded_snapshot.get_manifest_path(self.temp_dir):
+                raise IOError('disk full')
+            write_file_atomically(path, data)
+
+        snapshot_writer.write_file_atomically = fail_on_manifest
+        try:
+            self.assertRaises(IOError, sharded_snapshot.write_sharded_snapshot, self.interfaces, self.temp_dir)
+        finally:
+            snapshot_writer.write_file_atomically = write_file_atomically
+        # Every shard of the old manifest is still there for readers which opened it.
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, 'shards', 'Window.json')))
+        self.assertEqual(sorted(snapshot), ['Document', 'Node', 'Window'])
+        self.assertEqual(snapshot['Window']['Name'], 'Window')
+
+    def test_load(self):
+        sharded_snapshot.write_sharded_snapshot(self.interfaces, self.temp_dir)
+        snapshot = binary_snapshot.load_snapshot(self.temp_dir)
+        self.assertTrue(isinstance(snapshot, sharded_snapshot.ShardedSnapshot))
+        self.assertEqual(sorted(snapshot), ['Document', 'Node', 'Window'])
+        self.assertEqual(snapshot['Node'], self.interfaces['Node'])
+        self.assertEqual(dict(snapshot), self.interfaces)
+
+    def test_buckets(self):
+        shard_names = sharded_snapshot.get_shard_names(self.interfaces, 2)
+        self.assertTrue(set(shard_names) <= set(['0', '1']))
+        self.assertEqual(sorted(name for names in shard_names.values() for name in names), sorted(self.interfaces))
+        sharded_snapshot.write_sharded_snapshot(self.interfaces, self.temp_dir, 2)
+        self.assertEqual(dict(sharded_snapshot.ShardedSnapshot(self.temp_dir)), self.interfaces)
+        self.assertEqual(sharded_snapshot.get_bucket('Node', 16), sharded_snapshot.get_bucket(u'Node', 16))
+
+    def test_file_mode(self):
+        sharded_snapshot.write_sharded_snapshot(self.interfaces, self.temp_dir)
+        plain_path = os.path.join(self.temp_dir, 'plain.json')
+        with open(plain_path, 'w') as f:
+            f.write('{}')
+        mode = stat.S_IMODE(os.stat(plain_path).st_mode)
+        # Readers such as diffs and code generators may run as other users.
+        for path in [sharded_snapshot.get_manifest_path(self.temp_dir), os.path.join(self.temp_dir, 'shards', 'Node.json')]:
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), mode)
+
+    def test_invalid_name(self):
+        self.assertRaises(Exception, sharded_snapshot.get_shard_names, {'../Node': {}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+import json
+import os
+import shutil
+import StringIO
+import tempfile
+import threading
+import time
+import unittest
+import collect_idls_into_json
+import interface_node_path
+import snapshot_daemon
+
+
+def write_file(path, text):
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+class TestSnapshotDaemon(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_polling_watcher(self):
+        node = os.path.join(self.temp_dir, 'core', 'Node.idl')
+        window = os.path.join(self.temp_dir, 'core', 'Window.idl')
+        write_file(node, 'interface Node {};\n')
+        write_file(window, 'interface Window {};\n')
+        write_file(os.path.join(self.temp_dir, 'LayoutTests', 'Test.idl'), 'interface Test {};\n')
+        watcher = snapshot_daemon.PollingWatcher(self.temp_dir, interface_node_path.IdlFileFinder(['LayoutTests']))
+        self.assertEqual(watcher.get_changes(), ([], [], []))
+        added = os.path.join(self.temp_dir, 'modules', 'Added.idl')
+        write_file(added, 'interface Added {};\n')
+        write_file(node, 'interface Node { attribute long a; };\n')
+        os.remove(window)
+        write_file(os.path.join(self.temp_dir, 'LayoutTests', 'Other.idl'), 'interface Other {};\n')
+        self.assertEqual(watcher.get_changes(), ([added], [node], [window]))
+        self.assertEqual(watcher.get_changes(), ([], [], []))
+
+    def test_is_pruned_directory(self):
+        finder = interface_node_path.IdlFileFinder(['LayoutTests', 'web/tests'])
+        self.assertFalse(snapshot_daemon._is_pruned_directory(finder, 'Source', 'Source'))
+        self.assertFalse(snapshot_daemon._is_pruned_directory(finder, 'Source', 'Source/core/dom'))
+        self.assertTrue(snapshot_daemon._is_pruned_directory(finder, 'Source', 'Source/LayoutTests/fast'))
+        self.assertTrue(snapshot_daemon._is_pruned_directory(finder, 'Source', 'Source/web/tests'))
+        self.assertFalse(snapshot_daemon._is_pruned_directory(finder, 'Source', 'Source/tests'))
+
+
+class ListWatcher(object):
+    """Watcher which returns prepared changes, one per call, and then no changes."""
+
+    name = 'list'
+
+    def __init__(self):
+        self.changes = []
+
+    def get_changes(self):
+        return self.changes.pop(0) if self.changes else ([], [], [])
+
+
+class TestSnapshotDaemonAnswers(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.node = os.path.join(self.temp_dir, 'core', 'Node.idl')
+        self.window = os.path.join(self.temp_dir, 'core', 'Window.idl')
+        write_file(self.node, 'interface Node { attribute long a; };\n')
+        write_file(self.window, 'interface Window {};\n')
+        self.finder = interface_node_path.IdlFileFinder()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def collect(self):
+        """Returns the snapshot of a full collection of the tree, as JSON."""
+        interfaces = collect_idls_into_json.collect_interfaces(list(self.finder.get_idl_files(self.temp_dir)))
+        return json.loads(json.dumps(interfaces))
+
+    def answer(self, daemon, command, names=()):
+        out = StringIO.StringIO()
+        daemon.write_answer(command, list(names), out)
+        return json.loads(out.getvalue())
+
+    def test_refresh(self):
+        daemon = snapshot_daemon.SnapshotDaemon(self.temp_dir, snapshot_daemon.PollingWatcher(self.temp_dir, self.finder),
+                                                self.finder)
+        self.assertFalse(daemon.refresh())
+        added = os.path.join(self.temp_dir, 'modules', 'Added.idl')
+        write_file(added, 'interface Added {};\n')
+        write_file(self.node, 'interface Node { attribute long a; attribute long b; };\n')
+        os.remove(self.window)
+        self.assertTrue(daemon.refresh())
+        self.assertEqual(daemon.updates, 1)
+        self.assertEqual(sorted(daemon.interfaces), ['Added', 'Node'])
+        self.assertEqual(self.answer(daemon, 'snapshot'), self.collect())
+        self.assertFalse(daemon.refresh())
+        self.assertEqual(daemon.updates, 1)
+
+    def test_write_answer(self):
+        watcher = ListWatcher()
+        daemon = snapshot_daemon.SnapshotDaemon(self.temp_dir, watcher, self.finder)
+        self.assertEqual(self.answer(daemon, 'snapshot', ['Node']).keys(), ['Node'])
+        self.assertRaises(Exception, daemon.write_answer, 'snapshot', ['Missing'], StringIO.StringIO())
+        self.assertEqual(self.answer(daemon, 'diff'), {})
+
+        write_file(self.node, 'interface Node { attribute long a; attribute long b; };\n')
+        watcher.changes.append(([], [self.node], []))
+        self.assertTrue(daemon.refresh())
+        self.assertEqual(self.answer(daemon, 'diff').keys(), ['Node'])
+        status = self.answer(daemon, 'status')
+        self.assertEqual(status['Interfaces'], 2)
+        self.assertEqual(status['Files'], 2)
+        self.assertEqual(status['Updates'], 1)
+        self.assertNotEqual(status['RootDigest'], status['BaselineRootDigest'])
+
+        status = self.answer(daemon, 'rebase')
+        self.assertEqual(status['RootDigest'], status['BaselineRootDigest'])
+        self.assertEqual(self.answer(daemon, 'diff'), {})
+
+    def test_failed_update(self):
+        watcher = ListWatcher()
+        daemon = snapshot_daemon.SnapshotDaemon(self.temp_dir, watcher, self.finder)
+        snapshot = self.answer(daemon, 'snapshot')
+        watcher.changes.append(([os.path.join(self.temp_dir, 'core', 'Missing.idl')], [], []))
+        self.assertFalse(daemon.refresh())
+        self.assertTrue(daemon.error)
+        # The last good snapshot is still served.
+        self.assertEqual(self.answer(daemon, 'snapshot'), snapshot)
+        self.assertEqual(self.answer(daemon, 'status')['Error'], daemon.error)
+
+        # The next change collects everything again, including files changed since the failure.
+        write_file(self.window, 'interface Window { attribute long a; };\n')
+        watcher.changes.append(([], [self.node], []))
+        self.assertTrue(daemon.refresh())
+        self.assertIsNone(daemon.error)
+        self.assertEqual(self.answer(daemon, 'snapshot'), self.collect())
+
+    def test_unknown_changes(self):
+        watcher = ListWatcher()
+        daemon = snapshot_daemon.SnapshotDaemon(self.temp_dir, watcher, self.finder)
+        write_file(os.path.join(self.temp_dir, 'modules', 'Added.idl'), 'interface Added {};\n')
+        watcher.changes.append(None)
+        self.assertTrue(daemon.refresh())
+        self.assertEqual(self.answer(daemon, 'snapshot'), self.collect())
+
+    def test_serve(self):
+        socket_file = os.path.join(self.temp_dir, 'daemon.sock')
+        options, args = snapshot_daemon.parse_options(['--socket', socket_file, '--poll', '--no-cache',
+                                                       'serve', self.temp_dir])
+        server_thread = threading.Thread(target=snapshot_daemon.serve, args=(self.temp_dir, options))
+        server_thread.start()
+        try:
+            deadline = time.time() + 30
+            while not os.path.exists(socket_file) and server_thread.is_alive() and time.time() < deadline:
+                time.sleep(0.05)
+            out = StringIO.StringIO()
+            self.assertTrue(snapshot_daemon.query(socket_file, 'snapshot', ['Node'], out))
+            self.assertEqual(json.loads(out.getvalue()).keys(), ['Node'])
+            write_file(os.path.join(self.temp_dir, 'modules', 'Added.idl'), 'interface Added {};\n')
+            out = StringIO.StringIO()
+            self.assertTrue(snapshot_daemon.query(socket_file, 'diff', (), out))
+            self.assertEqual(json.loads(out.getvalue()).keys(), ['Added'])
+        finally:
+            snapshot_daemon.query(socket_file, 'stop', (), StringIO.StringIO())
+            server_thread.join(30)
+        self.assertFalse(server_thread.is_alive())
+        self.assertFalse(os.path.exists(socket_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+import snapshot_store
+
+from interface_fixtures import make_interface
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.store_dir = tempfile.mkdtemp()
+        self.store = snapshot_store.SnapshotStore(self.store_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.store_dir)
+
+    def test_add_and_load(self):
+        old = {'Node': make_interface('Node', ['a']), 'Window': make_interface('Window', [])}
+        new = {'Node': make_interface('Node', ['a', 'b']), 'Window': make_interface('Window', [])}
+        self.assertEqual(self.store.add_snapshot('r2', old), 2)
+        self.assertEqual(self.store.add_snapshot('r1', new), 1)
+        self.assertEqual(self.store.list_revisions(), ['r2', 'r1'])
+        self.assertEqual(snapshot_store.SnapshotStore(self.store_dir).load_revision('r2'), old)
+        loaded = self.store.load_revision('r1')
+        self.assertEqual(loaded, new)
+        self.assertTrue(loaded['Window'] is self.store.load_revision('r2')['Window'])
+
+    def test_diff_revisions(self):
+        self.store.add_snapshot('r1', {'Node': make_interface('Node', ['a']), 'Old': make_interface('Old', [])})
+        self.store.add_snapshot('r2', {'Node': make_interface('Node', ['b']), 'New': make_interface('New', [])})
+        diff = self.store.diff_revisions('r1', 'r2')
+        self.assertEqual(sorted(diff), ['New', 'Node', 'Old'])
+        self.assertEqual([(attribute['Name'], attribute['diff_tag']) for attribute in diff['Node']['Attributes']],
+                         [('b', 'added'), ('a', 'deleted')])
+
+    def test_file_mode(self):
+        key, _ = self.store.put_interface(make_interface('Node', ['a']))
+        self.store.add_snapshot('r1', {})
+        plain_path = os.path.join(self.store_dir, 'plain.json')
+        with open(plain_path, 'w') as f:
+            f.write('{}')
+        mode = stat.S_IMODE(os.stat(plain_path).st_mode)
+        # A store may be shared by several users and CI jobs.
+        for path in [self.store._get_object_path(key), self.store._get_manifest_path('r1')]:
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), mode)
+
+    def test_unknown_revision(self):
+        self.assertRaises(Exception, self.store.load_manifest, 'r1')
+        self.assertRaises(Exception, self.store.add_snapshot, '../r1', {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+import json
+import os
+import shutil
+import stat
+import StringIO
+import tempfile
+import unittest
+import snapshot_writer
+
+_SNAPSHOT = {
+    'Node': {'Name': 'Node', 'Attributes': [{'Name': 'parentNode', 'Type': 'Node', 'Readonly': True}], 'Inherit': {'Parent': 'EventTarget'}},
+    'EventTarget': {'Name': 'EventTarget', 'Attributes': [], 'Inherit': {'Parent': None}},
+}
+
+
+def write(dictionary, indent):
+    out = StringIO.StringIO()
+    snapshot_writer.write_interfaces(((name, dictionary[name]) for name in sorted(dictionary)), out, indent)
+    return out.getvalue()
+
+
+def dump(dictionary, indent):
+    out = StringIO.StringIO()
+    json.dump(dictionary, out, sort_keys=True, indent=indent)
+    return out.getvalue()
+
+
+class TestSnapshotWriter(unittest.TestCase):
+    def test_compact(self):
+        self.assertEqual(write(_SNAPSHOT, None), dump(_SNAPSHOT, None))
+
+    def test_pretty(self):
+        self.assertEqual(write(_SNAPSHOT, 4), dump(_SNAPSHOT, 4))
+
+    def test_empty(self):
+        self.assertEqual(write({}, None), dump({}, None))
+        self.assertEqual(write({}, 4), dump({}, 4))
+
+
+class TestWriteFileAtomically(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_write_file_atomically(self):
+        path = os.path.join(self.temp_dir, 'objects', 'ab', 'Node.json')
+        snapshot_writer.write_file_atomically(path, '{}')
+        snapshot_writer.write_file_atomically(path, '{"Node": {}}')
+        with open(path) as f:
+            self.assertEqual(f.read(), '{"Node": {}}')
+        self.assertEqual(os.listdir(os.path.dirname(path)), ['Node.json'])
+        # Files get the permissions of open(), not the owner-only ones of tempfile.mkstemp.
+        with open(os.path.join(self.temp_dir, 'plain.json'), 'w') as f:
+            f.write('{}')
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode),
+                         stat.S_IMODE(os.stat(os.path.join(self.temp_dir, 'plain.json')).st_mode))
+
+    def test_umask(self):
+        umask = os.umask(022)
+        os.umask(umask)
+        self.assertEqual(snapshot_writer._FILE_MODE, 0666 & ~umask)
+
+
+if __name__ == '__main__':
+    unittest.main()